@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Memory and ``to_dict`` cost of ``RawItem`` at backfill scale.
+
+Builds the same items twice, once with the current slotted, interned
+``RawItem`` and once with the previous layout (plain dataclass, one JSON
+payload string per item, ``asdict``), and prints the retained memory per item
+and the time to turn every item into a dict.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from my_ai_news.models import RawItem
+
+
+@dataclass
+class LegacyRawItem:
+    source_id: str
+    source_name: str
+    category: str
+    title: str
+    url: str
+    canonical_url: str
+    summary: str
+    image_url: str
+    published_at: str
+    published_date: str
+    fetched_at: str
+    fingerprint: str
+    payload_json: str
+    is_new: bool = True
+    duplicate_sources: list[dict] = field(default_factory=list)
+    related_items: list[dict] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def fresh(value: str) -> str:
+    """A new string object, like every column value decoded from a SQLite row."""
+    return "".join(list(value))
+
+
+def build_items(count: int, *, legacy: bool) -> list:
+    items = []
+    for index in range(count):
+        source = index % 60
+        day = 1 + index % 28
+        url = f"https://source-{source}.example/2026/05/{day:02d}/story-{index}"
+        title = f"Story {index}: model release notes and benchmark results from lab {source}"
+        summary = f"Summary of story {index}. " * 12
+        entry = {"title": title, "link": url, "summary": summary, "published": f"2026-05-{day:02d}T08:00:00Z"}
+        values = dict(
+            source_id=fresh(f"source-{source}"),
+            source_name=fresh(f"Source {source}"),
+            category=fresh("人工智能"),
+            title=title,
+            url=url,
+            canonical_url=url,
+            summary=summary,
+            image_url="",
+            published_at=entry["published"],
+            published_date=fresh(f"2026-05-{day:02d}"),
+            fetched_at=fresh("2026-05-28T09:00:00Z"),
+            fingerprint=f"{index:016x}",
+        )
+        if legacy:
+            items.append(LegacyRawItem(**values, payload_json=json.dumps(entry, ensure_ascii=False)))
+        else:
+            items.append(RawItem(**values, payload_json=entry))
+    return items
+
+
+def measure(count: int, *, legacy: bool) -> tuple[float, float]:
+    tracemalloc.start()
+    items = build_items(count, legacy=legacy)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    for item in items:
+        item.to_dict()
+    return retained / count, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for label, legacy in (("dataclass + json payload", True), ("slotted + interned", False)):
+        per_item, to_dict_seconds = measure(args.items, legacy=legacy)
+        print(f"{label:26} {per_item:8.0f} bytes/item  {per_item * args.items / 2**20:7.1f} MiB  to_dict {to_dict_seconds:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
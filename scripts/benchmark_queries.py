@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""History read cost with and without the migration indexes.
+
+Fills a scratch database with ``--rows`` stories and as many source_runs rows,
+times the typical history reads as full scans (schema only), then applies
+``MIGRATIONS`` and times the same reads through ``my_ai_news.queries``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from my_ai_news.db import SCHEMA, connect, migrate
+from my_ai_news.health import load_source_history
+from my_ai_news.queries import source_history, stories_between, top_stories_by_category
+
+
+CATEGORIES = ["人工智能", "科技", "游戏影视", "商业", "科学"]
+SOURCES = [f"source-{index}" for index in range(40)]
+
+
+def fill(connection, rows: int) -> None:
+    rng = random.Random(7)
+    days = max(1, rows // 400)
+    connection.execute("INSERT INTO runs (started_at, status) VALUES ('2026-01-01T00:00:00Z', 'success')")
+    batch = 50_000
+    for start in range(0, rows, batch):
+        connection.executemany(
+            """
+            INSERT INTO stories (run_id, source_id, source_name, category, title, url, score, story_date)
+            VALUES (1, ?, ?, ?, ?, ?, ?, date('2020-01-01', ? || ' days'))
+            """,
+            [
+                (source, source, rng.choice(CATEGORIES), f"story {index}", f"https://example.com/{index}", rng.randrange(100), index * days // rows)
+                for index in range(start, min(rows, start + batch))
+                for source in (rng.choice(SOURCES),)
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO source_runs (run_id, source_id, source_name, status, created_at, duration_ms) VALUES (1, ?, ?, 'success', '2026-01-01T00:00:00Z', ?)",
+            [(source, source, rng.randrange(2000)) for _ in range(start, min(rows, start + batch)) for source in (rng.choice(SOURCES),)],
+        )
+    connection.commit()
+
+
+def timed(label: str, function, repeat: int = 5) -> None:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    print(f"  {label:34} {(time.perf_counter() - started) / repeat * 1000:9.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        connection = connect(Path(scratch) / "bench.db")
+        connection.executescript(SCHEMA)
+        started = time.perf_counter()
+        fill(connection, args.rows)
+        print(f"filled {args.rows} stories and source_runs in {time.perf_counter() - started:.1f}s")
+        last_day = connection.execute("SELECT MAX(story_date) FROM stories").fetchone()[0]
+        first_day = connection.execute("SELECT date(?, '-6 days')", (last_day,)).fetchone()[0]
+
+        print("full scans (no indexes):")
+        timed("stories in last 7 days, page 1", lambda: connection.execute(
+            "SELECT * FROM stories WHERE story_date BETWEEN ? AND ? ORDER BY story_date DESC, score DESC, id DESC LIMIT 200",
+            (first_day, last_day),
+        ).fetchall())
+        timed("top 10 per category for a day", lambda: connection.execute(
+            "SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY category ORDER BY score DESC) AS position FROM stories WHERE story_date = ?) WHERE position <= 10",
+            (last_day,),
+        ).fetchall())
+        timed("one source's last 50 runs", lambda: connection.execute(
+            "SELECT * FROM source_runs WHERE source_id = ? ORDER BY id DESC LIMIT 50", (SOURCES[0],)
+        ).fetchall())
+        timed("health window, all sources", lambda: load_source_history(connection), repeat=1)
+
+        started = time.perf_counter()
+        migrate(connection)
+        print(f"migrations applied in {time.perf_counter() - started:.1f}s")
+        print("queries module (indexed):")
+        timed("stories in last 7 days, page 1", lambda: stories_between(connection, first_day, last_day))
+        timed("top 10 per category for a day", lambda: top_stories_by_category(connection, last_day))
+        timed("one source's last 50 runs", lambda: source_history(connection, SOURCES[0]))
+        timed("health window, all sources", lambda: load_source_history(connection, SOURCES), repeat=1)
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 import json
+import sys
 from pathlib import Path
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from my_ai_news.publish import content_hash, day_entry, encode_json
 
 
 SAMPLE_ARCHIVE = {
@@ -63,11 +69,17 @@ def main() -> int:
     publish_dir.mkdir(parents=True, exist_ok=True)
     daily_dir.mkdir(parents=True, exist_ok=True)
 
-    with (publish_dir / "latest.json").open("w", encoding="utf-8") as handle:
-        json.dump(SAMPLE_ARCHIVE, handle, ensure_ascii=False, indent=2)
+    latest_data = encode_json(SAMPLE_ARCHIVE)
+    (publish_dir / "latest.json").write_bytes(latest_data)
+
+    daily_data = encode_json({"2026-03-17": SAMPLE_ARCHIVE["2026-03-17"]})
+    (daily_dir / "2026-03-17.json").write_bytes(daily_data)
 
-    with (daily_dir / "2026-03-17.json").open("w", encoding="utf-8") as handle:
-        json.dump({"2026-03-17": SAMPLE_ARCHIVE["2026-03-17"]}, handle, ensure_ascii=False, indent=2)
+    manifest = {
+        "latest": {"file": "latest.json", "hash": content_hash(latest_data), "days": list(SAMPLE_ARCHIVE)},
+        "days": [day_entry("2026-03-17", SAMPLE_ARCHIVE["2026-03-17"], daily_data)],
+    }
+    (publish_dir / "manifest.json").write_bytes(encode_json(manifest))
 
     with (publish_dir / "status.json").open("w", encoding="utf-8") as handle:
         json.dump(SAMPLE_STATUS, handle, ensure_ascii=False, indent=2)
@@ -3,10 +3,16 @@ from __future__ import annotations
 import json
 import re
 from dataclasses import dataclass
-
-from openai import OpenAI
+from functools import lru_cache
 
 from .config import AppConfig
+from .llm_endpoints import EndpointPool
+from .llm_limits import current_llm_limiter
+
+
+# Bump whenever the enrichment prompt or its parsing changes so cached results
+# produced by the old prompt are no longer served.
+PROMPT_VERSION = "2026-04-v2"
 
 
 @dataclass(frozen=True)
@@ -27,71 +33,138 @@ ASCII_STOPWORDS = {
 }
 
 
-ASCII_WORD_REPLACEMENTS: list[tuple[str, str]] = [
-    (r"\bthe next evolution of\b", "下一阶段演进"),
-    (r"\bupdates?\b", "更新"),
-    (r"\bupdated\b", "已更新"),
-    (r"\bhelp(?:ing)?\b", "帮助"),
-    (r"\bbuild(?:ing)?\b", "构建"),
-    (r"\bsafer\b", "更安全"),
-    (r"\bsecure\b", "安全"),
-    (r"\bmore capable\b", "更强大"),
-    (r"\bcapable\b", "强大"),
-    (r"\benterprises?\b", "企业"),
-    (r"\bdevelopers?\b", "开发者"),
-    (r"\bagents?\b", "智能体"),
-    (r"\bsdk\b", "SDK"),
-    (r"\bmodel-native\b", "模型原生"),
-    (r"\bnative sandbox execution\b", "原生沙箱执行"),
-    (r"\bsandbox\b", "沙箱"),
-    (r"\bharness\b", "框架"),
-    (r"\blong-running\b", "长时间运行"),
-    (r"\btools?\b", "工具"),
-    (r"\bfiles?\b", "文件"),
-    (r"\bmarketing\b", "营销"),
-    (r"\bplatform\b", "平台"),
-    (r"\bpowered by ai\b", "由 AI 驱动"),
-    (r"\bfueled by\b", "受益于"),
-    (r"\breaches?\b", "达到"),
-    (r"\bnews\b", "动态"),
-    (r"\blatest\b", "最新"),
-    (r"\bopenai\b", "OpenAI"),
-    (r"\btechcrunch\b", "TechCrunch"),
-    (r"\bai\b", "AI"),
+# Whole-word (case-insensitive) phrase -> Chinese replacement, including the
+# connectives that used to be substituted in a second pass.
+ASCII_WORD_REPLACEMENTS: dict[str, str] = {
+    "the next evolution of": "下一阶段演进",
+    "update": "更新",
+    "updates": "更新",
+    "updated": "已更新",
+    "help": "帮助",
+    "helping": "帮助",
+    "build": "构建",
+    "building": "构建",
+    "safer": "更安全",
+    "secure": "安全",
+    "more capable": "更强大",
+    "capable": "强大",
+    "enterprise": "企业",
+    "enterprises": "企业",
+    "developer": "开发者",
+    "developers": "开发者",
+    "agent": "智能体",
+    "agents": "智能体",
+    "sdk": "SDK",
+    "model-native": "模型原生",
+    "native sandbox execution": "原生沙箱执行",
+    "sandbox": "沙箱",
+    "harness": "框架",
+    "long-running": "长时间运行",
+    "tool": "工具",
+    "tools": "工具",
+    "file": "文件",
+    "files": "文件",
+    "marketing": "营销",
+    "platform": "平台",
+    "powered by ai": "由 AI 驱动",
+    "fueled by": "受益于",
+    "reache": "达到",
+    "reaches": "达到",
+    "news": "动态",
+    "latest": "最新",
+    "openai": "OpenAI",
+    "techcrunch": "TechCrunch",
+    "ai": "AI",
+    "to": "以",
+    "with": "结合",
+    "for": "面向",
+    "across": "覆盖",
+    "and": "与",
+    "continue": "持续",
+    "continues": "持续",
+    "grow": "增长",
+    "growing": "增长",
+    "in just": "在",
+    "after": "在…之后",
+}
+
+ANCHOR_REPLACEMENTS = {
+    "agents": "智能体",
+    "agent": "智能体",
+    "developers": "开发者",
+    "developer": "开发者",
+    "enterprise": "企业",
+    "enterprises": "企业",
+    "models": "模型",
+    "model": "模型",
+    "features": "功能",
+    "feature": "功能",
+    "funding": "融资",
+    "revenue": "营收",
+}
+ANCHOR_NOISE = {"ai", "news", "latest", "new", "now", "the", "this", "that"}
+
+# Checked in order; the first signal with a keyword anywhere in the text wins.
+SIGNAL_KEYWORDS: list[tuple[str, list[str]]] = [
+    ("business", ["arr", "funding", "raises", "raised", "revenue", "$", "融资", "营收", "估值"]),
+    ("product", ["launch", "launched", "update", "updated", "sdk", "feature", "model", "release", "发布", "更新", "上线", "推出"]),
+    ("risk", ["lawsuit", "risk", "ban", "probe", "controvers", "争议", "风险", "调查", "封禁"]),
 ]
 
 
+def _literal_alternation(words: list[str]) -> str:
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# One pass over the text: every phrase is a whole-word literal whose
+# replacement starts and ends with a word character, and no phrase can match
+# inside another phrase's replacement, so this gives the same text as applying
+# the phrases one at a time.
+PHRASE_RE = re.compile(rf"\b(?:{_literal_alternation(list(ASCII_WORD_REPLACEMENTS))})\b", re.IGNORECASE)
+# Keyword tests are substring matches, so each signal gets its own alternation
+# and the signals are tried in priority order.
+SIGNAL_RES = [(signal, re.compile(_literal_alternation(keywords))) for signal, keywords in SIGNAL_KEYWORDS]
+
+WHITESPACE_RE = re.compile(r"\s+")
+ANCHOR_RE = re.compile(r"\b(?:[A-Z]{2,}|[A-Z][a-zA-Z0-9.+-]{1,}|\$?\d+(?:\.\d+)?[A-Za-z%]*)\b")
+SOURCE_PART_RE = re.compile(r"[A-Za-z0-9.+-]+")
+MIXED_PUNCTUATION_RE = re.compile(r"[,:;]+")
+MIXED_PART_RE = re.compile(r"[\u4e00-\u9fffA-Za-z0-9$%+.\-/]+")
+LOWER_WORD_RE = re.compile(r"[a-z]+")
+SPACE_BEFORE_PUNCTUATION_RE = re.compile(r"\s+([，。；：])")
+SPACE_BETWEEN_CJK_RE = re.compile(r"([\u4e00-\u9fff])\s+([\u4e00-\u9fff])")
+
+
 class AIEnricher:
     def enrich(self, *, category: str, source_name: str, title: str, summary: str, url: str) -> EnrichmentResult:
         raise NotImplementedError
 
+    def enrich_many(self, items: list[dict]) -> list[EnrichmentResult | Exception]:
+        """Enrich each item (``enrich`` keyword arguments); failures are returned in place."""
+        results: list[EnrichmentResult | Exception] = []
+        for item in items:
+            try:
+                results.append(self.enrich(**item))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
 
 def contains_cjk(value: str) -> bool:
     return any("\u4e00" <= char <= "\u9fff" for char in value)
 
 
 def normalize_spaces(value: str) -> str:
-    return re.sub(r"\s+", " ", value).strip(" -—:：，,。.\t\n")
+    return WHITESPACE_RE.sub(" ", value).strip(" -—:：，,。.\t\n")
 
 
 def replace_english_phrases(value: str) -> str:
-    text = normalize_spaces(value)
-    for pattern, replacement in ASCII_WORD_REPLACEMENTS:
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-    text = re.sub(r"\bto\b", "以", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bwith\b", "结合", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bfor\b", "面向", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bacross\b", "覆盖", text, flags=re.IGNORECASE)
-    text = re.sub(r"\band\b", "与", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bcontinues?\b", "持续", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bgrow(?:ing)?\b", "增长", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bin just\b", "在", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bafter\b", "在…之后", text, flags=re.IGNORECASE)
+    text = PHRASE_RE.sub(lambda match: ASCII_WORD_REPLACEMENTS[match.group(0).lower()], normalize_spaces(value))
     return normalize_spaces(text)
 
 
 def extract_anchor_terms(value: str) -> list[str]:
-    anchors = re.findall(r"\b(?:[A-Z]{2,}|[A-Z][a-zA-Z0-9.+-]{1,}|\$?\d+(?:\.\d+)?[A-Za-z%]*)\b", value)
+    anchors = ANCHOR_RE.findall(value)
     deduped: list[str] = []
     for anchor in anchors:
         if anchor.lower() in ASCII_STOPWORDS:
@@ -102,29 +175,15 @@ def extract_anchor_terms(value: str) -> list[str]:
 
 
 def normalize_anchor_terms(*, source_name: str, anchors: list[str]) -> list[str]:
-    source_parts = {part.lower() for part in re.findall(r"[A-Za-z0-9.+-]+", source_name)}
-    replacements = {
-        "agents": "智能体",
-        "agent": "智能体",
-        "developers": "开发者",
-        "developer": "开发者",
-        "enterprise": "企业",
-        "enterprises": "企业",
-        "models": "模型",
-        "model": "模型",
-        "features": "功能",
-        "feature": "功能",
-        "funding": "融资",
-        "revenue": "营收",
-    }
+    source_parts = {part.lower() for part in SOURCE_PART_RE.findall(source_name)}
     filtered: list[str] = []
     for anchor in anchors:
         lowered = anchor.lower().strip()
         if lowered in source_parts:
             continue
-        if lowered in {"ai", "news", "latest", "new", "now", "the", "this", "that"}:
+        if lowered in ANCHOR_NOISE:
             continue
-        anchor = replacements.get(lowered, anchor)
+        anchor = ANCHOR_REPLACEMENTS.get(lowered, anchor)
         if filtered and filtered[-1] == anchor:
             continue
         if anchor not in filtered:
@@ -141,33 +200,35 @@ def build_anchor_phrase(*, source_name: str, title: str, summary: str) -> str:
 
 def cleanup_mixed_text(value: str) -> str:
     text = replace_english_phrases(value)
-    text = re.sub(r"[,:;]+", "，", text)
-    parts = re.findall(r"[\u4e00-\u9fffA-Za-z0-9$%+.\-/]+", text)
+    text = MIXED_PUNCTUATION_RE.sub("，", text)
+    parts = MIXED_PART_RE.findall(text)
     kept: list[str] = []
     for part in parts:
-        lowered = part.lower()
-        if re.fullmatch(r"[a-z]+", part) and lowered in ASCII_STOPWORDS:
-            continue
-        if re.fullmatch(r"[a-z]+", part):
+        if LOWER_WORD_RE.fullmatch(part):
             continue
         if kept and kept[-1] == part:
             continue
         kept.append(part)
     cleaned = " ".join(kept)
-    cleaned = re.sub(r"\s+([，。；：])", r"\1", cleaned)
-    cleaned = re.sub(r"([\u4e00-\u9fff])\s+([\u4e00-\u9fff])", r"\1\2", cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip(" ，。；：")
+    cleaned = SPACE_BEFORE_PUNCTUATION_RE.sub(r"\1", cleaned)
+    cleaned = SPACE_BETWEEN_CJK_RE.sub(r"\1\2", cleaned)
+    cleaned = WHITESPACE_RE.sub(" ", cleaned).strip(" ，。；：")
     return cleaned
 
 
+@lru_cache(maxsize=4096)
+def _keyword_signal(text: str) -> str | None:
+    lowered = text.lower()
+    for signal, pattern in SIGNAL_RES:
+        if pattern.search(lowered):
+            return signal
+    return None
+
+
 def classify_story_signal(*, title: str, summary: str, category: str) -> str:
-    text = f"{title} {summary}".lower()
-    if any(keyword in text for keyword in ["arr", "funding", "raises", "raised", "revenue", "$", "融资", "营收", "估值"]):
-        return "business"
-    if any(keyword in text for keyword in ["launch", "launched", "update", "updated", "sdk", "feature", "model", "release", "发布", "更新", "上线", "推出"]):
-        return "product"
-    if any(keyword in text for keyword in ["lawsuit", "risk", "ban", "probe", "controvers", "争议", "风险", "调查", "封禁"]):
-        return "risk"
+    signal = _keyword_signal(f"{title} {summary}")
+    if signal is not None:
+        return signal
     if category == "时事热点":
         return "world"
     return "general"
@@ -245,24 +306,92 @@ class NoopEnricher(AIEnricher):
         )
 
 
+ENRICHMENT_RULES = """
+1. title: 中文标题，保持信息准确，30字内。
+2. summary: 中文摘要，80字内，不能空话。
+3. commentary: 一句有判断的短评，30字内。
+4. tags: 1到3个中文短标签。
+5. score_delta: 0到10的整数，表示该内容相对普通内容的重要度增量。
+""".strip()
+
+# Rough allowance for one item's JSON answer when sizing a batch.
+ITEM_OUTPUT_TOKENS = 160
+
+
+def estimate_tokens(value: str) -> int:
+    """Cheap token estimate: one per CJK character, one per four other characters."""
+    cjk = sum(1 for char in value if contains_cjk(char))
+    return cjk + (len(value) - cjk + 3) // 4
+
+
+def strip_code_fence(content: str) -> str:
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip()
+
+
+def result_from_payload(payload: object, *, source_name: str, title: str, summary: str) -> EnrichmentResult:
+    if not isinstance(payload, dict):
+        raise ValueError("enrichment payload is not a JSON object")
+    tags = [str(tag).strip() for tag in payload.get("tags", []) if str(tag).strip()]
+    return EnrichmentResult(
+        title=str(payload.get("title", title)).strip() or title,
+        summary=str(payload.get("summary", summary)).strip() or summary or "暂无摘要",
+        commentary=str(payload.get("commentary", f"{source_name} 最新更新。")).strip() or f"{source_name} 最新更新。",
+        tags=tags[:3] or [source_name],
+        score_delta=max(0, min(int(payload.get("score_delta", 0)), 10)),
+    )
+
+
+def plan_batches(items: list[dict], *, max_items: int, token_budget: int) -> list[list[int]]:
+    """Group item indexes into batches of at most ``max_items`` within ``token_budget``."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for index, item in enumerate(items):
+        cost = estimate_tokens(json.dumps(item, ensure_ascii=False)) + ITEM_OUTPUT_TOKENS
+        if current and (len(current) >= max_items or used + cost > token_budget):
+            batches.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
 class OpenAICompatibleEnricher(AIEnricher):
-    def __init__(self, config: AppConfig):
-        client_kwargs = {"api_key": config.llm_api_key}
-        if config.llm_base_url:
-            client_kwargs["base_url"] = config.llm_base_url
-        self.client = OpenAI(**client_kwargs)
+    def __init__(self, config: AppConfig, endpoints: EndpointPool):
+        self.endpoints = endpoints
         self.model = config.llm_model
+        self.batch_size = config.llm_batch_size
+        self.batch_token_budget = config.llm_batch_token_budget
+
+    def _complete(self, prompt: str, *, expected_items: int = 1) -> str:
+        response = current_llm_limiter().call(
+            lambda: self.endpoints.complete(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "你是稳定、克制、准确的中文资讯编辑。"},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.3,
+            ),
+            tokens=estimate_tokens(prompt) + ITEM_OUTPUT_TOKENS * expected_items,
+        )
+        return strip_code_fence(response.choices[0].message.content or "{}")
 
     def enrich(self, *, category: str, source_name: str, title: str, summary: str, url: str) -> EnrichmentResult:
         prompt = f"""
 你是一个中文科技与资讯编辑。请把输入内容整理为严格 JSON。
 
 要求：
-1. title: 中文标题，保持信息准确，30字内。
-2. summary: 中文摘要，80字内，不能空话。
-3. commentary: 一句有判断的短评，30字内。
-4. tags: 1到3个中文短标签。
-5. score_delta: 0到10的整数，表示该内容相对普通内容的重要度增量。
+{ENRICHMENT_RULES}
 6. 输出必须是 JSON object，不要 Markdown。
 
 输入：
@@ -273,36 +402,80 @@ summary={summary}
 url={url}
 """.strip()
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "你是稳定、克制、准确的中文资讯编辑。"},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content or "{}"
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-
-        payload = json.loads(content.strip())
-        tags = [str(tag).strip() for tag in payload.get("tags", []) if str(tag).strip()]
+        payload = json.loads(self._complete(prompt))
+        return result_from_payload(payload, source_name=source_name, title=title, summary=summary)
+
+    def enrich_many(self, items: list[dict]) -> list[EnrichmentResult | Exception]:
+        batches = [
+            [items[index] for index in batch]
+            for batch in plan_batches(items, max_items=self.batch_size, token_budget=self.batch_token_budget)
+        ]
+        results: list[EnrichmentResult | Exception] = []
+        for batch, outcome in zip(batches, current_llm_limiter().map(self._enrich_batch, batches)):
+            results.extend([outcome] * len(batch) if isinstance(outcome, Exception) else outcome)
+        return results
+
+    def _enrich_batch(self, items: list[dict]) -> list[EnrichmentResult | Exception]:
+        if len(items) == 1:
+            return super().enrich_many(items)
+
+        entries = [
+            {"id": index, "category": item["category"], "source": item["source_name"], "title": item["title"], "summary": item["summary"], "url": item["url"]}
+            for index, item in enumerate(items)
+        ]
+        prompt = f"""
+你是一个中文科技与资讯编辑。下面 items 中的每一条资讯都请整理为一个 JSON object。
 
-        return EnrichmentResult(
-            title=str(payload.get("title", title)).strip() or title,
-            summary=str(payload.get("summary", summary)).strip() or summary or "暂无摘要",
-            commentary=str(payload.get("commentary", f"{source_name} 最新更新。")).strip() or f"{source_name} 最新更新。",
-            tags=tags[:3] or [source_name],
-            score_delta=max(0, min(int(payload.get("score_delta", 0)), 10)),
-        )
+每条要求：
+0. id: 原样返回输入的 id。
+{ENRICHMENT_RULES}
+6. 输出必须是 JSON array，按输入顺序每条一个元素，不要 Markdown。
 
+items={json.dumps(entries, ensure_ascii=False)}
+""".strip()
 
-def build_enricher(config: AppConfig) -> AIEnricher:
-    if not config.llm_enabled or not config.llm_api_key:
+        try:
+            content = self._complete(prompt, expected_items=len(items))
+        except Exception as exc:
+            return [exc] * len(items)
+
+        try:
+            payload = json.loads(content)
+            if isinstance(payload, dict):
+                payload = payload.get("items")
+            if not isinstance(payload, list):
+                raise ValueError("batch response is not a JSON array")
+            by_id = {}
+            for element in payload:
+                if isinstance(element, dict) and str(element.get("id", "")).isdigit():
+                    by_id[int(element["id"])] = element
+            if set(by_id) != set(range(len(items))):
+                if len(payload) != len(items):
+                    raise ValueError(f"batch response has {len(payload)} elements for {len(items)} items")
+                by_id = dict(enumerate(payload))
+        except ValueError:
+            # Unparseable or misaligned answer: retry each half on its own.
+            middle = len(items) // 2
+            return self._enrich_batch(items[:middle]) + self._enrich_batch(items[middle:])
+
+        results: list[EnrichmentResult | Exception] = []
+        for index, item in enumerate(items):
+            try:
+                results.append(
+                    result_from_payload(
+                        by_id.get(index),
+                        source_name=item["source_name"],
+                        title=item["title"],
+                        summary=item["summary"],
+                    )
+                )
+            except (TypeError, ValueError) as exc:
+                results.append(exc)
+        return results
+
+
+def build_enricher(config: AppConfig, endpoints: EndpointPool | None) -> AIEnricher:
+    """The model-backed enricher on the run's ``endpoints``; ``NoopEnricher`` without them."""
+    if endpoints is None or not config.llm_enabled or not config.llm_api_key:
         return NoopEnricher()
-    return OpenAICompatibleEnricher(config)
+    return OpenAICompatibleEnricher(config, endpoints)
@@ -6,7 +6,7 @@ import sys
 from pathlib import Path
 
 from .config import load_config
-from .pipeline import run_pipeline
+from .pipeline import compact_database, run_pipeline
 
 
 def format_run_summary(result: dict) -> str:
@@ -17,6 +17,16 @@ def format_run_summary(result: dict) -> str:
         f"raw_items: {result.get('raw_items', 0)}",
         f"stories: {result.get('stories', 0)}",
     ]
+    if result.get("near_duplicates"):
+        lines.append(f"near_duplicates: {result['near_duplicates']}")
+    if result.get("clustered_items"):
+        lines.append(f"clustered_items: {result['clustered_items']}")
+    published_files = result.get("published_files") or {}
+    if published_files:
+        lines.append(f"published_files: {len(published_files.get('written', []))} written, {len(published_files.get('unchanged', []))} unchanged")
+    database_stats = result.get("database_stats") or {}
+    if database_stats:
+        lines.append(f"database: {database_stats.get('commits', 0)} commits, {database_stats.get('time_ms', 0)} ms")
 
     llm = result.get("llm") or {}
     if llm:
@@ -24,6 +34,12 @@ def format_run_summary(result: dict) -> str:
         degraded_items = llm.get("degraded_items")
         if degraded_items:
             lines.append(f"llm_degraded_items: {degraded_items}")
+        deferred_items = llm.get("deferred_items")
+        if deferred_items:
+            lines.append(f"llm_deferred_items: {deferred_items}")
+        cache = llm.get("cache") or {}
+        if cache:
+            lines.append(f"llm_cache: {cache.get('hits', 0)} hits, {cache.get('misses', 0)} misses")
 
     x_digest = result.get("x_digest") or {}
     if x_digest:
@@ -37,7 +53,7 @@ def format_run_summary(result: dict) -> str:
 
     source_statuses = result.get("source_statuses") or []
     if source_statuses:
-        success_statuses = {"success", "empty"}
+        success_statuses = {"success", "empty", "not_modified"}
         degraded_statuses = {"fallback_success", "fallback_empty"}
         failed = [item for item in source_statuses if item.get("status") not in success_statuses | degraded_statuses]
         degraded = [item for item in source_statuses if item.get("status") in degraded_statuses]
@@ -79,6 +95,16 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Print machine-readable JSON instead of the human summary.",
     )
+    parser.add_argument(
+        "--clear-llm-cache",
+        action="store_true",
+        help="Drop cached LLM enrichments before running (use after changing the prompt).",
+    )
+    parser.add_argument(
+        "--compact-db",
+        action="store_true",
+        help="Fold per-run duplicate story rows left by older versions into one row each, then vacuum.",
+    )
     return parser
 
 
@@ -90,10 +116,12 @@ def main(argv: list[str] | None = None) -> int:
 
     if args.status:
         payload = load_status(project_root)
+    elif args.compact_db:
+        payload = compact_database(project_root)
     else:
-        payload = run_pipeline(project_root)
+        payload = run_pipeline(project_root, clear_llm_cache=args.clear_llm_cache)
 
-    if args.json:
+    if args.json or args.compact_db:
         print(json.dumps(payload, ensure_ascii=False, indent=2))
     else:
         print(format_run_summary(payload))
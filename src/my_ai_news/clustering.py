@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import replace
+from typing import Callable
+
+from .models import RawItem
+from .processing import story_date_from_item, strip_html
+
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:['.+-][a-z0-9]+)*")
+CJK_RUN_RE = re.compile(r"[一-鿿㐀-䶿]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+# Terms found in more than this share of a day's items carry no signal and
+# would make every posting list long.
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Terms in more than this share of the items (and more than the floor) are
+# left out of the inverted index; see ``similar_pairs``.
+INDEXED_DOCUMENT_FREQUENCY = 0.03
+INDEXED_DOCUMENT_FREQUENCY_FLOOR = 8
+
+
+def terms(text: str) -> list[str]:
+    """English words (minus stopwords) and CJK character bigrams."""
+    text = strip_html(text).lower()
+    found = [word for word in WORD_RE.findall(text) if word not in STOPWORDS and len(word) > 1]
+    for run in CJK_RUN_RE.findall(text):
+        found.extend(run[index:index + 2] for index in range(max(1, len(run) - 1)))
+    return found
+
+
+def tfidf_vectors(documents: list[list[str]]) -> list[dict[str, float]]:
+    """L2-normalised sparse TF-IDF vectors (term -> weight), smoothed idf."""
+    counts = [Counter(document) for document in documents]
+    document_frequency: Counter[str] = Counter()
+    for count in counts:
+        document_frequency.update(count.keys())
+    total = len(documents)
+    max_frequency = max(2, MAX_DOCUMENT_FREQUENCY * total)
+    idf = {
+        term: math.log((1 + total) / (1 + frequency)) + 1
+        for term, frequency in document_frequency.items()
+        if frequency <= max_frequency
+    }
+    vectors: list[dict[str, float]] = []
+    for count in counts:
+        vector = {term: frequency * idf[term] for term, frequency in count.items() if term in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in vector.items()})
+    return vectors
+
+
+def similar_pairs(vectors: list[dict[str, float]], threshold: float) -> list[tuple[int, int, float]]:
+    """Pairs ``(i, j, cosine)`` with ``i < j`` and cosine at least ``threshold``.
+
+    Dot products are accumulated through an inverted index (term -> postings),
+    i.e. a sparse ``X @ X.T``, so documents sharing no term are never compared.
+    Only rare terms are indexed: a pair has to share at least one term that
+    is not among the day's most frequent to be considered at all. What the
+    frequent terms can add is bounded by the product of both documents'
+    frequent-term norms (Cauchy-Schwarz), and only pairs that can still reach
+    ``threshold`` get their exact cosine computed.
+    """
+    document_frequency = Counter(term for vector in vectors for term in vector)
+    frequent_cutoff = max(INDEXED_DOCUMENT_FREQUENCY_FLOOR, INDEXED_DOCUMENT_FREQUENCY * len(vectors))
+    postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+    frequent_parts: list[dict[str, float]] = []
+    tail_norms: list[float] = []
+    pairs: list[tuple[int, int, float]] = []
+    for index, vector in enumerate(vectors):
+        rare = {term: weight for term, weight in vector.items() if document_frequency[term] <= frequent_cutoff}
+        frequent = {term: weight for term, weight in vector.items() if term not in rare}
+        tail = math.sqrt(sum(weight * weight for weight in frequent.values()))
+        partial: dict[int, float] = defaultdict(float)
+        for term, weight in rare.items():
+            for other, other_weight in postings[term]:
+                partial[other] += weight * other_weight
+        for other, score in partial.items():
+            if score + tail * tail_norms[other] < threshold:
+                continue
+            other_frequent = frequent_parts[other]
+            score += sum(weight * other_frequent.get(term, 0.0) for term, weight in frequent.items())
+            if score >= threshold:
+                pairs.append((other, index, score))
+        for term, weight in rare.items():
+            postings[term].append((index, weight))
+        frequent_parts.append(frequent)
+        tail_norms.append(tail)
+    return pairs
+
+
+def cluster_events(
+    items: list[RawItem],
+    *,
+    threshold: float = 0.4,
+    rank: Callable[[RawItem], tuple] = lambda item: (),
+) -> list[RawItem]:
+    """Group each day's items about the same event and keep one lead per group.
+
+    Items on the same story date whose TF-IDF cosine similarity reaches
+    ``threshold`` end up in one cluster (transitively). The lead is the member
+    with the lowest ``rank``; the others, and their own near-duplicates, are
+    listed on it as ``related_items``. Leads come back in input order.
+    """
+    parent = list(range(len(items)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    by_date: dict[str, list[int]] = defaultdict(list)
+    for index, item in enumerate(items):
+        by_date[story_date_from_item(item)].append(index)
+    for indexes in by_date.values():
+        if len(indexes) < 2:
+            continue
+        vectors = tfidf_vectors([terms(f"{items[index].title} {items[index].summary[:400]}") for index in indexes])
+        for left, right, _ in similar_pairs(vectors, threshold):
+            parent[find(indexes[left])] = find(indexes[right])
+
+    groups: dict[int, list[int]] = defaultdict(list)
+    for index in range(len(items)):
+        groups[find(index)].append(index)
+
+    leads: dict[int, RawItem] = {}
+    for members in groups.values():
+        lead_index = min(members, key=lambda index: rank(items[index]))
+        lead = items[lead_index]
+        related: list[dict] = []
+        for index in members:
+            if index == lead_index:
+                continue
+            member = items[index]
+            # A member's near-duplicates carry the same story, so they are
+            # listed under the member's title.
+            for source in [{"source_id": member.source_id, "source_name": member.source_name, "url": member.url}, *member.duplicate_sources]:
+                related.append({**source, "title": member.title})
+        leads[lead_index] = replace(lead, related_items=related) if related else lead
+    return [leads[index] for index in sorted(leads)]
@@ -24,6 +24,33 @@ class AppConfig:
     llm_base_url: str | None
     llm_base_urls: list[str]
     llm_api_key: str | None
+    fetch_max_workers: int = 8
+    fetch_per_host_limit: int = 2
+    fetch_hedge_delay: float = 5.0
+    fetch_item_limit: int = 10
+    circuit_failure_threshold: int = 3
+    circuit_base_delay_hours: float = 12.0
+    circuit_max_delay_hours: float = 96.0
+    llm_cache_ttl_days: int = 14
+    llm_batch_size: int = 8
+    llm_batch_token_budget: int = 6000
+    llm_max_in_flight: int = 4
+    llm_requests_per_minute: int = 60
+    llm_tokens_per_minute: int = 0
+    llm_max_retries: int = 3
+    llm_endpoint_failure_threshold: int = 2
+    llm_endpoint_cooldown: float = 60.0
+    llm_deadline_seconds: float = 600.0
+    llm_token_budget: int = 0
+    llm_pending_days: int = 7
+    near_duplicate_threshold: float = 0.6
+    event_cluster_threshold: float = 0.4
+    rank_half_life_hours: float = 48.0
+    rank_source_penalty: float = 0.15
+    rank_day_limit: int = 80
+    rank_category_limit: int = 25
+    publish_latest_days: int = 7
+    publish_immutable: bool = False
 
 
 def _parse_list_env(value: str | None) -> list[str]:
@@ -32,6 +59,26 @@ def _parse_list_env(value: str | None) -> list[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
+def _parse_int_env(name: str, default: int, *, minimum: int = 1) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return max(minimum, int(value))
+    except ValueError:
+        return default
+
+
+def _parse_float_env(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return default
+
+
 def _dedupe_preserve_order(values: list[str]) -> list[str]:
     deduped: list[str] = []
     seen: set[str] = set()
@@ -89,6 +136,33 @@ def load_config(project_root: Path) -> AppConfig:
     ])
     if not llm_base_url and llm_base_urls:
         llm_base_url = llm_base_urls[0]
+    fetch_max_workers = _parse_int_env("FETCH_MAX_WORKERS", 8)
+    fetch_per_host_limit = _parse_int_env("FETCH_PER_HOST_LIMIT", 2)
+    fetch_hedge_delay = _parse_float_env("FETCH_HEDGE_DELAY", 5.0)
+    fetch_item_limit = _parse_int_env("FETCH_ITEM_LIMIT", 10)
+    circuit_failure_threshold = _parse_int_env("CIRCUIT_FAILURE_THRESHOLD", 3)
+    circuit_base_delay_hours = _parse_float_env("CIRCUIT_BASE_DELAY_HOURS", 12.0)
+    circuit_max_delay_hours = _parse_float_env("CIRCUIT_MAX_DELAY_HOURS", 96.0)
+    llm_cache_ttl_days = _parse_int_env("LLM_CACHE_TTL_DAYS", 14)
+    llm_batch_size = _parse_int_env("LLM_BATCH_SIZE", 8)
+    llm_batch_token_budget = _parse_int_env("LLM_BATCH_TOKEN_BUDGET", 6000)
+    llm_max_in_flight = _parse_int_env("LLM_MAX_IN_FLIGHT", 4)
+    llm_requests_per_minute = _parse_int_env("LLM_RPM", 60, minimum=0)
+    llm_tokens_per_minute = _parse_int_env("LLM_TPM", 0, minimum=0)
+    llm_max_retries = _parse_int_env("LLM_MAX_RETRIES", 3, minimum=0)
+    llm_endpoint_failure_threshold = _parse_int_env("LLM_ENDPOINT_FAILURE_THRESHOLD", 2)
+    llm_endpoint_cooldown = _parse_float_env("LLM_ENDPOINT_COOLDOWN", 60.0)
+    llm_deadline_seconds = _parse_float_env("LLM_DEADLINE_SECONDS", 600.0)
+    llm_token_budget = _parse_int_env("LLM_TOKEN_BUDGET", 0, minimum=0)
+    llm_pending_days = _parse_int_env("LLM_PENDING_DAYS", 7)
+    near_duplicate_threshold = _parse_float_env("NEAR_DUPLICATE_THRESHOLD", 0.6)
+    event_cluster_threshold = _parse_float_env("EVENT_CLUSTER_THRESHOLD", 0.4)
+    rank_half_life_hours = _parse_float_env("RANK_HALF_LIFE_HOURS", 48.0)
+    rank_source_penalty = min(1.0, _parse_float_env("RANK_SOURCE_PENALTY", 0.15))
+    rank_day_limit = _parse_int_env("RANK_DAY_LIMIT", 80, minimum=0)
+    rank_category_limit = _parse_int_env("RANK_CATEGORY_LIMIT", 25, minimum=0)
+    publish_latest_days = _parse_int_env("PUBLISH_LATEST_DAYS", 7)
+    publish_immutable = os.getenv("PUBLISH_IMMUTABLE", "false").lower() == "true"
 
     return AppConfig(
         timezone=timezone,
@@ -105,6 +179,33 @@ def load_config(project_root: Path) -> AppConfig:
         llm_base_url=llm_base_url,
         llm_base_urls=llm_base_urls,
         llm_api_key=llm_api_key,
+        fetch_max_workers=fetch_max_workers,
+        fetch_per_host_limit=fetch_per_host_limit,
+        fetch_hedge_delay=fetch_hedge_delay,
+        fetch_item_limit=fetch_item_limit,
+        circuit_failure_threshold=circuit_failure_threshold,
+        circuit_base_delay_hours=circuit_base_delay_hours,
+        circuit_max_delay_hours=circuit_max_delay_hours,
+        llm_cache_ttl_days=llm_cache_ttl_days,
+        llm_batch_size=llm_batch_size,
+        llm_batch_token_budget=llm_batch_token_budget,
+        llm_max_in_flight=llm_max_in_flight,
+        llm_requests_per_minute=llm_requests_per_minute,
+        llm_tokens_per_minute=llm_tokens_per_minute,
+        llm_max_retries=llm_max_retries,
+        llm_endpoint_failure_threshold=llm_endpoint_failure_threshold,
+        llm_endpoint_cooldown=llm_endpoint_cooldown,
+        llm_deadline_seconds=llm_deadline_seconds,
+        llm_token_budget=llm_token_budget,
+        llm_pending_days=llm_pending_days,
+        near_duplicate_threshold=near_duplicate_threshold,
+        event_cluster_threshold=event_cluster_threshold,
+        rank_half_life_hours=rank_half_life_hours,
+        rank_source_penalty=rank_source_penalty,
+        rank_day_limit=rank_day_limit,
+        rank_category_limit=rank_category_limit,
+        publish_latest_days=publish_latest_days,
+        publish_immutable=publish_immutable,
     )
 
 
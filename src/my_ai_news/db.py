@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 import sqlite3
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterator
+
+from .models import canonicalize_url
 
 
 SCHEMA = """
@@ -31,6 +36,7 @@ CREATE TABLE IF NOT EXISTS raw_items (
     fetched_at TEXT NOT NULL,
     fingerprint TEXT NOT NULL,
     payload_json TEXT NOT NULL,
+    pending_enrichment INTEGER NOT NULL DEFAULT 0,
     UNIQUE(canonical_url)
 );
 
@@ -60,18 +66,244 @@ CREATE TABLE IF NOT EXISTS source_runs (
     items_fetched INTEGER NOT NULL DEFAULT 0,
     error_message TEXT,
     created_at TEXT NOT NULL,
+    duration_ms INTEGER,
     FOREIGN KEY(run_id) REFERENCES runs(id)
 );
+
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at TEXT,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS enrichment_cache (
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    result_json TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY(model, prompt_version, fingerprint)
+);
+
+CREATE TABLE IF NOT EXISTS item_signatures (
+    canonical_url TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    duplicate_of TEXT,
+    first_seen_at TEXT NOT NULL
+);
 """
 
 
-def connect(database_path: Path) -> sqlite3.Connection:
+# WAL lets readers (the frontend builder, ad-hoc queries) work during a run,
+# and with WAL ``synchronous=NORMAL`` only syncs at checkpoints: a power cut can
+# lose the last commits but never corrupts the file.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -32000,  # KiB, i.e. about 32 MB of page cache
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,  # ms
+}
+
+
+class TrackedConnection(sqlite3.Connection):
+    """Connection that counts commits and the time spent in statements and commits.
+
+    Only ``execute``/``executemany``/``executescript``/``commit``/``rollback``
+    calls are timed; rows fetched later from a cursor are not.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commits = 0
+        self.seconds = 0.0
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def execute(self, *args):
+        return self._timed(super().execute, *args)
+
+    def executemany(self, *args):
+        return self._timed(super().executemany, *args)
+
+    def executescript(self, *args):
+        return self._timed(super().executescript, *args)
+
+    def commit(self) -> None:
+        if self.in_transaction:
+            self.commits += 1
+        self._timed(super().commit)
+
+    def rollback(self) -> None:
+        self._timed(super().rollback)
+
+    def stats(self) -> dict:
+        return {"commits": self.commits, "time_ms": round(self.seconds * 1000)}
+
+
+def connect(database_path: Path) -> TrackedConnection:
     database_path.parent.mkdir(parents=True, exist_ok=True)
-    connection = sqlite3.connect(database_path)
+    connection = sqlite3.connect(database_path, factory=TrackedConnection)
     connection.row_factory = sqlite3.Row
+    for name, value in PRAGMAS.items():
+        connection.execute(f"PRAGMA {name} = {value}")
     return connection
 
 
+@contextmanager
+def transaction(connection: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Commit everything written inside the block at once, or roll it all back.
+
+    Storage helpers do not commit on their own; callers group a run's writes
+    into a few of these units of work.
+    """
+    try:
+        yield connection
+    except BaseException:
+        connection.rollback()
+        raise
+    connection.commit()
+
+
+ADDED_COLUMNS = {
+    "raw_items": {"pending_enrichment": "INTEGER NOT NULL DEFAULT 0"},
+    "source_runs": {"duration_ms": "INTEGER"},
+}
+
+
+def _ensure_columns(connection: sqlite3.Connection) -> None:
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+        for column, ddl in columns.items():
+            if column not in existing:
+                connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def fold_story_copies(connection: sqlite3.Connection) -> int:
+    """Fold the per-run copies of each story stored before upserts into one row.
+
+    Rows written before story keys existed were keyed by their raw URL; they
+    are re-keyed by canonical URL first. Each group keeps its newest row, with
+    ``first_seen_run``/``run_id`` from the oldest copy and ``last_seen_run`` from
+    the newest. Returns the number of re-keyed rows; does not commit.
+    """
+    rekeyed = [
+        (canonical, row["id"])
+        for row in connection.execute("SELECT id, url FROM stories WHERE story_key = url")
+        if (canonical := canonicalize_url(row["url"])) != row["url"]
+    ]
+    connection.executemany("UPDATE stories SET story_key = ? WHERE id = ?", rekeyed)
+    connection.execute("DROP TABLE IF EXISTS temp.story_folds")
+    connection.execute(
+        """
+        CREATE TEMP TABLE story_folds AS
+        SELECT story_key, MAX(id) AS keep_id, MIN(first_seen_run) AS first_run, MAX(last_seen_run) AS last_run
+        FROM stories
+        GROUP BY story_key
+        HAVING COUNT(*) > 1
+        """
+    )
+    connection.execute(
+        """
+        UPDATE stories
+        SET run_id = folds.first_run, first_seen_run = folds.first_run, last_seen_run = folds.last_run
+        FROM temp.story_folds AS folds
+        WHERE stories.id = folds.keep_id
+        """
+    )
+    connection.execute(
+        """
+        DELETE FROM stories
+        WHERE story_key IN (SELECT story_key FROM temp.story_folds)
+          AND id NOT IN (SELECT keep_id FROM temp.story_folds)
+        """
+    )
+    connection.execute("DROP TABLE temp.story_folds")
+    return len(rekeyed)
+
+
+# Schema changes after ``SCHEMA``, applied in order. ``PRAGMA user_version``
+# records how many have run, so each runs exactly once per database. Append
+# new steps; never edit or reorder existing ones. A step is SQL or a function
+# run on the connection inside the step's transaction.
+MIGRATIONS: list[tuple[str | Callable[[sqlite3.Connection], object], ...]] = [
+    (
+        # History reads: stories by date (and score), by category and by run.
+        "CREATE INDEX IF NOT EXISTS idx_stories_date_score ON stories (story_date, score)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_date_category_score ON stories (story_date, category, score)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_run ON stories (run_id)",
+        # Lookups by fingerprint or date, the not-modified reload per source
+        # and the (usually tiny) set of items waiting for enrichment.
+        "CREATE INDEX IF NOT EXISTS idx_raw_items_fingerprint ON raw_items (fingerprint)",
+        "CREATE INDEX IF NOT EXISTS idx_raw_items_published_date ON raw_items (published_date)",
+        "CREATE INDEX IF NOT EXISTS idx_raw_items_source ON raw_items (source_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_raw_items_pending ON raw_items (canonical_url) WHERE pending_enrichment = 1",
+        # Source health windows and per-run reports.
+        "CREATE INDEX IF NOT EXISTS idx_source_runs_source ON source_runs (source_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_source_runs_run ON source_runs (run_id)",
+        # Retention sweeps.
+        "CREATE INDEX IF NOT EXISTS idx_item_signatures_first_seen ON item_signatures (first_seen_at)",
+        "CREATE INDEX IF NOT EXISTS idx_enrichment_cache_created ON enrichment_cache (created_at)",
+    ),
+    (
+        # Stories are upserted by a stable key instead of re-inserted every
+        # run. Existing rows are keyed by URL here; ``compact_stories`` folds
+        # their per-run copies together.
+        "ALTER TABLE stories ADD COLUMN story_key TEXT",
+        "ALTER TABLE stories ADD COLUMN first_seen_run INTEGER",
+        "ALTER TABLE stories ADD COLUMN last_seen_run INTEGER",
+        "UPDATE stories SET story_key = url, first_seen_run = run_id, last_seen_run = run_id WHERE story_key IS NULL",
+        "CREATE INDEX IF NOT EXISTS idx_stories_key ON stories (story_key)",
+    ),
+    (
+        # Everything a published article needs, so days can be rebuilt from
+        # the table alone. Lists are stored as JSON.
+        "ALTER TABLE stories ADD COLUMN tags_json TEXT NOT NULL DEFAULT '[]'",
+        "ALTER TABLE stories ADD COLUMN enriched INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE stories ADD COLUMN duplicates_json TEXT NOT NULL DEFAULT '[]'",
+        "ALTER TABLE stories ADD COLUMN related_json TEXT NOT NULL DEFAULT '[]'",
+        "ALTER TABLE stories ADD COLUMN coverage INTEGER NOT NULL DEFAULT 1",
+    ),
+    (
+        # One row per story key: fold the copies older runs left behind, then
+        # let the index enforce it so stories can be written with a real upsert.
+        fold_story_copies,
+        "DROP INDEX IF EXISTS idx_stories_key",
+        "CREATE UNIQUE INDEX idx_stories_key ON stories (story_key)",
+    ),
+]
+
+
+def schema_version(connection: sqlite3.Connection) -> int:
+    return int(connection.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(connection: sqlite3.Connection) -> int:
+    """Apply pending ``MIGRATIONS``, each in its own transaction; returns the new version."""
+    version = schema_version(connection)
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        with transaction(connection):
+            # DDL does not open sqlite3's implicit transaction; without an
+            # explicit BEGIN a failing step would leave earlier ones applied.
+            connection.execute("BEGIN")
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {number}")
+    return max(version, len(MIGRATIONS))
+
+
 def init_db(connection: sqlite3.Connection) -> None:
     connection.executescript(SCHEMA)
+    _ensure_columns(connection)
     connection.commit()
+    migrate(connection)
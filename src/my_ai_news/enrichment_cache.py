@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import asdict
+from datetime import UTC, datetime, timedelta
+
+from .ai import EnrichmentResult
+from .models import utc_now_iso
+
+
+def enrichment_fingerprint(*, category: str, source_name: str, title: str, summary: str) -> str:
+    """Fingerprint of the enrichment inputs that shape the model's answer."""
+    basis = "\x1f".join([category, source_name, title.strip(), summary.strip()])
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+def _iso(value: datetime) -> str:
+    return value.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class EnrichmentCache:
+    """Model output per (model, prompt version, input fingerprint).
+
+    Like ``ValidatorCache``, live entries are loaded once per run, looked up and
+    filled in memory, and new entries are written back with ``save``.
+    """
+
+    def __init__(
+        self,
+        *,
+        model: str,
+        prompt_version: str,
+        ttl_days: int,
+        entries: dict[str, EnrichmentResult] | None = None,
+    ):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl_days = ttl_days
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._entries: dict[str, EnrichmentResult] = dict(entries or {})
+        self._pending: dict[str, EnrichmentResult] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, connection: sqlite3.Connection, *, model: str, prompt_version: str, ttl_days: int) -> "EnrichmentCache":
+        cache = cls(model=model, prompt_version=prompt_version, ttl_days=ttl_days)
+        cache.evicted = evict_enrichment_cache(connection, ttl_days=ttl_days)
+        rows = connection.execute(
+            """
+            SELECT fingerprint, result_json
+            FROM enrichment_cache
+            WHERE model = ? AND prompt_version = ?
+            """,
+            (model, prompt_version),
+        ).fetchall()
+        for row in rows:
+            try:
+                cache._entries[row["fingerprint"]] = EnrichmentResult(**json.loads(row["result_json"]))
+            except (TypeError, ValueError):
+                continue
+        return cache
+
+    def get(self, fingerprint: str) -> EnrichmentResult | None:
+        with self._lock:
+            result = self._entries.get(fingerprint)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, fingerprint: str, result: EnrichmentResult) -> None:
+        with self._lock:
+            self._entries[fingerprint] = result
+            self._pending[fingerprint] = result
+
+    def save(self, connection: sqlite3.Connection) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        created_at = utc_now_iso()
+        connection.executemany(
+            """
+            INSERT INTO enrichment_cache (model, prompt_version, fingerprint, result_json, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(model, prompt_version, fingerprint) DO UPDATE SET
+                result_json = excluded.result_json,
+                created_at = excluded.created_at
+            """,
+            [
+                (self.model, self.prompt_version, fingerprint, json.dumps(asdict(result), ensure_ascii=False), created_at)
+                for fingerprint, result in pending.items()
+            ],
+        )
+
+    def stats(self) -> dict:
+        return {
+            "prompt_version": self.prompt_version,
+            "ttl_days": self.ttl_days,
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "evicted": self.evicted,
+        }
+
+
+def evict_enrichment_cache(connection: sqlite3.Connection, *, ttl_days: int, now: datetime | None = None) -> int:
+    cutoff = _iso((now or datetime.now(UTC)) - timedelta(days=ttl_days))
+    cursor = connection.execute("DELETE FROM enrichment_cache WHERE created_at < ?", (cutoff,))
+    return cursor.rowcount
+
+
+def clear_enrichment_cache(connection: sqlite3.Connection) -> int:
+    cursor = connection.execute("DELETE FROM enrichment_cache")
+    return cursor.rowcount
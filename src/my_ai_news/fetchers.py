@@ -1,25 +1,36 @@
 from __future__ import annotations
 
+import codecs
 import hashlib
 import html
-import json
 import re
 import socket
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from html.parser import HTMLParser
+from typing import Callable, Iterator
 from urllib.parse import urljoin, urlparse
-from urllib.request import Request, urlopen
 
 import feedparser
 
-from .models import RawItem, utc_now_iso
+from .http_cache import ValidatorCache
+from .models import RawItem, canonicalize_url, utc_now_iso
+from .seen_index import SeenIndex
+from .transport import DEFAULT_TIMEOUT, HttpResponse, StreamingResponse, fetch_url, stream_url
 
 
-SUCCESS_STATUSES = {"success", "empty"}
+SUCCESS_STATUSES = {"success", "empty", "not_modified"}
 DEGRADED_STATUSES = {"fallback_success", "fallback_empty"}
 
+ITEM_LIMIT = 10
+HTML_CHUNK_SIZE = 16 * 1024
+
 
 @dataclass(frozen=True)
 class FetchResult:
@@ -29,15 +40,54 @@ class FetchResult:
     attempted_urls: list[str]
     backup_urls: list[str]
     error_message: str | None = None
+    elapsed_ms: int | None = None
+    hedged: bool = False
+
+
+@dataclass(frozen=True)
+class FetchContext:
+    validators: ValidatorCache | None = None
+    seen: SeenIndex | None = None
+
+
+_fetch_context = FetchContext()
+
+
+def current_fetch_context() -> FetchContext:
+    return _fetch_context
+
+
+@contextmanager
+def use_fetch_context(context: FetchContext) -> Iterator[FetchContext]:
+    """Install run-scoped fetch state (validator cache, seen index) for every fetch thread."""
+    global _fetch_context
+    previous = _fetch_context
+    _fetch_context = context
+    try:
+        yield context
+    finally:
+        _fetch_context = previous
+
+
+class NotModified(Exception):
+    """The URL is unchanged since the last run, either by max-age or a 304."""
 
 
 class SourceFetchError(Exception):
-    def __init__(self, status: str, message: str, attempted_urls: list[str], backup_urls: list[str]):
+    def __init__(
+        self,
+        status: str,
+        message: str,
+        attempted_urls: list[str],
+        backup_urls: list[str],
+        elapsed_ms: int | None = None,
+    ):
         super().__init__(message)
         self.status = status
         self.message = message
         self.attempted_urls = attempted_urls
         self.backup_urls = backup_urls
+        self.elapsed_ms = elapsed_ms
 
 
 def get_source_urls(source: dict) -> list[str]:
@@ -67,12 +117,6 @@ def classify_fetch_error(exc: Exception) -> str:
     return "unexpected_error"
 
 
-def canonicalize_url(url: str) -> str:
-    parsed = urlparse(url)
-    canonical = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-    return canonical.rstrip("/")
-
-
 def fingerprint_text(title: str, summary: str) -> str:
     text = f"{title} {summary}".lower()
     text = re.sub(r"<[^>]+>", " ", text)
@@ -114,9 +158,10 @@ def extract_published_values(entry: object) -> tuple[str, str]:
 
 
 class ArticleListParser(HTMLParser):
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, limit: int | None = None):
         super().__init__()
         self.base_url = base_url
+        self.limit = limit
         self.articles: list[dict] = []
         self._current: dict | None = None
         self._in_title = False
@@ -124,6 +169,10 @@ class ArticleListParser(HTMLParser):
         self._title_parts: list[str] = []
         self._summary_parts: list[str] = []
 
+    @property
+    def done(self) -> bool:
+        return self.limit is not None and len(self.articles) >= self.limit
+
     def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
         values = {key: value or "" for key, value in attrs}
         classes = set(values.get("class", "").split())
@@ -190,23 +239,98 @@ def published_date_from_url(url: str) -> str:
     return match.group(1) if match else ""
 
 
-def _fetch_html_listing(source: dict, url: str) -> list[RawItem]:
-    request = Request(url, headers={"User-Agent": "Mozilla/5.0 (compatible; my-ai-news/1.0)"})
-    with urlopen(request, timeout=20) as response:
-        content = response.read().decode("utf-8", "replace")
+def _validator_headers(url: str) -> dict[str, str] | None:
+    validators = current_fetch_context().validators
+    if not validators:
+        return None
+    if validators.is_fresh(url):
+        raise NotModified(url)
+    return validators.request_headers(url)
+
+
+def _not_modified(url: str, headers: dict[str, str]) -> NotModified:
+    validators = current_fetch_context().validators
+    if validators:
+        validators.revalidated(url, headers)
+    return NotModified(url)
+
+
+def request_url(url: str, *, timeout: float = DEFAULT_TIMEOUT) -> HttpResponse:
+    """GET through the shared transport, applying the run's conditional-GET validators.
+
+    Raises ``NotModified`` when the cached copy is still fresh or the server
+    answers 304. Callers record new validators with ``remember_validators``
+    once the body has parsed.
+    """
+    response = fetch_url(url, headers=_validator_headers(url), timeout=timeout)
+    if response.status == 304:
+        raise _not_modified(url, response.headers)
+    return response
+
+
+def remember_validators(url: str, response: HttpResponse | StreamingResponse) -> None:
+    validators = current_fetch_context().validators
+    if validators:
+        validators.update(url, response.headers)
+
+
+def stream_article_list(url: str, *, timeout: float = DEFAULT_TIMEOUT, limit: int = ITEM_LIMIT) -> tuple[list[dict], StreamingResponse]:
+    """Parse a listing page chunk by chunk, hanging up once ``limit`` articles are found."""
+    with stream_url(url, headers=_validator_headers(url), timeout=timeout) as response:
+        if response.status == 304:
+            response.read()
+        else:
+            parser = ArticleListParser(url, limit=limit)
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+            for chunk in response.iter_chunks(HTML_CHUNK_SIZE):
+                parser.feed(decoder.decode(chunk))
+                if parser.done:
+                    break
+            else:
+                parser.feed(decoder.decode(b"", final=True))
+
+    if response.status == 304:
+        raise _not_modified(url, response.headers)
+    return parser.articles[:limit], response
+
+
+def known_item(source: dict, *, title: str, url: str, canonical_url: str, fetched_at: str) -> RawItem:
+    """Placeholder for an entry already in ``raw_items``; the pipeline swaps in the stored row."""
+    return RawItem(
+        source_id=source["id"],
+        source_name=source["name"],
+        category=source["category"],
+        title=title,
+        url=url,
+        canonical_url=canonical_url,
+        summary="",
+        image_url="",
+        published_at="",
+        published_date="",
+        fetched_at=fetched_at,
+        fingerprint="",
+        payload_json="",
+        is_new=False,
+    )
+
 
-    parser = ArticleListParser(url)
-    parser.feed(content)
+def _fetch_html_listing(source: dict, url: str, *, timeout: float = DEFAULT_TIMEOUT) -> list[RawItem]:
+    articles, response = stream_article_list(url, timeout=timeout, limit=source_item_limit(source))
 
+    seen = current_fetch_context().seen
     fetched_at = utc_now_iso()
     items: list[RawItem] = []
     seen_urls: set[str] = set()
-    for entry in parser.articles[:10]:
+    for entry in articles:
         item_url = entry["url"].strip()
         if not item_url or item_url in seen_urls:
             continue
         seen_urls.add(item_url)
         title = entry["title"].strip()
+        canonical_url = canonicalize_url(item_url)
+        if seen is not None and canonical_url in seen:
+            items.append(known_item(source, title=title, url=item_url, canonical_url=canonical_url, fetched_at=fetched_at))
+            continue
         summary = entry["summary"].strip()
         published_date = published_date_from_url(item_url)
 
@@ -217,46 +341,87 @@ def _fetch_html_listing(source: dict, url: str) -> list[RawItem]:
                 category=source["category"],
                 title=title,
                 url=item_url,
-                canonical_url=canonicalize_url(item_url),
+                canonical_url=canonical_url,
                 summary=summary,
                 image_url=entry.get("image_url", ""),
                 published_at=published_date,
                 published_date=published_date,
                 fetched_at=fetched_at,
                 fingerprint=fingerprint_text(title, summary),
-                payload_json=json.dumps(entry, ensure_ascii=False),
+                payload_json=entry,
             )
         )
 
     if not items:
         raise ValueError("empty html listing")
+    remember_validators(url, response)
     return items
 
 
+def parse_feed(url: str, *, timeout: float = DEFAULT_TIMEOUT) -> object:
+    """Download a feed through the shared transport and hand the bytes to feedparser."""
+    response = request_url(url, timeout=timeout)
+    # feedparser only sees bytes, so pass on the charset and the final URL it
+    # would otherwise have taken from its own request (relative links resolve
+    # against the latter).
+    feed = feedparser.parse(
+        response.body,
+        response_headers={
+            "content-location": response.url,
+            "content-type": response.headers.get("content-type", ""),
+        },
+    )
+    if getattr(feed, "entries", None):
+        remember_validators(url, response)
+    return feed
+
+
+def source_timeout(source: dict) -> float:
+    try:
+        timeout = float(source.get("timeout") or DEFAULT_TIMEOUT)
+    except (TypeError, ValueError):
+        return DEFAULT_TIMEOUT
+    return timeout if timeout > 0 else DEFAULT_TIMEOUT
+
+
+def source_item_limit(source: dict) -> int:
+    """Entries read per fetch: the source's ``limit``, else ``ITEM_LIMIT``."""
+    try:
+        limit = int(source.get("limit") or ITEM_LIMIT)
+    except (TypeError, ValueError):
+        return ITEM_LIMIT
+    return limit if limit > 0 else ITEM_LIMIT
+
+
 def _fetch_from_url(source: dict, url: str) -> list[RawItem]:
+    timeout = source_timeout(source)
     if source.get("type") == "html":
-        return _fetch_html_listing(source, url)
+        return _fetch_html_listing(source, url, timeout=timeout)
 
-    feed = feedparser.parse(url)
+    feed = parse_feed(url, timeout=timeout)
     bozo_exception = getattr(feed, "bozo_exception", None)
     if getattr(feed, "bozo", 0) and bozo_exception and not getattr(feed, "entries", None):
         raise ValueError(f"bozo parse error: {bozo_exception}")
 
+    seen = current_fetch_context().seen
     fetched_at = utc_now_iso()
     items: list[RawItem] = []
 
-    for entry in feed.entries[:10]:
+    for entry in feed.entries[:source_item_limit(source)]:
         title = getattr(entry, "title", "").strip()
         url = getattr(entry, "link", "").strip()
+        if not title or not url:
+            continue
+
+        canonical_url = canonicalize_url(url)
+        if seen is not None and canonical_url in seen:
+            items.append(known_item(source, title=title, url=url, canonical_url=canonical_url, fetched_at=fetched_at))
+            continue
+
         summary = getattr(entry, "summary", "")[:2000]
-        canonical_url = canonicalize_url(url) if url else ""
         fingerprint = fingerprint_text(title, summary)
-        payload = json.dumps(dict(entry), ensure_ascii=False)
         published_at, published_date = extract_published_values(entry)
 
-        if not title or not url:
-            continue
-
         items.append(
             RawItem(
                 source_id=source["id"],
@@ -271,14 +436,90 @@ def _fetch_from_url(source: dict, url: str) -> list[RawItem]:
                 published_date=published_date,
                 fetched_at=fetched_at,
                 fingerprint=fingerprint,
-                payload_json=payload,
+                payload_json=dict(entry),
             )
         )
 
     return items
 
 
+def _hedge_delay(source: dict) -> float | None:
+    value = source.get("hedge_delay")
+    if value is None:
+        return None
+    try:
+        delay = float(value)
+    except (TypeError, ValueError):
+        return None
+    return delay if delay > 0 else None
+
+
+class HostSlots:
+    """In-flight request counts per host, capped at ``limit``.
+
+    ``iter_fetch_results`` takes a slot on a source's primary host for the
+    whole fetch; a hedged backup request takes one on its own host, so hedging
+    never pushes a host past ``per_host_limit``.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._in_flight: dict[str, int] = defaultdict(int)
+        self._changed = threading.Condition()
+
+    def try_acquire(self, host: str) -> bool:
+        with self._changed:
+            if self._in_flight[host] >= self.limit:
+                return False
+            self._in_flight[host] += 1
+            return True
+
+    def release(self, host: str) -> None:
+        with self._changed:
+            self._in_flight[host] -= 1
+            self._changed.notify_all()
+
+    def wait_for_any(self, hosts: list[str]) -> None:
+        """Block until at least one of ``hosts`` has a free slot."""
+        with self._changed:
+            self._changed.wait_for(lambda: any(self._in_flight[host] < self.limit for host in hosts))
+
+
+_worker_state = threading.local()
+
+
+def current_host_slots() -> HostSlots | None:
+    """The slots of the ``iter_fetch_results`` call running this fetch, if any."""
+    return getattr(_worker_state, "host_slots", None)
+
+
+def _fetch_with_slots(fetch: Callable[[dict], object], source: dict, host_slots: HostSlots) -> object:
+    _worker_state.host_slots = host_slots
+    try:
+        return fetch(source)
+    finally:
+        _worker_state.host_slots = None
+
+
+def url_host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
 def fetch_source(source: dict) -> FetchResult:
+    """Fetch a source from its primary URL, failing over to ``backup_urls``.
+
+    Without ``hedge_delay`` the URLs are tried one after another on the
+    calling thread. With it, a primary that has not answered after
+    ``hedge_delay`` seconds gets the next backup started in parallel, provided
+    the backup's host has a free slot (see ``HostSlots``); the first URL to
+    return items wins. An empty response is only accepted once every URL
+    before it has failed, so the ``fallback_*`` statuses mean the same thing
+    in both modes.
+
+    The losing request of a race is abandoned, not interrupted: it runs on
+    until it answers or hits the source's timeout, keeping its socket (and
+    host slot) until then.
+    """
     urls = get_source_urls(source)
     if not urls:
         raise SourceFetchError(
@@ -288,32 +529,192 @@ def fetch_source(source: dict) -> FetchResult:
             backup_urls=[],
         )
 
+    started = time.perf_counter()
+    hedge_delay = _hedge_delay(source)
     attempted_urls: list[str] = []
     backup_urls = urls[1:]
-    last_error: Exception | None = None
-    last_status = "unexpected_error"
+    failed: dict[int, Exception] = {}
+    empty_indexes: set[int] = set()
+    running: dict[Future, int] = {}
+    hedged = False
 
-    for index, url in enumerate(urls):
-        attempted_urls.append(url)
-        try:
-            items = _fetch_from_url(source, url)
-            used_backup = index > 0
+    def elapsed_ms() -> int:
+        return int((time.perf_counter() - started) * 1000)
+
+    def result(index: int, items: list[RawItem], status: str | None = None) -> FetchResult:
+        used_backup = index > 0
+        if status is None:
             status = "fallback_success" if used_backup and items else "fallback_empty" if used_backup else "success" if items else "empty"
-            return FetchResult(
-                items=items,
-                status=status,
-                active_url=url,
-                attempted_urls=attempted_urls,
-                backup_urls=backup_urls,
-                error_message=None,
-            )
-        except Exception as exc:
-            last_error = exc
-            last_status = classify_fetch_error(exc)
+        return FetchResult(
+            items=items,
+            status=status,
+            active_url=urls[index],
+            attempted_urls=list(attempted_urls),
+            backup_urls=backup_urls,
+            error_message=None,
+            elapsed_ms=elapsed_ms(),
+            hedged=hedged,
+        )
 
-    raise SourceFetchError(
-        status=last_status,
+    if hedge_delay is None or len(urls) == 1:
+        for index, url in enumerate(urls):
+            attempted_urls.append(url)
+            try:
+                items = _fetch_from_url(source, url)
+            except NotModified:
+                return result(index, [], "not_modified")
+            except Exception as exc:
+                failed[index] = exc
+                continue
+            return result(index, items)
+        raise _fetch_error(failed, attempted_urls, backup_urls, elapsed_ms())
+
+    host_slots = current_host_slots()
+    executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix=f"fetch-{source.get('id', 'source')}")
+
+    def launch(*, hedge: bool = False) -> bool:
+        index = len(attempted_urls)
+        host = url_host(urls[index])
+        if hedge and host_slots is not None and not host_slots.try_acquire(host):
+            return False
+        attempted_urls.append(urls[index])
+        future = executor.submit(_fetch_from_url, source, urls[index])
+        if hedge and host_slots is not None:
+            future.add_done_callback(lambda _: host_slots.release(host))
+        running[future] = index
+        return True
+
+    try:
+        launch()
+        while running:
+            can_hedge = len(attempted_urls) < len(urls)
+            done, _ = wait(running, timeout=hedge_delay if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # A backup host without a free slot is tried again after
+                # the next ``hedge_delay``.
+                hedged = launch(hedge=True) or hedged
+                continue
+
+            failed_now = False
+            for future in sorted(done, key=running.get):
+                index = running.pop(future)
+                try:
+                    items = future.result()
+                except NotModified:
+                    return result(index, [], "not_modified")
+                except Exception as exc:
+                    failed[index] = exc
+                    failed_now = True
+                    continue
+                if items:
+                    return result(index, items)
+                empty_indexes.add(index)
+
+            # An empty answer wins once every URL ahead of it has failed.
+            for index in sorted(empty_indexes):
+                if all(earlier in failed for earlier in range(index)):
+                    return result(index, [])
+            if (failed_now or not running) and len(attempted_urls) < len(urls):
+                launch()
+    finally:
+        # Drops queued work only; a request already running is left to finish.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    raise _fetch_error(failed, attempted_urls, backup_urls, elapsed_ms())
+
+
+def _fetch_error(failed: dict[int, Exception], attempted_urls: list[str], backup_urls: list[str], elapsed_ms: int) -> SourceFetchError:
+    last_error = failed[max(failed)] if failed else None
+    return SourceFetchError(
+        status=classify_fetch_error(last_error) if last_error else "unexpected_error",
         message=str(last_error) if last_error else "Unknown fetch error",
         attempted_urls=attempted_urls,
         backup_urls=backup_urls,
+        elapsed_ms=elapsed_ms,
     )
+
+
+def source_host(source: dict) -> str:
+    urls = get_source_urls(source)
+    return url_host(urls[0]) if urls else ""
+
+
+def iter_fetch_results(
+    sources: list[dict],
+    fetch: Callable[[dict], object],
+    *,
+    max_workers: int,
+    per_host_limit: int,
+    lookahead: int | None = None,
+) -> Iterator[object]:
+    """Run ``fetch`` for every source on a thread pool, yielding results in ``sources`` order.
+
+    At most ``max_workers`` fetches run at once and at most ``per_host_limit``
+    requests target the same host, counting hedged backup requests started
+    by ``fetch_source`` (``current_host_slots``). A fetch that raised is yielded as its
+    exception. Each result is yielded as soon as it and every result before it
+    are in, and no fetch is started more than ``lookahead`` sources ahead of
+    the consumer, so a slow consumer holds back fetching instead of piling up
+    results.
+    """
+    if not sources:
+        return
+    lookahead = len(sources) if lookahead is None else max(1, lookahead)
+    pending_by_host: dict[str, deque[int]] = defaultdict(deque)
+    for index, source in enumerate(sources):
+        pending_by_host[source_host(source)].append(index)
+
+    host_slots = HostSlots(per_host_limit)
+    running: dict[Future, tuple[int, str]] = {}
+    finished: dict[int, object] = {}
+    next_index = 0
+
+    worker_count = max(1, min(max_workers, len(sources)))
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        while next_index < len(sources):
+            window_end = next_index + lookahead
+            for host in list(pending_by_host):
+                queue = pending_by_host[host]
+                while (
+                    queue
+                    and queue[0] < window_end
+                    and len(running) < worker_count
+                    and host_slots.try_acquire(host)
+                ):
+                    index = queue.popleft()
+                    running[executor.submit(_fetch_with_slots, fetch, sources[index], host_slots)] = (index, host)
+                if not queue:
+                    del pending_by_host[host]
+
+            if next_index not in finished:
+                if not running:
+                    # Every startable host is busy with hedged requests
+                    # that outlived their source's fetch.
+                    host_slots.wait_for_any(list(pending_by_host))
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, host = running.pop(future)
+                    host_slots.release(host)
+                    try:
+                        finished[index] = future.result()
+                    except Exception as exc:
+                        finished[index] = exc
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+
+def fetch_concurrently(
+    sources: list[dict],
+    fetch: Callable[[dict], object],
+    *,
+    max_workers: int,
+    per_host_limit: int,
+) -> list[object]:
+    """Run ``fetch`` for every source on a thread pool and return all results.
+
+    See ``iter_fetch_results``; results are in ``sources`` order and a fetch
+    that raised is returned as its exception.
+    """
+    return list(iter_fetch_results(sources, fetch, max_workers=max_workers, per_host_limit=per_host_limit))
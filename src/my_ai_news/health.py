@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import math
+import sqlite3
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+
+from .queries import source_history
+
+
+HISTORY_WINDOW = 20
+# Rows written for runs that skipped the source; they say nothing about it.
+SKIPPED_STATUSES = ("circuit_open",)
+MIN_LATENCY_SAMPLES = 3
+MIN_TIMEOUT = 5.0
+RESPONDED_STATUSES = {"success", "empty", "fallback_success", "fallback_empty", "not_modified"}
+
+
+def percentile(values: list[int], pct: float) -> float | None:
+    """Nearest-rank percentile; ``None`` for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return float(ordered[min(rank, len(ordered)) - 1])
+
+
+def load_source_history(
+    connection: sqlite3.Connection,
+    source_ids: list[str] | None = None,
+    *,
+    window: int = HISTORY_WINDOW,
+) -> dict[str, list[sqlite3.Row]]:
+    """The latest ``window`` source_runs rows per source that actually fetched, newest first.
+
+    ``circuit_open`` rows are left out: while a circuit is open they would
+    otherwise fill the window and push out the failures that opened it.
+    With ``source_ids`` each source is one short index range scan; without,
+    the whole table is windowed, which gets slower as history grows.
+    """
+    if source_ids is not None:
+        history_pages = {
+            source_id: source_history(connection, source_id, limit=window, exclude_statuses=SKIPPED_STATUSES)
+            for source_id in source_ids
+        }
+        return {source_id: page.rows for source_id, page in history_pages.items() if page.rows}
+    placeholders = ", ".join("?" for _ in SKIPPED_STATUSES)
+    rows = connection.execute(
+        f"""
+        SELECT source_id, status, duration_ms, created_at
+        FROM (
+            SELECT source_id, status, duration_ms, created_at, id,
+                   ROW_NUMBER() OVER (PARTITION BY source_id ORDER BY id DESC) AS position
+            FROM source_runs
+            WHERE status NOT IN ({placeholders})
+        )
+        WHERE position <= ?
+        ORDER BY source_id, id DESC
+        """,
+        (*SKIPPED_STATUSES, window),
+    ).fetchall()
+    history: dict[str, list[sqlite3.Row]] = defaultdict(list)
+    for row in rows:
+        history[row["source_id"]].append(row)
+    return dict(history)
+
+
+def latency_samples(rows: list[sqlite3.Row]) -> list[int]:
+    return [int(row["duration_ms"]) for row in rows if row["duration_ms"] is not None and row["status"] in RESPONDED_STATUSES]
+
+
+def learned_hedge_delay(rows: list[sqlite3.Row]) -> float | None:
+    """Median successful fetch time in seconds, once there are enough samples."""
+    samples = latency_samples(rows)
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return None
+    return round(percentile(samples, 50) / 1000, 3)
+
+
+@dataclass(frozen=True)
+class CircuitState:
+    state: str
+    consecutive_failures: int
+    last_failure_at: str | None = None
+    next_probe_at: str | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _format_timestamp(value: datetime) -> str:
+    return value.astimezone(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def evaluate_circuit(
+    rows: list[sqlite3.Row],
+    *,
+    failure_threshold: int,
+    base_delay: timedelta,
+    max_delay: timedelta,
+    now: datetime | None = None,
+) -> CircuitState:
+    """Circuit breaker state from a source's recent runs (newest first).
+
+    ``failure_threshold`` consecutive failures open the circuit. It stays open
+    for ``base_delay``, doubling with every further failed probe up to
+    ``max_delay``; once the probe time has passed the circuit is half-open and
+    the next run fetches the source again. Skipped (``circuit_open``) runs do
+    not count either way.
+    """
+    failures = 0
+    last_failure_at: str | None = None
+    for row in rows:
+        if row["status"] == "circuit_open":
+            continue
+        if row["status"] in RESPONDED_STATUSES:
+            break
+        failures += 1
+        last_failure_at = last_failure_at or row["created_at"]
+
+    last_failure = _parse_timestamp(last_failure_at)
+    if failures < max(1, failure_threshold) or last_failure is None:
+        return CircuitState(state="closed", consecutive_failures=failures, last_failure_at=last_failure_at)
+
+    exponent = min(failures - failure_threshold, 16)
+    delay = min(max_delay, base_delay * (2 ** exponent))
+    next_probe = last_failure + delay
+    state = "open" if (now or datetime.now(UTC)) < next_probe else "half_open"
+    return CircuitState(
+        state=state,
+        consecutive_failures=failures,
+        last_failure_at=last_failure_at,
+        next_probe_at=_format_timestamp(next_probe),
+    )
+
+
+def adaptive_timeout(rows: list[sqlite3.Row], *, ceiling: float, floor: float = MIN_TIMEOUT) -> float:
+    """Twice the source's p95 latency, clamped to ``[floor, ceiling]`` seconds."""
+    samples = latency_samples(rows)
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return ceiling
+    p95_seconds = percentile(samples, 95) / 1000
+    return round(min(ceiling, max(floor, p95_seconds * 2)), 1)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, replace
+from datetime import UTC, datetime, timedelta
+from typing import Mapping
+
+from .models import utc_now_iso
+
+
+MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)\"?", re.IGNORECASE)
+NO_CACHE_RE = re.compile(r"(?:^|,)\s*(?:no-cache|no-store)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    expires_at: str | None
+    updated_at: str
+
+
+def _header(headers: Mapping | None, name: str) -> str | None:
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.lower())
+    value = str(value).strip() if value is not None else ""
+    return value or None
+
+
+def _parse_iso(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def expires_at_from_headers(headers: Mapping | None, *, now: datetime | None = None) -> str | None:
+    cache_control = _header(headers, "Cache-Control")
+    if not cache_control or NO_CACHE_RE.search(cache_control):
+        return None
+    match = MAX_AGE_RE.search(cache_control)
+    if not match:
+        return None
+    max_age = int(match.group(1))
+    try:
+        max_age -= int(_header(headers, "Age") or 0)
+    except ValueError:
+        pass
+    if max_age <= 0:
+        return None
+    now = now or datetime.now(UTC)
+    expires = now.replace(microsecond=0) + timedelta(seconds=max_age)
+    return expires.isoformat().replace("+00:00", "Z")
+
+
+class ValidatorCache:
+    """HTTP validators (ETag / Last-Modified) and max-age freshness per URL.
+
+    Entries are loaded once per run, read and updated from fetch threads, and
+    written back with ``save`` at the end of the run.
+    """
+
+    def __init__(self, entries: dict[str, CacheEntry] | None = None):
+        self._entries: dict[str, CacheEntry] = dict(entries or {})
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, connection: sqlite3.Connection) -> "ValidatorCache":
+        rows = connection.execute(
+            "SELECT url, etag, last_modified, expires_at, updated_at FROM http_cache"
+        ).fetchall()
+        return cls({row["url"]: CacheEntry(**dict(row)) for row in rows})
+
+    def save(self, connection: sqlite3.Connection) -> None:
+        with self._lock:
+            entries = [self._entries[url] for url in sorted(self._dirty)]
+            self._dirty.clear()
+        if not entries:
+            return
+        connection.executemany(
+            """
+            INSERT INTO http_cache (url, etag, last_modified, expires_at, updated_at)
+            VALUES (:url, :etag, :last_modified, :expires_at, :updated_at)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                expires_at = excluded.expires_at,
+                updated_at = excluded.updated_at
+            """,
+            [asdict(entry) for entry in entries],
+        )
+
+    def get(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            return self._entries.get(url)
+
+    def is_fresh(self, url: str, *, now: datetime | None = None) -> bool:
+        entry = self.get(url)
+        expires_at = _parse_iso(entry.expires_at) if entry else None
+        if expires_at is None:
+            return False
+        return (now or datetime.now(UTC)) < expires_at
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        entry = self.get(url)
+        headers: dict[str, str] = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def update(self, url: str, headers: Mapping | None) -> None:
+        """Record validators from a full (200) response."""
+        entry = CacheEntry(
+            url=url,
+            etag=_header(headers, "ETag"),
+            last_modified=_header(headers, "Last-Modified"),
+            expires_at=expires_at_from_headers(headers),
+            updated_at=utc_now_iso(),
+        )
+        with self._lock:
+            self._entries[url] = entry
+            self._dirty.add(url)
+
+    def revalidated(self, url: str, headers: Mapping | None) -> None:
+        """Refresh an entry after a 304, keeping validators the server did not resend."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return
+            self._entries[url] = replace(
+                entry,
+                etag=_header(headers, "ETag") or entry.etag,
+                last_modified=_header(headers, "Last-Modified") or entry.last_modified,
+                expires_at=expires_at_from_headers(headers),
+                updated_at=utc_now_iso(),
+            )
+            self._dirty.add(url)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from openai import OpenAI
+
+from .config import AppConfig
+from .llm_limits import is_retryable, retry_after_seconds
+
+
+LATENCY_ALPHA = 0.3
+ERROR_ALPHA = 0.3
+
+
+@dataclass
+class Endpoint:
+    base_url: str | None
+    client: Any
+    requests: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    latency_ms: float | None = None
+    error_rate: float = 0.0
+    ejected_until: float = 0.0
+    last_error: str = ""
+
+    def rank_key(self) -> tuple[int, float]:
+        # A just-failed endpoint goes behind the others; endpoints without a
+        # latency sample yet score 0 so they get probed.
+        latency = self.latency_ms if self.latency_ms is not None else 0.0
+        return self.consecutive_errors, latency / max(0.05, 1.0 - self.error_rate)
+
+
+class EndpointPool:
+    """One OpenAI-compatible client per base URL with latency/error-aware routing.
+
+    Each call goes to the healthy endpoint with the fewest consecutive errors
+    and the best score (EWMA latency inflated by EWMA error rate), failing over
+    to the next one on timeouts, connection errors, 429s and 5xx answers.
+    ``failure_threshold`` consecutive failures eject an endpoint for
+    ``cooldown`` seconds, and an answer with ``Retry-After`` ejects it for at
+    least that long; if every endpoint is ejected they are still tried,
+    soonest-recovering first.
+
+    Build one pool per run and hand it to everything that calls the model, so
+    routing state and clients are shared.
+    """
+
+    def __init__(
+        self,
+        base_urls: list[str | None],
+        *,
+        client_factory: Callable[[str | None], Any],
+        failure_threshold: int = 2,
+        cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.endpoints = [Endpoint(base_url=url, client=client_factory(url)) for url in (base_urls or [None])]
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "EndpointPool":
+        def client_factory(base_url: str | None) -> OpenAI:
+            # Retries and backoff are handled by the shared LLMLimiter.
+            client_kwargs = {"api_key": config.llm_api_key, "max_retries": 0}
+            if base_url:
+                client_kwargs["base_url"] = base_url
+            return OpenAI(**client_kwargs)
+
+        return cls(
+            config.llm_base_urls or [config.llm_base_url],
+            client_factory=client_factory,
+            failure_threshold=config.llm_endpoint_failure_threshold,
+            cooldown=config.llm_endpoint_cooldown,
+        )
+
+    def ranked(self) -> list[Endpoint]:
+        now = self._clock()
+        with self._lock:
+            for endpoint in self.endpoints:
+                if endpoint.ejected_until and endpoint.ejected_until <= now:
+                    # Cooldown over: give the endpoint a fresh chance.
+                    endpoint.ejected_until = 0.0
+                    endpoint.consecutive_errors = 0
+            healthy = [endpoint for endpoint in self.endpoints if endpoint.ejected_until <= now]
+            ejected = [endpoint for endpoint in self.endpoints if endpoint.ejected_until > now]
+            healthy.sort(key=Endpoint.rank_key)
+            ejected.sort(key=lambda endpoint: endpoint.ejected_until)
+        return healthy + ejected
+
+    def complete(self, **request: Any) -> Any:
+        """Run ``chat.completions.create(**request)`` on the best endpoint, failing over."""
+        last_error: Exception | None = None
+        for endpoint in self.ranked():
+            started = self._clock()
+            try:
+                response = endpoint.client.chat.completions.create(**request)
+            except Exception as exc:
+                self._record(endpoint, started, exc)
+                if not is_retryable(exc):
+                    raise
+                last_error = exc
+                continue
+            self._record(endpoint, started, None)
+            return response
+        assert last_error is not None
+        raise last_error
+
+    def _record(self, endpoint: Endpoint, started: float, error: Exception | None) -> None:
+        now = self._clock()
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.error_rate = (1 - ERROR_ALPHA) * endpoint.error_rate + ERROR_ALPHA * (1.0 if error else 0.0)
+            if error is None:
+                elapsed_ms = (now - started) * 1000
+                endpoint.latency_ms = elapsed_ms if endpoint.latency_ms is None else (
+                    (1 - LATENCY_ALPHA) * endpoint.latency_ms + LATENCY_ALPHA * elapsed_ms
+                )
+                endpoint.consecutive_errors = 0
+                endpoint.ejected_until = 0.0
+                return
+            endpoint.errors += 1
+            endpoint.consecutive_errors += 1
+            endpoint.last_error = str(error) or error.__class__.__name__
+            if endpoint.consecutive_errors >= self.failure_threshold:
+                endpoint.ejected_until = now + self.cooldown
+            retry_after = retry_after_seconds(error)
+            if retry_after:
+                endpoint.ejected_until = max(endpoint.ejected_until, now + retry_after)
+
+    def stats(self) -> list[dict]:
+        now = self._clock()
+        with self._lock:
+            return [
+                {
+                    "base_url": endpoint.base_url,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                    "latency_ms": round(endpoint.latency_ms) if endpoint.latency_ms is not None else None,
+                    "error_rate": round(endpoint.error_rate, 3),
+                    "ejected": endpoint.ejected_until > now,
+                    "last_error": endpoint.last_error,
+                }
+                for endpoint in self.endpoints
+            ]
+
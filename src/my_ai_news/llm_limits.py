@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from openai import APIConnectionError, APIStatusError
+
+from .config import AppConfig
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+RETRYABLE_STATUSES = {408, 409, 429}
+MAX_RETRY_AFTER = 120.0
+
+
+class BudgetExhausted(Exception):
+    """The run's LLM deadline or token budget is used up; the request was not sent."""
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float, *, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.per_minute = per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._available = float(per_minute)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until ``amount`` units are available; return the seconds waited."""
+        if self.per_minute <= 0:
+            return 0.0
+        amount = min(amount, self.per_minute)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                rate = self.per_minute / 60.0
+                self._available = min(self.per_minute, self._available + (now - self._updated) * rate)
+                self._updated = now
+                if self._available >= amount:
+                    self._available -= amount
+                    return waited
+                delay = (amount - self._available) / rate
+            self._sleep(delay)
+            waited += delay
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Seconds requested by a ``Retry-After`` (or ``retry-after-ms``) header, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds:
+        try:
+            return min(MAX_RETRY_AFTER, max(0.0, float(milliseconds) / 1000))
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(MAX_RETRY_AFTER, max(0.0, (retry_at - datetime.now(UTC)).total_seconds()))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, ConnectionError, APIConnectionError)):
+        return True
+    status = exc.status_code if isinstance(exc, APIStatusError) else getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUSES or status >= 500
+    return False
+
+
+class LLMLimiter:
+    """Shared in-flight cap, RPM/TPM budget and retry policy for every LLM call in a run.
+
+    ``call`` waits for budget, runs one request, and retries 429s, 5xx answers
+    and connection errors, sleeping for ``Retry-After`` when the server sends
+    one and for a jittered exponential backoff otherwise. ``map`` runs a
+    function over items on ``max_in_flight`` threads and returns results (or
+    the raised exceptions) in input order.
+
+    Past ``deadline`` (a ``clock`` reading) or once ``token_budget`` estimated
+    tokens have been sent, ``call`` raises ``BudgetExhausted`` instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int = 4,
+        requests_per_minute: int = 60,
+        tokens_per_minute: int = 0,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: float | None = None,
+        token_budget: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.token_budget = token_budget
+        self._clock = clock
+        self._sleep = sleep
+        self._requests = TokenBucket(requests_per_minute, clock=clock, sleep=sleep)
+        self._tokens = TokenBucket(tokens_per_minute, clock=clock, sleep=sleep)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.tokens = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.backoff_seconds = 0.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _reserve(self, tokens: int) -> None:
+        if self.deadline is not None and self._clock() >= self.deadline:
+            raise BudgetExhausted("LLM deadline reached")
+        with self._stats_lock:
+            if self.token_budget and self.tokens + tokens > self.token_budget:
+                raise BudgetExhausted("LLM token budget spent")
+            self.requests += 1
+            self.tokens += tokens
+
+    def call(self, request: Callable[[], R], *, tokens: int = 0) -> R:
+        attempt = 0
+        while True:
+            throttled = self._requests.acquire(1) + self._tokens.acquire(tokens)
+            with self._stats_lock:
+                self.throttled_seconds += throttled
+            self._reserve(tokens)
+            with self._slots:
+                try:
+                    return request()
+                except Exception as exc:
+                    if attempt >= self.max_retries or not is_retryable(exc):
+                        raise
+                    delay = retry_after_seconds(exc)
+                    if delay is None:
+                        delay = self.backoff_delay(attempt)
+                    if self.deadline is not None and self._clock() + delay >= self.deadline:
+                        raise
+            with self._stats_lock:
+                self.retries += 1
+                self.backoff_seconds += delay
+            self._sleep(delay)
+            attempt += 1
+
+    def map(self, function: Callable[[T], R], items: Iterable[T]) -> list[R | Exception]:
+        items = list(items)
+        if len(items) <= 1:
+            return [_capture(function, item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(items)), thread_name_prefix="llm") as executor:
+            return list(executor.map(lambda item: _capture(function, item), items))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "requests": self.requests,
+                "estimated_tokens": self.tokens,
+                "retries": self.retries,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "backoff_seconds": round(self.backoff_seconds, 3),
+            }
+
+
+def _capture(function: Callable[[T], R], item: T) -> R | Exception:
+    try:
+        return function(item)
+    except Exception as exc:
+        return exc
+
+
+def build_llm_limiter(config: AppConfig) -> LLMLimiter:
+    """A limiter whose deadline starts counting now."""
+    return LLMLimiter(
+        max_in_flight=config.llm_max_in_flight,
+        requests_per_minute=config.llm_requests_per_minute,
+        tokens_per_minute=config.llm_tokens_per_minute,
+        max_retries=config.llm_max_retries,
+        deadline=time.monotonic() + config.llm_deadline_seconds if config.llm_deadline_seconds else None,
+        token_budget=config.llm_token_budget,
+    )
+
+
+_llm_limiter = LLMLimiter()
+
+
+def current_llm_limiter() -> LLMLimiter:
+    return _llm_limiter
+
+
+@contextmanager
+def use_llm_limiter(limiter: LLMLimiter) -> Iterator[LLMLimiter]:
+    """Install the run-scoped limiter shared by the enricher and the X translator."""
+    global _llm_limiter
+    previous = _llm_limiter
+    _llm_limiter = limiter
+    try:
+        yield limiter
+    finally:
+        _llm_limiter = previous
@@ -1,10 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+import json
+import sys
+from dataclasses import dataclass, field, fields
 from datetime import UTC, datetime
+from operator import attrgetter
+from typing import Any, Mapping
+from urllib.parse import urlparse
 
 
-@dataclass
+def field_names(cls: type) -> tuple[str, ...]:
+    return tuple(item.name for item in fields(cls))
+
+
+def intern_fields(obj: object, names: tuple[str, ...]) -> None:
+    """Replace the string fields ``names`` with their interned copies.
+
+    Thousands of items share a handful of source ids, names, categories and
+    dates; interning keeps one copy of each no matter where the item came from
+    (feed, SQLite row, backfill). ``object.__setattr__`` also works on frozen
+    dataclasses.
+    """
+    for name in names:
+        value = getattr(obj, name)
+        if type(value) is str:
+            object.__setattr__(obj, name, sys.intern(value))
+
+
+@dataclass(slots=True)
 class RawItem:
     source_id: str
     source_name: str
@@ -18,13 +41,36 @@ class RawItem:
     published_date: str
     fetched_at: str
     fingerprint: str
-    payload_json: str
+    # The stored JSON, or the raw feed entry it is serialised from. Entries
+    # share their title/link/summary strings with the fields above, so keeping
+    # the entry costs far less than a second copy of everything as JSON, and
+    # items that are never stored are never serialised.
+    payload_json: str | Mapping[str, Any]
+    is_new: bool = True
+    duplicate_sources: list[dict] = field(default_factory=list)
+    related_items: list[dict] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        intern_fields(self, _RAW_ITEM_INTERNED)
+
+    def payload_text(self) -> str:
+        if isinstance(self.payload_json, str):
+            return self.payload_json
+        return json.dumps(self.payload_json, ensure_ascii=False, default=str)
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        """Field dict with ``payload_json`` serialised; lists are shared, not copied like ``asdict``."""
+        values = dict(zip(_RAW_ITEM_FIELDS, _raw_item_values(self)))
+        values["payload_json"] = self.payload_text()
+        return values
 
 
-@dataclass
+_RAW_ITEM_FIELDS = field_names(RawItem)
+_RAW_ITEM_INTERNED = ("source_id", "source_name", "category", "published_date", "fetched_at")
+_raw_item_values = attrgetter(*_RAW_ITEM_FIELDS)
+
+
+@dataclass(slots=True)
 class Story:
     source_id: str
     source_name: str
@@ -38,9 +84,30 @@ class Story:
     score: int
     published_at: str
     story_date: str
+    enriched: bool = False
+    duplicates: list[dict] = field(default_factory=list)
+    related: list[dict] = field(default_factory=list)
+    coverage: int = 1
+    # Stable identity across runs (the item's canonical URL); empty means ``url``.
+    story_key: str = ""
+
+    def __post_init__(self) -> None:
+        intern_fields(self, _STORY_INTERNED)
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        """Field dict; lists are shared, not copied like ``asdict``."""
+        return dict(zip(_STORY_FIELDS, _story_values(self)))
+
+
+_STORY_FIELDS = field_names(Story)
+_STORY_INTERNED = ("source_id", "source_name", "category", "story_date")
+_story_values = attrgetter(*_STORY_FIELDS)
+
+
+def canonicalize_url(url: str) -> str:
+    parsed = urlparse(url)
+    canonical = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+    return canonical.rstrip("/")
 
 
 def utc_now_iso() -> str:
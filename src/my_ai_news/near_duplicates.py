@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import sqlite3
+from array import array
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from typing import Callable
+
+from .models import RawItem, utc_now_iso
+from .processing import strip_html
+
+
+NUM_PERMUTATIONS = 64
+ROWS_PER_BAND = 4
+SIGNATURE_RETENTION_DAYS = 7
+MERSENNE_PRIME = (1 << 61) - 1
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['.+-][a-z0-9]+)*|[一-鿿㐀-䶿]")
+
+# Fixed seed: signatures are persisted, so the permutations must not change between runs.
+_rng = random.Random(0x6D795F6169)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def shingles(text: str) -> set[str]:
+    """Token bigrams, where a token is an ASCII word or a single CJK character.
+
+    CJK runs therefore turn into character bigrams and Latin text into word
+    bigrams, which keeps mixed-language titles comparable.
+    """
+    tokens = TOKEN_RE.findall(strip_html(text).lower())
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{left} {right}" for left, right in zip(tokens, tokens[1:])}
+
+
+def minhash(features: set[str]) -> bytes:
+    """``NUM_PERMUTATIONS`` 32-bit MinHash values, packed for storage and banding."""
+    hashes = [int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big") for feature in features]
+    if not hashes:
+        return bytes(4 * NUM_PERMUTATIONS)
+    return array(
+        "I",
+        (min((a * value + b) % MERSENNE_PRIME for value in hashes) & 0xFFFFFFFF for a, b in PERMUTATIONS),
+    ).tobytes()
+
+
+def item_signature(item: RawItem) -> bytes:
+    return minhash(shingles(f"{item.title} {item.summary[:400]}"))
+
+
+def estimated_similarity(left: bytes, right: bytes) -> float:
+    """Share of equal MinHash values, an estimate of the shingle sets' Jaccard similarity."""
+    left_values, right_values = array("I", left), array("I", right)
+    return sum(1 for a, b in zip(left_values, right_values) if a == b) / NUM_PERMUTATIONS
+
+
+class MinHashIndex:
+    """MinHash signatures with a banded LSH lookup, persisted in ``item_signatures``.
+
+    Each signature is cut into bands of ``ROWS_PER_BAND`` values; items sharing
+    any whole band are candidates, and a candidate is a near-duplicate when its
+    estimated Jaccard similarity reaches ``threshold``. With 16 bands of 4 rows,
+    pairs at similarity 0.5 become candidates about 65% of the time and pairs
+    at 0.7 more than 99% of the time, while unrelated items rarely collide.
+    """
+
+    def __init__(self, *, threshold: float = 0.6):
+        self.threshold = threshold
+        self.signatures: dict[str, bytes] = {}
+        self.first_seen: dict[str, str] = {}
+        self.duplicate_of: dict[str, str] = {}
+        self._buckets: list[dict[bytes, list[str]]] = [{} for _ in range(NUM_PERMUTATIONS // ROWS_PER_BAND)]
+        self._dirty: dict[str, str | None] = {}
+
+    @classmethod
+    def load(cls, connection: sqlite3.Connection, *, threshold: float = 0.6) -> "MinHashIndex":
+        index = cls(threshold=threshold)
+        cutoff = (datetime.now(UTC) - timedelta(days=SIGNATURE_RETENTION_DAYS)).replace(microsecond=0)
+        connection.execute(
+            "DELETE FROM item_signatures WHERE first_seen_at < ?",
+            (cutoff.isoformat().replace("+00:00", "Z"),),
+        )
+        for row in connection.execute("SELECT canonical_url, signature, duplicate_of, first_seen_at FROM item_signatures"):
+            if len(row["signature"]) == 4 * NUM_PERMUTATIONS:
+                index._insert(row["canonical_url"], bytes(row["signature"]), row["first_seen_at"])
+                if row["duplicate_of"]:
+                    index.duplicate_of[row["canonical_url"]] = row["duplicate_of"]
+        return index
+
+    def _bands(self, signature: bytes) -> list[bytes]:
+        width = 4 * ROWS_PER_BAND
+        return [signature[start:start + width] for start in range(0, len(signature), width)]
+
+    def _insert(self, key: str, signature: bytes, first_seen: str) -> None:
+        self.signatures[key] = signature
+        self.first_seen[key] = first_seen
+        for band, buckets in zip(self._bands(signature), self._buckets):
+            buckets.setdefault(band, []).append(key)
+
+    def add(self, key: str, signature: bytes, first_seen: str | None = None) -> None:
+        if key in self.signatures:
+            return
+        self._insert(key, signature, first_seen or utc_now_iso())
+        self._dirty.setdefault(key, None)
+
+    def near(self, signature: bytes) -> list[str]:
+        candidates: set[str] = set()
+        for band, buckets in zip(self._bands(signature), self._buckets):
+            candidates.update(buckets.get(band, ()))
+        return [key for key in candidates if estimated_similarity(signature, self.signatures[key]) >= self.threshold]
+
+    def mark_duplicate(self, key: str, survivor: str) -> None:
+        self.duplicate_of[key] = survivor
+        self._dirty[key] = survivor
+
+    def survivor(self, key: str) -> str:
+        """Follow ``duplicate_of`` links from ``key`` to the item its group was folded into."""
+        seen = {key}
+        while key in self.duplicate_of and self.duplicate_of[key] not in seen:
+            key = self.duplicate_of[key]
+            seen.add(key)
+        return key
+
+    def save(self, connection: sqlite3.Connection) -> None:
+        if not self._dirty:
+            return
+        connection.executemany(
+            """
+            INSERT INTO item_signatures (canonical_url, signature, duplicate_of, first_seen_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(canonical_url) DO UPDATE SET duplicate_of = excluded.duplicate_of
+            """,
+            [(key, self.signatures[key], survivor, self.first_seen[key]) for key, survivor in self._dirty.items()],
+        )
+        self._dirty.clear()
+
+
+def collapse_near_duplicates(
+    items: list[RawItem],
+    index: MinHashIndex,
+    *,
+    rank: Callable[[RawItem], tuple] = lambda item: (),
+) -> tuple[list[RawItem], dict[str, list[RawItem]]]:
+    """Fold near-duplicate items into one survivor each.
+
+    The survivor of a group is the item first seen in an earlier run (so the
+    choice is stable from run to run), then the lowest ``rank``. The others are
+    recorded on it as ``duplicate_sources``.
+
+    When that earliest item is not among ``items`` (it was published by an
+    earlier run and has since left its feed), the whole group is dropped and
+    returned separately, keyed by the earlier survivor's URL, so the caller can
+    attach the sources to the stored story instead.
+    """
+    current = {item.canonical_url for item in items}
+    parent = {url: url for url in current}
+    # One timestamp for the whole call: items of this run are ordered by
+    # ``rank`` alone, ``first_seen`` only puts earlier runs' items first.
+    now = utc_now_iso()
+    known = {url for url in current if url in index.signatures}
+
+    def find(url: str) -> str:
+        parent.setdefault(url, url)
+        while parent[url] != url:
+            parent[url] = parent[parent[url]]
+            url = parent[url]
+        return url
+
+    for item in items:
+        url = item.canonical_url
+        signature = index.signatures.get(url) or item_signature(item)
+        for other in index.near(signature):
+            # Matches are resolved to their survivor, which may be an earlier
+            # run's item; the match itself can be a folded duplicate.
+            other = index.survivor(other)
+            if other != url:
+                parent[find(other)] = find(url)
+        index.add(url, signature, now)
+
+    groups: dict[str, list[RawItem]] = {}
+    for item in items:
+        groups.setdefault(find(item.canonical_url), []).append(item)
+    earlier: dict[str, str] = {}
+    for url in parent.keys() - current:
+        root = find(url)
+        if root not in earlier or index.first_seen.get(url, "") < index.first_seen.get(earlier[root], ""):
+            earlier[root] = url
+
+    survivors: dict[str, RawItem] = {}
+    folded: dict[str, list[RawItem]] = {}
+    for root, members in groups.items():
+        lead = min(
+            members,
+            key=lambda member: (
+                member.canonical_url not in known,
+                index.first_seen[member.canonical_url] if member.canonical_url in known else "",
+                rank(member),
+            ),
+        )
+        stored = earlier.get(root)
+        if stored is not None and index.first_seen.get(stored, "") <= index.first_seen[lead.canonical_url]:
+            for member in members:
+                index.mark_duplicate(member.canonical_url, stored)
+            folded.setdefault(stored, []).extend(members)
+            continue
+        duplicates = [member for member in members if member is not lead]
+        for duplicate in duplicates:
+            index.mark_duplicate(duplicate.canonical_url, lead.canonical_url)
+        if duplicates:
+            lead = replace(
+                lead,
+                duplicate_sources=[
+                    {"source_id": duplicate.source_id, "source_name": duplicate.source_name, "url": duplicate.url}
+                    for duplicate in duplicates
+                ],
+            )
+        survivors[lead.canonical_url] = lead
+    return [survivors[item.canonical_url] for item in items if item.canonical_url in survivors], folded
@@ -1,16 +1,51 @@
 from __future__ import annotations
 
+import json
 import sqlite3
+from contextlib import ExitStack, closing
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
-from .ai import NoopEnricher, build_enricher
+from .ai import PROMPT_VERSION, EnrichmentResult, build_enricher
+from .clustering import cluster_events
 from .config import load_config, load_sources
-from .db import connect, init_db
-from .fetchers import DEGRADED_STATUSES, SUCCESS_STATUSES, FetchResult, SourceFetchError, fetch_source
-from .models import Story, utc_now_iso
-from .processing import deduplicate, to_story
-from .publish import publish
+from .db import connect, fold_story_copies, init_db, transaction
+from .enrichment_cache import EnrichmentCache, clear_enrichment_cache
+from .fetchers import (
+    DEGRADED_STATUSES,
+    SUCCESS_STATUSES,
+    FetchContext,
+    FetchResult,
+    SourceFetchError,
+    fetch_source,
+    iter_fetch_results,
+    source_item_limit,
+    use_fetch_context,
+)
+from .health import CircuitState, adaptive_timeout, evaluate_circuit, learned_hedge_delay, load_source_history
+from .http_cache import ValidatorCache
+from .llm_endpoints import EndpointPool
+from .llm_limits import BudgetExhausted, build_llm_limiter, use_llm_limiter
+from .models import RawItem, Story, utc_now_iso
+from .near_duplicates import MinHashIndex, collapse_near_duplicates
+from .processing import (
+    UniqueFilter,
+    enrich_items,
+    enrichment_input,
+    enrichment_priority,
+    enrichment_rank,
+    input_fingerprint,
+    score_item,
+    story_with_fallback,
+)
+from .publish import load_published_stories, publish
+from .queries import STORY_COLUMNS, stories_between, story_from_row
+from .ranking import rank_stories
+from .seen_index import SeenIndex
 from .status import write_status
+from .streaming import EnrichmentStream
+from .transport import DEFAULT_TIMEOUT
 from .x_digest import run_x_digest
 
 
@@ -43,10 +78,38 @@ def _coerce_fetch_result(source: dict, fetched: FetchResult | list) -> FetchResu
     )
 
 
+def plan_source_fetch(source: dict, history_rows: list, config) -> dict:
+    """Per-run fetch settings learned from the source's recent ``source_runs``.
+
+    ``hedge_delay`` falls back to the median latency, then ``FETCH_HEDGE_DELAY``
+    (``0`` turns hedging off). ``timeout`` adapts to twice the p95 latency,
+    never above the transport default. ``limit`` defaults to
+    ``FETCH_ITEM_LIMIT``. Values set in the source config win.
+    """
+    planned = dict(source)
+    if planned.get("limit") is None:
+        planned["limit"] = config.fetch_item_limit
+    if planned.get("hedge_delay") is None and config.fetch_hedge_delay > 0:
+        planned["hedge_delay"] = learned_hedge_delay(history_rows) or config.fetch_hedge_delay
+    if planned.get("timeout") is None:
+        planned["timeout"] = adaptive_timeout(history_rows, ceiling=DEFAULT_TIMEOUT)
+    return planned
+
+
+def source_circuit(config, history_rows: list) -> CircuitState:
+    return evaluate_circuit(
+        history_rows,
+        failure_threshold=config.circuit_failure_threshold,
+        base_delay=timedelta(hours=config.circuit_base_delay_hours),
+        max_delay=timedelta(hours=config.circuit_max_delay_hours),
+    )
+
+
 def build_source_health_payload(*, config, run_id: int, finished_at: str, source_statuses: list[dict]) -> dict:
     healthy_sources = sum(1 for item in source_statuses if item.get("status") in SUCCESS_STATUSES)
     degraded_sources = sum(1 for item in source_statuses if item.get("status") in DEGRADED_STATUSES)
     unhealthy_sources = len(source_statuses) - healthy_sources - degraded_sources
+    circuit_open_sources = sum(1 for item in source_statuses if item.get("status") == "circuit_open")
     return {
         "run_id": run_id,
         "generated_at": finished_at,
@@ -56,6 +119,7 @@ def build_source_health_payload(*, config, run_id: int, finished_at: str, source
             "healthy_sources": healthy_sources,
             "degraded_sources": degraded_sources,
             "unhealthy_sources": unhealthy_sources,
+            "circuit_open_sources": circuit_open_sources,
         },
         "sources": source_statuses,
     }
@@ -69,7 +133,6 @@ def insert_run(connection: sqlite3.Connection, sources_total: int) -> int:
         """,
         (utc_now_iso(), sources_total),
     )
-    connection.commit()
     return int(cursor.lastrowid)
 
 
@@ -89,7 +152,6 @@ def finish_run(
         """,
         (utc_now_iso(), status, raw_items_total, stories_total, error_message, run_id),
     )
-    connection.commit()
 
 
 def store_raw_items(connection: sqlite3.Connection, items: list) -> None:
@@ -105,91 +167,453 @@ def store_raw_items(connection: sqlite3.Connection, items: list) -> None:
         """,
         [item.to_dict() for item in items],
     )
-    connection.commit()
+
+
+RAW_ITEM_COLUMNS = """
+    source_id, source_name, category, title, url, canonical_url, summary,
+    image_url, published_at, published_date, fetched_at, fingerprint, payload_json
+"""
+
+
+def load_source_raw_items(connection: sqlite3.Connection, source_id: str, limit: int = 10) -> list[RawItem]:
+    """Most recently stored items for a source, oldest first, for sources that were not modified."""
+    rows = connection.execute(
+        f"""
+        SELECT {RAW_ITEM_COLUMNS}
+        FROM raw_items
+        WHERE source_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        (source_id, limit),
+    ).fetchall()
+    return [RawItem(**dict(row), is_new=False) for row in reversed(rows)]
+
+
+def hydrate_known_items(connection: sqlite3.Connection, items: list[RawItem]) -> list[RawItem]:
+    """Swap the fetchers' placeholders for already-seen entries with their stored rows."""
+    known_urls = [item.canonical_url for item in items if not item.is_new]
+    if not known_urls:
+        return items
+
+    stored: dict[str, sqlite3.Row] = {}
+    for start in range(0, len(known_urls), 500):
+        chunk = known_urls[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in connection.execute(
+            f"SELECT {RAW_ITEM_COLUMNS} FROM raw_items WHERE canonical_url IN ({placeholders})",
+            chunk,
+        ):
+            stored[row["canonical_url"]] = row
+
+    hydrated: list[RawItem] = []
+    for item in items:
+        row = None if item.is_new else stored.get(item.canonical_url)
+        if row is None:
+            hydrated.append(item)
+            continue
+        hydrated.append(
+            replace(
+                RawItem(**dict(row), is_new=False),
+                source_id=item.source_id,
+                source_name=item.source_name,
+                category=item.category,
+            )
+        )
+    return hydrated
+
+
+def load_pending_enrichment(connection: sqlite3.Connection, canonical_urls: list[str]) -> set[str]:
+    pending: set[str] = set()
+    for start in range(0, len(canonical_urls), 500):
+        chunk = canonical_urls[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        pending.update(
+            row["canonical_url"]
+            for row in connection.execute(
+                f"SELECT canonical_url FROM raw_items WHERE pending_enrichment = 1 AND canonical_url IN ({placeholders})",
+                chunk,
+            )
+        )
+    return pending
+
+
+def load_enrichment_backlog(connection: sqlite3.Connection, *, since: str, exclude: set[str]) -> list[tuple[RawItem, Story]]:
+    """Items still flagged ``pending_enrichment`` (first fetched at or after ``since``) with their stored stories.
+
+    These are deferred items that did not come back in this run's feeds;
+    ``exclude`` holds the canonical URLs the run has already fetched.
+    """
+    items = {
+        row["canonical_url"]: RawItem(**dict(row), is_new=False)
+        for row in connection.execute(
+            f"SELECT {RAW_ITEM_COLUMNS} FROM raw_items WHERE pending_enrichment = 1 AND fetched_at >= ? ORDER BY id",
+            (since,),
+        )
+        if row["canonical_url"] not in exclude
+    }
+    keys = list(items)
+    backlog: list[tuple[RawItem, Story]] = []
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in connection.execute(f"SELECT {STORY_COLUMNS} FROM stories WHERE story_key IN ({placeholders})", chunk):
+            backlog.append((replace(items[row["story_key"]], payload_json=""), story_from_row(dict(row))))
+    return backlog
+
+
+def attach_late_duplicates(
+    connection: sqlite3.Connection,
+    folded: dict[str, list[RawItem]],
+) -> tuple[list[Story], list[RawItem]]:
+    """Record items folded into an earlier run's story as that story's duplicates.
+
+    Returns the updated stories and the items whose story is no longer stored;
+    those are published on their own.
+    """
+    keys = list(folded)
+    stories: list[Story] = []
+    found: set[str] = set()
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in connection.execute(f"SELECT {STORY_COLUMNS} FROM stories WHERE story_key IN ({placeholders})", chunk):
+            story = story_from_row(dict(row))
+            found.add(story.story_key)
+            known_urls = {story.url} | {entry["url"] for entry in story.duplicates}
+            added = [
+                {"source_id": item.source_id, "source_name": item.source_name, "url": item.url}
+                for item in folded[story.story_key]
+                if item.url not in known_urls
+            ]
+            if not added:
+                continue
+            duplicates = story.duplicates + added
+            sources = {story.source_id}
+            sources.update(entry["source_id"] for entry in duplicates)
+            sources.update(entry["source_id"] for entry in story.related)
+            stories.append(replace(story, duplicates=duplicates, coverage=len(sources)))
+    orphans = [item for key, items in folded.items() if key not in found for item in items]
+    return stories, orphans
+
+
+def stream_for_enrichment(
+    connection: sqlite3.Connection,
+    items: list[RawItem],
+    stream: EnrichmentStream,
+    cache: EnrichmentCache,
+    known: dict[str, EnrichmentResult | Exception],
+    source_priority: dict[str, int],
+    *,
+    wait: bool = True,
+) -> None:
+    """Record cache hits for ``items`` in ``known`` and queue the rest on ``stream``."""
+    pending_urls = load_pending_enrichment(connection, [item.canonical_url for item in items])
+    ranked = []
+    for item in items:
+        hit = cache.get(input_fingerprint(enrichment_input(item)))
+        if hit is not None:
+            known[item.canonical_url] = hit
+        else:
+            ranked.append((enrichment_rank(item, source_priority, pending_urls), item))
+    stream.put(ranked, wait=wait)
+
+
+def mark_pending_enrichment(connection: sqlite3.Connection, *, deferred: list[str], enriched: list[str]) -> None:
+    """Flag items skipped for budget so the next run enriches them first; clear the rest."""
+    connection.executemany(
+        "UPDATE raw_items SET pending_enrichment = 1 WHERE canonical_url = ?",
+        [(url,) for url in deferred],
+    )
+    connection.executemany(
+        "UPDATE raw_items SET pending_enrichment = 0 WHERE canonical_url = ? AND pending_enrichment = 1",
+        [(url,) for url in enriched],
+    )
+
+
+def expire_pending_enrichment(connection: sqlite3.Connection, *, before: str) -> None:
+    """Give up on deferred items first fetched before ``before``; they are too old to be worth a model call."""
+    connection.execute("UPDATE raw_items SET pending_enrichment = 0 WHERE pending_enrichment = 1 AND fetched_at < ?", (before,))
+
+
+def story_row(run_id: int, story: Story) -> dict:
+    row = story.to_dict()
+    row.update(
+        run_id=run_id,
+        story_key=story.story_key or story.url,
+        tags_json=json.dumps(story.tags, ensure_ascii=False),
+        duplicates_json=json.dumps(story.duplicates, ensure_ascii=False),
+        related_json=json.dumps(story.related, ensure_ascii=False),
+    )
+    return row
 
 
 def store_stories(connection: sqlite3.Connection, run_id: int, stories: list[Story]) -> None:
+    """Upsert ``stories`` by their stable ``story_key``.
+
+    A story already stored by an earlier run gets its content refreshed and
+    ``last_seen_run`` moved to ``run_id``; a new one is inserted with both
+    ``first_seen_run`` and ``last_seen_run`` set to ``run_id``.
+    """
     connection.executemany(
         """
         INSERT INTO stories (
             run_id, source_id, source_name, category, title, url, summary,
-            commentary, image_url, score, published_at, story_date
+            commentary, image_url, score, published_at, story_date,
+            story_key, first_seen_run, last_seen_run, tags_json, enriched,
+            duplicates_json, related_json, coverage
         ) VALUES (
             :run_id, :source_id, :source_name, :category, :title, :url, :summary,
-            :commentary, :image_url, :score, :published_at, :story_date
+            :commentary, :image_url, :score, :published_at, :story_date,
+            :story_key, :run_id, :run_id, :tags_json, :enriched,
+            :duplicates_json, :related_json, :coverage
         )
+        ON CONFLICT(story_key) DO UPDATE SET
+            source_id = excluded.source_id, source_name = excluded.source_name, category = excluded.category,
+            title = excluded.title, url = excluded.url, summary = excluded.summary,
+            commentary = excluded.commentary, image_url = excluded.image_url, score = excluded.score,
+            published_at = excluded.published_at, story_date = excluded.story_date, tags_json = excluded.tags_json,
+            enriched = excluded.enriched, duplicates_json = excluded.duplicates_json,
+            related_json = excluded.related_json, coverage = excluded.coverage, last_seen_run = excluded.last_seen_run
         """,
-        [{"run_id": run_id, **story.to_dict()} for story in stories],
+        list({story.story_key or story.url: story_row(run_id, story) for story in stories}.values()),
     )
-    connection.commit()
 
 
-def store_source_run(
-    connection: sqlite3.Connection,
-    *,
-    run_id: int,
-    source_id: str,
-    source_name: str,
-    status: str,
-    items_fetched: int,
-    error_message: str | None = None,
-) -> None:
-    connection.execute(
+def load_stories_for_dates(connection: sqlite3.Connection, dates: set[str]) -> list[Story]:
+    stories: list[Story] = []
+    for story_date in sorted(dates, reverse=True):
+        cursor = None
+        while True:
+            page = stories_between(connection, story_date, story_date, limit=500, cursor=cursor)
+            stories.extend(story_from_row(row) for row in page.rows)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+    return stories
+
+
+def publish_dates(connection: sqlite3.Connection, dates: set[str], config, *, run_id: int | None = None) -> dict:
+    """Rebuild the daily files for ``dates`` from every stored story of those days.
+
+    Days with no story from before ``run_id`` (a database that started empty,
+    as on a CI runner without its cache) also keep the articles already
+    published for them, ranked and capped together with the stored stories.
+    """
+    stories = load_stories_for_dates(connection, dates)
+    if run_id is not None:
+        stored_urls = {story.url for story in stories}
+        for story_date in sorted(dates):
+            earlier = connection.execute(
+                "SELECT 1 FROM stories WHERE story_date = ? AND first_seen_run < ? LIMIT 1", (story_date, run_id)
+            ).fetchone()
+            if earlier is None:
+                stories.extend(
+                    story for story in load_published_stories(config.publish_dir, story_date) if story.url not in stored_urls
+                )
+    return publish(
+        rank_for_publish(stories, config),
+        config.publish_dir,
+        latest_days=config.publish_latest_days,
+        immutable=config.publish_immutable,
+    )
+
+
+def merge_publish_reports(first: dict, second: dict) -> dict:
+    """Files written by either publish, and files neither of them had to touch."""
+    written = list(dict.fromkeys([*first["written"], *second["written"]]))
+    unchanged = [name for name in dict.fromkeys([*first["unchanged"], *second["unchanged"]]) if name not in written]
+    return {"written": written, "unchanged": unchanged}
+
+
+def compact_stories(connection: sqlite3.Connection) -> dict:
+    """Fold any per-run copies of stories left over (see ``fold_story_copies``) and vacuum.
+
+    Databases are folded by their schema migration already; this also gives
+    the space of the deleted rows back.
+    """
+    before = connection.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+    with transaction(connection):
+        rekeyed = fold_story_copies(connection)
+    connection.execute("VACUUM")
+    after = connection.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+    return {"stories_before": before, "stories_after": after, "rekeyed": rekeyed, "folded": before - after}
+
+
+def source_run_row(run_id: int, source_status: dict) -> tuple:
+    return (
+        run_id,
+        source_status["source_id"],
+        source_status["source_name"],
+        source_status["status"],
+        source_status["items_fetched"],
+        source_status["error_message"],
+        utc_now_iso(),
+        source_status["duration_ms"],
+    )
+
+
+def store_source_runs(connection: sqlite3.Connection, rows: list[tuple]) -> None:
+    connection.executemany(
         """
         INSERT INTO source_runs (
-            run_id, source_id, source_name, status, items_fetched, error_message, created_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            run_id, source_id, source_name, status, items_fetched, error_message, created_at, duration_ms
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
-        (run_id, source_id, source_name, status, items_fetched, error_message, utc_now_iso()),
+        rows,
     )
-    connection.commit()
 
 
-def run_pipeline(project_root: Path) -> dict:
+def rank_for_publish(stories: list[Story], config) -> list[Story]:
+    return rank_stories(
+        stories,
+        half_life_hours=config.rank_half_life_hours,
+        source_penalty=config.rank_source_penalty,
+        day_limit=config.rank_day_limit,
+        category_limit=config.rank_category_limit,
+    )
+
+
+def run_pipeline(project_root: Path, *, clear_llm_cache: bool = False) -> dict:
     config = load_config(project_root)
     sources = load_sources(config.source_config)
-    enricher = build_enricher(config)
     llm_enabled = config.llm_enabled and bool(config.llm_api_key)
+    # One pool (and one client per base URL) for every model call of the run.
+    endpoint_pool = EndpointPool.from_config(config) if llm_enabled else None
+    enricher = build_enricher(config, endpoint_pool)
     connection = connect(config.database_path)
     init_db(connection)
-
-    run_id = insert_run(connection, len(sources))
+    # The run's writes are grouped into a few transactions: this one, the
+    # fetch results, near-duplicate signatures and the final results.
+    with transaction(connection):
+        if clear_llm_cache:
+            clear_enrichment_cache(connection)
+        run_id = insert_run(connection, len(sources))
+        enrichment_cache = (
+            EnrichmentCache.load(
+                connection,
+                model=config.llm_model,
+                prompt_version=PROMPT_VERSION,
+                ttl_days=config.llm_cache_ttl_days,
+            )
+            if llm_enabled
+            else None
+        )
+    validators = ValidatorCache.load(connection)
+    llm_limiter = build_llm_limiter(config)
+    fetch_context = FetchContext(validators=validators, seen=SeenIndex.load(connection))
     raw_items_total = 0
     stories_total = 0
     source_statuses: list[dict] = []
+    source_run_rows: list[tuple] = []
     llm_errors: dict[str, int] = {}
     llm_degraded_items = 0
+    llm_deferred_items = 0
+    source_priority = {source["id"]: source.get("priority", 50) for source in sources}
+    # Model output as it arrives, by canonical URL: cache hits found while
+    # fetching and whatever the enrichment stream has finished so far.
+    enrichments_by_url: dict[str, EnrichmentResult | Exception] = {}
+    enrichment_stream = (
+        EnrichmentStream(
+            enricher,
+            cache=enrichment_cache,
+            on_result=lambda item, outcome: enrichments_by_url.__setitem__(item.canonical_url, outcome),
+            chunk_size=config.llm_batch_size * config.llm_max_in_flight,
+            capacity=4 * config.llm_batch_size * config.llm_max_in_flight,
+        )
+        if llm_enabled
+        else None
+    )
+    run_scope = ExitStack()
 
     try:
-        collected = []
+        collected: list[RawItem] = []
+        fetched_new_items: list[RawItem] = []
+        unique = UniqueFilter()
+        source_ids = [source["id"] for source in sources]
+        history = load_source_history(connection, source_ids)
+        circuits = {source["id"]: source_circuit(config, history.get(source["id"], [])) for source in sources}
+        fetch_plan = [
+            plan_source_fetch(source, history.get(source["id"], []), config)
+            for source in sources
+            if circuits[source["id"]].state != "open"
+        ]
+        item_limits = {planned["id"]: source_item_limit(planned) for planned in fetch_plan}
+        # Fetch, dedupe and enrich overlap: sources are fetched a bounded
+        # distance ahead of the loop below, and each source's new items go to
+        # the enrichment stream while later sources are still downloading.
+        run_scope.enter_context(use_fetch_context(fetch_context))
+        run_scope.enter_context(use_llm_limiter(llm_limiter))
+        if enrichment_stream is not None:
+            enrichment_stream.start()
+            run_scope.callback(enrichment_stream.cancel)
+        fetch_outcomes = run_scope.enter_context(
+            closing(
+                iter_fetch_results(
+                    fetch_plan,
+                    fetch_source,
+                    max_workers=config.fetch_max_workers,
+                    per_host_limit=config.fetch_per_host_limit,
+                    lookahead=2 * config.fetch_max_workers,
+                )
+            )
+        )
         for source in sources:
+            circuit = circuits[source["id"]]
+            if circuit.state == "open":
+                source_status = {
+                    "source_id": source["id"],
+                    "source_name": source["name"],
+                    "status": "circuit_open",
+                    "items_fetched": 0,
+                    "items_new": 0,
+                    "active_url": None,
+                    "attempted_urls": [],
+                    "backup_urls": [str(url).strip() for url in source.get("backup_urls", []) if str(url).strip()],
+                    "fallback_used": False,
+                    "hedged": False,
+                    "duration_ms": None,
+                    "error_message": (
+                        f"skipped after {circuit.consecutive_failures} consecutive failures; "
+                        f"next probe at {circuit.next_probe_at}"
+                    ),
+                }
+                source_statuses.append(source_status)
+                source_run_rows.append(source_run_row(run_id, source_status))
+                continue
+
+            outcome = next(fetch_outcomes)
             try:
-                fetch_result = _coerce_fetch_result(source, fetch_source(source))
-                source_items = fetch_result.items
+                if isinstance(outcome, Exception):
+                    raise outcome
+                fetch_result = _coerce_fetch_result(source, outcome)
+                source_items = hydrate_known_items(connection, fetch_result.items)
+                new_items = [item for item in source_items if item.is_new]
                 raw_items_total += len(source_items)
-                collected.extend((source, item) for item in source_items)
-                store_raw_items(connection, source_items)
+                fetched_new_items.extend(new_items)
+                if fetch_result.status == "not_modified":
+                    source_items = load_source_raw_items(connection, source["id"], item_limits[source["id"]])
+                # Only unique items travel on, and without their stored payload.
+                admitted = [replace(item, payload_json="") for item in source_items if unique.admit(item)]
+                collected.extend(admitted)
+                if enrichment_stream is not None:
+                    stream_for_enrichment(connection, admitted, enrichment_stream, enrichment_cache, enrichments_by_url, source_priority)
                 source_status = {
                     "source_id": source["id"],
                     "source_name": source["name"],
                     "status": fetch_result.status,
                     "items_fetched": len(source_items),
+                    "items_new": len(new_items),
                     "active_url": fetch_result.active_url,
                     "attempted_urls": fetch_result.attempted_urls,
                     "backup_urls": fetch_result.backup_urls,
                     "fallback_used": fetch_result.status in DEGRADED_STATUSES,
+                    "hedged": fetch_result.hedged,
+                    "duration_ms": fetch_result.elapsed_ms,
                     "error_message": None,
                 }
                 source_statuses.append(source_status)
-                store_source_run(
-                    connection,
-                    run_id=run_id,
-                    source_id=source_status["source_id"],
-                    source_name=source_status["source_name"],
-                    status=source_status["status"],
-                    items_fetched=source_status["items_fetched"],
-                    error_message=source_status["error_message"],
-                )
+                source_run_rows.append(source_run_row(run_id, source_status))
             except Exception as exc:
                 status = exc.status if isinstance(exc, SourceFetchError) else "unexpected_error"
                 attempted_urls = exc.attempted_urls if isinstance(exc, SourceFetchError) else [source.get("url", "")]
@@ -199,48 +623,136 @@ def run_pipeline(project_root: Path) -> dict:
                     "source_name": source["name"],
                     "status": status,
                     "items_fetched": 0,
+                    "items_new": 0,
                     "active_url": None,
                     "attempted_urls": attempted_urls,
                     "backup_urls": backup_urls,
                     "fallback_used": False,
+                    "hedged": False,
+                    "duration_ms": exc.elapsed_ms if isinstance(exc, SourceFetchError) else None,
                     "error_message": str(exc),
                 }
                 source_statuses.append(source_status)
-                store_source_run(
-                    connection,
-                    run_id=run_id,
-                    source_id=source_status["source_id"],
-                    source_name=source_status["source_name"],
-                    status=source_status["status"],
-                    items_fetched=source_status["items_fetched"],
-                    error_message=source_status["error_message"],
-                )
+                source_run_rows.append(source_run_row(run_id, source_status))
+        # The loop above only reads while sources download; its writes go in
+        # one short transaction so the write lock is not held meanwhile.
+        with transaction(connection):
+            store_raw_items(connection, fetched_new_items)
+            store_source_runs(connection, source_run_rows)
+        # Stored for good; the failure path below only writes rows still pending.
+        source_run_rows.clear()
+        fetched_new_items.clear()
 
-        deduped_items = deduplicate([item for _, item in collected])
+        post_run_history = load_source_history(connection, source_ids)
+        for source_status in source_statuses:
+            circuit = source_circuit(config, post_run_history.get(source_status["source_id"], []))
+            source_status["circuit"] = circuit.to_dict()
 
-        source_priority = {source["id"]: source.get("priority", 50) for source in sources}
-        stories: list[Story] = []
-        noop_enricher = NoopEnricher()
-        for item in deduped_items:
-            try:
-                stories.append(to_story(item, source_priority.get(item.source_id, 50), enricher))
-            except Exception as exc:
-                llm_degraded_items += 1
-                reason = classify_llm_error(exc)
-                llm_errors[reason] = llm_errors.get(reason, 0) + 1
-                stories.append(to_story(item, source_priority.get(item.source_id, 50), noop_enricher))
-        stories.sort(key=lambda story: (story.story_date, story.score), reverse=True)
+        exact_unique_items = collected
+
+        def by_score(item: RawItem) -> tuple:
+            return (-score_item(item, source_priority.get(item.source_id, 50)),)
 
-        store_stories(connection, run_id, stories)
-        publish(stories, config.publish_dir)
-        x_digest_payload = run_x_digest(config)
+        with transaction(connection):
+            signature_index = MinHashIndex.load(connection, threshold=config.near_duplicate_threshold)
+            unique_items, late_duplicates = collapse_near_duplicates(exact_unique_items, signature_index, rank=by_score)
+            signature_index.save(connection)
+            late_stories, orphans = attach_late_duplicates(connection, late_duplicates)
+            store_stories(connection, run_id, late_stories)
+        unique_items += orphans
+        near_duplicates_total = len(exact_unique_items) - len(unique_items)
+        deduped_items = cluster_events(unique_items, threshold=config.event_cluster_threshold, rank=by_score)
+        clustered_items_total = len(unique_items) - len(deduped_items)
+        if enrichment_stream is not None:
+            # Items folded or clustered away leave the queue; any the model
+            # has already taken only end up in the cache.
+            enrichment_stream.discard(
+                {item.canonical_url for item in exact_unique_items} - {item.canonical_url for item in deduped_items}
+            )
+
+        pending_urls = load_pending_enrichment(connection, [item.canonical_url for item in deduped_items])
+        # Deferred items from earlier runs that have since left their feeds
+        # join this run's enrichment, ahead of the new items.
+        pending_since = (
+            (datetime.now(UTC) - timedelta(days=config.llm_pending_days)).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        )
+        backlog = (
+            load_enrichment_backlog(connection, since=pending_since, exclude={item.canonical_url for item in exact_unique_items})
+            if llm_enabled
+            else []
+        )
+        stored_backlog = {item.canonical_url: stored for item, stored in backlog}
+        pending_urls |= stored_backlog.keys()
+        enrichment_items = deduped_items + [item for item, _ in backlog]
+        order = enrichment_priority(enrichment_items, source_priority, pending_urls)
+        ordered_items = [enrichment_items[index] for index in order]
+        if enrichment_stream is not None:
+            # The backlog ranks ahead of this run's items still waiting.
+            stream_for_enrichment(
+                connection, [item for item, _ in backlog], enrichment_stream, enrichment_cache, enrichments_by_url, source_priority, wait=False
+            )
+
+        def story_for(item: RawItem, enrichment: EnrichmentResult | Exception | None) -> Story:
+            story = story_with_fallback(item, source_priority.get(item.source_id, 50), enrichment)
+            stored = stored_backlog.get(item.canonical_url)
+            if stored is not None:
+                # Keep what the item's own run found out about its duplicates.
+                story = replace(story, duplicates=stored.duplicates, related=stored.related, coverage=stored.coverage)
+            return story
+
+        # Phase 1: publish straight away with the model output that is already
+        # in (cache hits, finished stream chunks) and the deterministic
+        # fallback everywhere else. Days are rebuilt from the stories table,
+        # so earlier runs' stories for the same dates stay published.
+        ready = enrichments_by_url.copy()
+        stories = [story_for(item, ready.get(item.canonical_url)) for item in ordered_items]
+        with transaction(connection):
+            store_stories(connection, run_id, stories)
+        touched_dates = {story.story_date for story in stories + late_stories}
+        publish_report = publish_dates(connection, touched_dates, config, run_id=run_id)
+
+        # Phase 2: wait for the stream, ask the model for anything it did not
+        # cover and republish only what changed.
+        enrichments: list[EnrichmentResult | Exception | None] = [None] * len(ordered_items)
+        if llm_enabled:
+            enrichment_stream.close()
+            enrichments = [enrichments_by_url.get(item.canonical_url) for item in ordered_items]
+            if any(enrichment is None for enrichment in enrichments):
+                enrichments = enrich_items(ordered_items, enricher, enrichment_cache, cached=enrichments)
+            for enrichment in enrichments:
+                if isinstance(enrichment, BudgetExhausted):
+                    llm_deferred_items += 1
+                elif isinstance(enrichment, Exception):
+                    llm_degraded_items += 1
+                    reason = classify_llm_error(enrichment)
+                    llm_errors[reason] = llm_errors.get(reason, 0) + 1
+            preview = stories
+            stories = [story_for(item, enrichment) for item, enrichment in zip(ordered_items, enrichments)]
+            changed = [story for story, before in zip(stories, preview) if story != before]
+            if changed:
+                with transaction(connection):
+                    store_stories(connection, run_id, changed)
+                publish_report = merge_publish_reports(publish_report, publish_dates(connection, touched_dates, config, run_id=run_id))
+        run_scope.close()
+        with use_fetch_context(fetch_context), use_llm_limiter(llm_limiter):
+            x_digest_payload = run_x_digest(config, endpoints=endpoint_pool)
 
         stories_total = len(stories)
-        finish_run(connection, run_id, "success", raw_items_total, stories_total)
+        with transaction(connection):
+            mark_pending_enrichment(
+                connection,
+                deferred=[item.canonical_url for item, result in zip(ordered_items, enrichments) if isinstance(result, BudgetExhausted)],
+                enriched=[item.canonical_url for item, result in zip(ordered_items, enrichments) if isinstance(result, EnrichmentResult)],
+            )
+            expire_pending_enrichment(connection, before=pending_since)
+            if enrichment_cache is not None:
+                enrichment_cache.save(connection)
+            validators.save(connection)
+            finish_run(connection, run_id, "success", raw_items_total, stories_total)
         finished_at = utc_now_iso()
         if not llm_enabled:
             llm_status = "disabled"
-        elif llm_degraded_items:
+        elif llm_degraded_items or llm_deferred_items:
             llm_status = "degraded"
         else:
             llm_status = "success"
@@ -252,7 +764,11 @@ def run_pipeline(project_root: Path) -> dict:
             "base_urls": config.llm_base_urls,
             "status": llm_status,
             "degraded_items": llm_degraded_items,
+            "deferred_items": llm_deferred_items,
             "error_counts": llm_errors,
+            "cache": enrichment_cache.stats() if enrichment_cache is not None else None,
+            "requests": llm_limiter.stats(),
+            "endpoints": endpoint_pool.stats() if endpoint_pool is not None else [],
         }
         result = {
             "run_id": run_id,
@@ -265,6 +781,10 @@ def run_pipeline(project_root: Path) -> dict:
             "publish_dir": str(config.publish_dir),
             "status_path": str(config.status_path),
             "source_health_path": str(config.source_health_path),
+            "near_duplicates": near_duplicates_total,
+            "clustered_items": clustered_items_total,
+            "published_files": publish_report,
+            "database_stats": connection.stats(),
             "llm_enabled": llm_enabled,
             "llm": llm_payload,
             "x_digest": {
@@ -291,7 +811,10 @@ def run_pipeline(project_root: Path) -> dict:
         )
         return result
     except Exception as exc:
-        finish_run(connection, run_id, "failed", raw_items_total, stories_total, str(exc))
+        connection.rollback()
+        with transaction(connection):
+            store_source_runs(connection, source_run_rows)
+            finish_run(connection, run_id, "failed", raw_items_total, stories_total, str(exc))
         failure_payload = {
             "run_id": run_id,
             "finished_at": utc_now_iso(),
@@ -302,6 +825,7 @@ def run_pipeline(project_root: Path) -> dict:
             "publish_dir": str(config.publish_dir),
             "status_path": str(config.status_path),
             "source_health_path": str(config.source_health_path),
+            "database_stats": connection.stats(),
             "llm_enabled": llm_enabled,
             "llm": {
                 "enabled": llm_enabled,
@@ -310,7 +834,11 @@ def run_pipeline(project_root: Path) -> dict:
                 "base_urls": config.llm_base_urls,
                 "status": "failed" if llm_enabled else "disabled",
                 "degraded_items": llm_degraded_items,
+                "deferred_items": llm_deferred_items,
                 "error_counts": llm_errors,
+                "cache": enrichment_cache.stats() if enrichment_cache is not None else None,
+                "requests": llm_limiter.stats(),
+                "endpoints": endpoint_pool.stats() if endpoint_pool is not None else [],
             },
             "x_digest": {
                 "path": str(config.x_digest_path),
@@ -337,5 +865,16 @@ def run_pipeline(project_root: Path) -> dict:
             ),
         )
         raise
+    finally:
+        run_scope.close()
+        connection.close()
+
+
+def compact_database(project_root: Path) -> dict:
+    config = load_config(project_root)
+    connection = connect(config.database_path)
+    try:
+        init_db(connection)
+        return {"database": str(config.database_path), **compact_stories(connection)}
     finally:
         connection.close()
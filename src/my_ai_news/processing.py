@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import html
 import re
-from collections import OrderedDict
 from datetime import datetime
+from typing import Iterable
 
-from .ai import AIEnricher
+from .ai import AIEnricher, EnrichmentResult, NoopEnricher
+from .enrichment_cache import EnrichmentCache, enrichment_fingerprint
 from .models import RawItem, Story
 
 
@@ -24,19 +25,36 @@ def strip_html(value: str) -> str:
     return value
 
 
-def deduplicate(items: list[RawItem]) -> list[RawItem]:
-    unique_by_url: OrderedDict[str, RawItem] = OrderedDict()
-    seen_fingerprints: set[str] = set()
+class UniqueFilter:
+    """Streaming form of ``deduplicate``: admits each canonical URL and fingerprint once."""
 
-    for item in items:
-        if item.canonical_url in unique_by_url:
-            continue
-        if item.fingerprint in seen_fingerprints:
-            continue
-        unique_by_url[item.canonical_url] = item
-        seen_fingerprints.add(item.fingerprint)
+    def __init__(self) -> None:
+        self._urls: set[str] = set()
+        self._fingerprints: set[str] = set()
 
-    return list(unique_by_url.values())
+    def admit(self, item: RawItem) -> bool:
+        if item.canonical_url in self._urls or item.fingerprint in self._fingerprints:
+            return False
+        self._urls.add(item.canonical_url)
+        self._fingerprints.add(item.fingerprint)
+        return True
+
+
+def deduplicate(items: Iterable[RawItem]) -> list[RawItem]:
+    unique = UniqueFilter()
+    return [item for item in items if unique.admit(item)]
+
+
+COVERAGE_BOOST = 5
+MAX_COVERAGE_BOOST = 20
+
+
+def source_coverage(item: RawItem) -> int:
+    """Number of distinct sources reporting ``item``'s story, near-duplicates and related items included."""
+    sources = {item.source_id}
+    sources.update(entry["source_id"] for entry in item.duplicate_sources)
+    sources.update(entry["source_id"] for entry in item.related_items)
+    return len(sources)
 
 
 def score_item(item: RawItem, source_priority: int) -> int:
@@ -45,9 +63,20 @@ def score_item(item: RawItem, source_priority: int) -> int:
         score += 5
     if item.summary:
         score += 5
+    score += min(MAX_COVERAGE_BOOST, COVERAGE_BOOST * (source_coverage(item) - 1))
     return min(score, 100)
 
 
+def enrichment_rank(item: RawItem, source_priority: dict[str, int], pending_urls: set[str]) -> tuple[bool, int]:
+    """Sort key for enrichment order: carried-over pending items first, then by score."""
+    return item.canonical_url not in pending_urls, -score_item(item, source_priority.get(item.source_id, 50))
+
+
+def enrichment_priority(items: list[RawItem], source_priority: dict[str, int], pending_urls: set[str]) -> list[int]:
+    """Indexes of ``items`` in enrichment order (see ``enrichment_rank``)."""
+    return sorted(range(len(items)), key=lambda index: enrichment_rank(items[index], source_priority, pending_urls))
+
+
 def story_date_from_item(item: RawItem) -> str:
     if item.published_date:
         return item.published_date
@@ -59,20 +88,63 @@ def fallback_summary(item: RawItem) -> str:
     return clean_summary or "暂无摘要"
 
 
-def to_story(item: RawItem, source_priority: int, enricher: AIEnricher) -> Story:
-    clean_summary = strip_html(item.summary)[:180]
-    category = CATEGORY_LABELS.get(item.category, item.category)
-    enrichment = enricher.enrich(
-        category=category,
-        source_name=item.source_name,
-        title=strip_html(item.title),
-        summary=clean_summary,
-        url=item.url,
+def enrichment_input(item: RawItem) -> dict:
+    """Keyword arguments for ``AIEnricher.enrich`` describing ``item``."""
+    return {
+        "category": CATEGORY_LABELS.get(item.category, item.category),
+        "source_name": item.source_name,
+        "title": strip_html(item.title),
+        "summary": strip_html(item.summary)[:180],
+        "url": item.url,
+    }
+
+
+def input_fingerprint(payload: dict) -> str:
+    return enrichment_fingerprint(
+        category=payload["category"],
+        source_name=payload["source_name"],
+        title=payload["title"],
+        summary=payload["summary"],
     )
+
+
+def cached_enrichments(items: list[RawItem], cache: EnrichmentCache | None) -> list[EnrichmentResult | None]:
+    """Cache hits for ``items`` (``None`` where the model still has to be asked)."""
+    if cache is None:
+        return [None] * len(items)
+    return [cache.get(input_fingerprint(enrichment_input(item))) for item in items]
+
+
+def enrich_items(
+    items: list[RawItem],
+    enricher: AIEnricher,
+    cache: EnrichmentCache | None = None,
+    *,
+    cached: list[EnrichmentResult | None] | None = None,
+) -> list[EnrichmentResult | Exception]:
+    """Enrich ``items`` in one ``enrich_many`` call, serving cache hits first.
+
+    Results line up with ``items``; an item whose enrichment failed gets the
+    exception instead of a result. Pass ``cached`` when the cache has already
+    been consulted for these items.
+    """
+    results: list[EnrichmentResult | Exception | None] = list(cached if cached is not None else cached_enrichments(items, cache))
+    pending = [index for index, result in enumerate(results) if result is None]
+    if pending:
+        inputs = [enrichment_input(items[index]) for index in pending]
+        outcomes = enricher.enrich_many(inputs)
+        for index, payload, outcome in zip(pending, inputs, outcomes):
+            results[index] = outcome
+            if cache is not None and isinstance(outcome, EnrichmentResult):
+                cache.put(input_fingerprint(payload), outcome)
+    return results
+
+
+def build_story(item: RawItem, source_priority: int, enrichment: EnrichmentResult, *, enriched: bool = True) -> Story:
     return Story(
         source_id=item.source_id,
         source_name=item.source_name,
-        category=category,
+        category=CATEGORY_LABELS.get(item.category, item.category),
         tags=enrichment.tags[:3] or [item.source_name],
         title=enrichment.title,
         url=item.url,
@@ -82,4 +154,32 @@ def to_story(item: RawItem, source_priority: int, enricher: AIEnricher) -> Story
         score=min(100, score_item(item, source_priority) + enrichment.score_delta),
         published_at=item.published_at,
         story_date=story_date_from_item(item),
+        enriched=enriched,
+        duplicates=list(item.duplicate_sources),
+        related=list(item.related_items),
+        coverage=source_coverage(item),
+        story_key=item.canonical_url,
     )
+
+
+def story_with_fallback(
+    item: RawItem,
+    source_priority: int,
+    enrichment: EnrichmentResult | Exception | None,
+) -> Story:
+    """Story from the model's ``enrichment``, or from the local fallback when there is none."""
+    if isinstance(enrichment, EnrichmentResult):
+        return build_story(item, source_priority, enrichment, enriched=True)
+    return build_story(item, source_priority, NoopEnricher().enrich(**enrichment_input(item)), enriched=False)
+
+
+def to_story(
+    item: RawItem,
+    source_priority: int,
+    enricher: AIEnricher,
+    cache: EnrichmentCache | None = None,
+) -> Story:
+    [enrichment] = enrich_items([item], enricher, cache)
+    if isinstance(enrichment, Exception):
+        raise enrichment
+    return build_story(item, source_priority, enrichment, enriched=not isinstance(enricher, NoopEnricher))
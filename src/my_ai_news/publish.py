@@ -1,16 +1,32 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
+import os
 import re
+import tempfile
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from .models import Story
+from .models import Story, utc_now_iso
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
 
 
 WEEKDAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
 DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+LATEST_NAME = "latest.json"
+MANIFEST_NAME = "manifest.json"
+# ``<name>.<content hash>.json`` plus its precompressed ``.gz``/``.br`` copies.
+HASHED_RE = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{16})\.json(?:\.gz|\.br)?$")
+# Content-addressed files the manifest stops naming are kept this long, for
+# pages and CDN caches still holding an earlier manifest.
+RETIRED_GRACE = timedelta(hours=24)
 
 
 def is_valid_story_date(value: str) -> bool:
@@ -39,39 +55,317 @@ def build_archive(stories: list[Story]) -> dict:
             continue
         if not archive[story.story_date]["week"]:
             archive[story.story_date]["week"] = week_label(story.story_date)
-        archive[story.story_date]["articles"].append(
-            {
-                "category": story.category,
-                "tag": story.tags[0] if story.tags else story.source_name,
-                "title": story.title,
-                "link": story.url,
-                "summary": story.summary,
-                "comment": story.commentary,
-                "image": story.image_url,
-                "score": story.score,
-            }
-        )
+        article = {
+            "category": story.category,
+            "tag": story.tags[0] if story.tags else story.source_name,
+            "title": story.title,
+            "link": story.url,
+            "summary": story.summary,
+            "comment": story.commentary,
+            "image": story.image_url,
+            "score": story.score,
+            "enriched": story.enriched,
+        }
+        if story.duplicates:
+            article["duplicates"] = [{"source": entry["source_name"], "link": entry["url"]} for entry in story.duplicates]
+        if story.related:
+            article["related"] = [
+                {"source": entry["source_name"], "title": entry["title"], "link": entry["url"]} for entry in story.related
+            ]
+        if story.coverage > 1:
+            article["coverage"] = story.coverage
+        archive[story.story_date]["articles"].append(article)
 
     return dict(sorted(archive.items(), reverse=True))
 
 
 def clean_invalid_daily_files(daily_dir: Path) -> None:
-    for path in daily_dir.glob("*.json"):
-        if not is_valid_story_date(path.stem):
+    for path in daily_dir.glob("*.json*"):
+        match = HASHED_RE.match(path.name)
+        if match:
+            stem = match["stem"]
+        elif path.suffix == ".json":
+            stem = path.stem
+        else:
+            continue
+        if not is_valid_story_date(stem):
             path.unlink()
 
 
-def publish(stories: list[Story], publish_dir: Path) -> None:
+def encode_json(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def file_hash(path: Path) -> str | None:
+    try:
+        return content_hash(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def file_mode(path: Path) -> int:
+    """Permissions for a new copy of ``path``: those of the current file, else what ``open`` would give."""
+    try:
+        return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers only ever see the old or the new bytes.
+
+    ``mkstemp`` creates the file owner-only; it gets ``path``'s usual
+    permissions back before the swap, so a web server running as another
+    user can still read it.
+    """
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.chmod(temp_name, file_mode(path))
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Write ``data`` unless ``path`` already holds the same content; report whether it wrote."""
+    if file_hash(path) == content_hash(data):
+        return False
+    write_atomic(path, data)
+    return True
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """``daily/2026-08-22.json`` -> ``daily/2026-08-22.<digest>.json``."""
+    stem, _, suffix = name.rpartition(".")
+    return f"{stem}.{digest}.{suffix}"
+
+
+def compressed_copies(data: bytes) -> dict[str, bytes]:
+    """Precompressed variants keyed by file suffix; ``.br`` only when brotli is installed."""
+    copies = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies[".br"] = brotli.compress(data, quality=11)
+    return copies
+
+
+def write_immutable(path: Path, data: bytes) -> bool:
+    """Write a content-addressed file and its compressed copies unless they already exist.
+
+    The name carries the content hash, so an existing file never needs to be
+    rewritten. The plain file goes last: once it exists, so do its copies.
+    """
+    if path.exists():
+        return False
+    for suffix, copy in compressed_copies(data).items():
+        write_atomic(path.with_name(path.name + suffix), copy)
+    write_atomic(path, data)
+    return True
+
+
+def prune_immutable(publish_dir: Path, keep: set[str]) -> None:
+    """Delete content-addressed files (and their copies) not named in ``keep``."""
+    for directory in (publish_dir, publish_dir / "daily"):
+        for path in directory.glob("*.*.json*"):
+            match = HASHED_RE.match(path.name)
+            if not match:
+                continue
+            name = path.relative_to(publish_dir).as_posix().removesuffix(".gz").removesuffix(".br")
+            if name not in keep:
+                path.unlink(missing_ok=True)
+
+
+def day_entry(story_date: str, payload: dict, data: bytes) -> dict:
+    return {
+        "date": story_date,
+        "week": payload.get("week", ""),
+        "file": f"daily/{story_date}.json",
+        "hash": content_hash(data),
+        "articles": len(payload.get("articles", [])),
+    }
+
+
+def load_manifest_days(publish_dir: Path) -> dict[str, dict]:
+    """Day entries of the current manifest.json, rebuilt from daily/ when it is missing or unreadable."""
+    try:
+        manifest = json.loads((publish_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        return {entry["date"]: entry for entry in manifest["days"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    days: dict[str, dict] = {}
+    for path in (publish_dir / "daily").glob("*.json"):
+        if not is_valid_story_date(path.stem):
+            continue
+        try:
+            data = path.read_bytes()
+            payload = json.loads(data)[path.stem]
+        except (OSError, ValueError, KeyError):
+            continue
+        days[path.stem] = day_entry(path.stem, payload, data)
+    return days
+
+
+def load_manifest_immutable(publish_dir: Path) -> tuple[set[str], dict[str, str]]:
+    """Content-addressed names the manifest on disk serves, and the ``retired`` ones it still keeps."""
+    try:
+        manifest = json.loads((publish_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        served = {entry["immutable"] for entry in [manifest["latest"], *manifest["days"]] if "immutable" in entry}
+        return served, dict(manifest.get("retired", {}))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return set(), {}
+
+
+def retire_immutable(served: set[str], retired: dict[str, str], current: set[str]) -> dict[str, str]:
+    """Names to keep besides ``current``, with when they stopped being served.
+
+    Names the previous manifest ``served`` are retired now; earlier retirees
+    stay until ``RETIRED_GRACE`` has passed.
+    """
+    now = utc_now_iso()
+    cutoff = (datetime.fromisoformat(now) - RETIRED_GRACE).isoformat().replace("+00:00", "Z")
+    kept = {name: since for name, since in retired.items() if since >= cutoff and name not in current}
+    kept.update((name, now) for name in served - current - kept.keys())
+    return dict(sorted(kept.items()))
+
+
+def read_day(publish_dir: Path, entry: dict) -> dict | None:
+    try:
+        return json.loads((publish_dir / entry["file"]).read_text(encoding="utf-8"))[entry["date"]]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_published_stories(publish_dir: Path, story_date: str) -> list[Story]:
+    """The articles of ``story_date``'s published daily file, turned back into stories.
+
+    Articles do not record their source or publication time; each counts as
+    its own source and as published at the start of the day.
+    """
+    payload = read_day(publish_dir, {"file": f"daily/{story_date}.json", "date": story_date}) or {}
+    return [
+        Story(
+            source_id=article["link"],
+            source_name=article.get("tag", ""),
+            category=article.get("category", ""),
+            tags=[article["tag"]] if article.get("tag") else [],
+            title=article.get("title", ""),
+            url=article["link"],
+            summary=article.get("summary", ""),
+            commentary=article.get("comment", ""),
+            image_url=article.get("image", ""),
+            score=int(article.get("score", 0)),
+            published_at="",
+            story_date=story_date,
+            enriched=bool(article.get("enriched", False)),
+            duplicates=[{"source_id": "", "source_name": entry["source"], "url": entry["link"]} for entry in article.get("duplicates", [])],
+            related=[
+                {"source_id": "", "source_name": entry["source"], "title": entry["title"], "url": entry["link"]}
+                for entry in article.get("related", [])
+            ],
+            coverage=int(article.get("coverage", 1)),
+        )
+        for article in payload.get("articles", [])
+        if article.get("link")
+    ]
+
+
+def publish(
+    stories: list[Story],
+    publish_dir: Path,
+    *,
+    latest_days: int = 7,
+    immutable: bool = False,
+) -> dict:
+    """Write the daily files for the dates of ``stories``, then latest.json and manifest.json.
+
+    ``manifest.json`` lists every published day, newest first, with its file,
+    content hash and article count; ``latest.json`` holds only the newest
+    ``latest_days`` days, so its size does not grow with the archive. Files
+    whose content hash matches what is already on disk are left alone, the
+    rest are replaced atomically. Returns the file names (relative to
+    ``publish_dir``) that were ``written`` and those left ``unchanged``.
+
+    With ``immutable``, every daily file and latest.json also get a
+    content-addressed copy (``daily/2026-08-22.<hash>.json``) with ``.gz``
+    and ``.br`` variants, named in the manifest under ``immutable``. Those
+    can be served with a far-future cache lifetime; the stable names stay as
+    aliases. Copies the manifest stops naming are listed under ``retired``
+    and deleted ``RETIRED_GRACE`` later, so pages that loaded an earlier
+    manifest can still fetch them.
+    """
     publish_dir.mkdir(parents=True, exist_ok=True)
     daily_dir = publish_dir / "daily"
     daily_dir.mkdir(parents=True, exist_ok=True)
     clean_invalid_daily_files(daily_dir)
 
-    archive = build_archive(stories)
+    report: dict[str, list[str]] = {"written": [], "unchanged": []}
+
+    def record(name: str, written: bool) -> None:
+        report["written" if written else "unchanged"].append(name)
 
-    with (publish_dir / "latest.json").open("w", encoding="utf-8") as handle:
-        json.dump(archive, handle, ensure_ascii=False, indent=2)
+    def write(name: str, data: bytes) -> None:
+        record(name, write_if_changed(publish_dir / name, data))
 
+    days = load_manifest_days(publish_dir)
+    served, retired = load_manifest_immutable(publish_dir)
+    archive = build_archive(stories)
+    encoded: dict[str, bytes] = {}
     for story_date, payload in archive.items():
-        with (daily_dir / f"{story_date}.json").open("w", encoding="utf-8") as handle:
-            json.dump({story_date: payload}, handle, ensure_ascii=False, indent=2)
+        data = encoded[story_date] = encode_json({story_date: payload})
+        days[story_date] = day_entry(story_date, payload, data)
+        write(days[story_date]["file"], data)
+
+    newest = sorted(days, reverse=True)
+    for story_date in newest:
+        entry = days[story_date]
+        entry.pop("immutable", None)
+        if not immutable:
+            continue
+        name = hashed_name(entry["file"], entry["hash"])
+        data = encoded.get(story_date)
+        if data is None:
+            # Untouched day: its copy normally exists already; if the mode
+            # was just switched on, make it from the stable file.
+            if (publish_dir / name).exists():
+                entry["immutable"] = name
+                continue
+            try:
+                data = (publish_dir / entry["file"]).read_bytes()
+            except OSError:
+                continue
+            if content_hash(data) != entry["hash"]:
+                continue
+        record(name, write_immutable(publish_dir / name, data))
+        entry["immutable"] = name
+
+    latest: dict[str, dict] = {}
+    for story_date in newest[:max(1, latest_days)]:
+        payload = archive.get(story_date) or read_day(publish_dir, days[story_date])
+        if payload is not None:
+            latest[story_date] = payload
+    latest_data = encode_json(latest)
+    write(LATEST_NAME, latest_data)
+
+    manifest = {
+        "latest": {"file": LATEST_NAME, "hash": content_hash(latest_data), "days": list(latest)},
+        "days": [days[story_date] for story_date in newest],
+    }
+    if immutable:
+        name = hashed_name(LATEST_NAME, manifest["latest"]["hash"])
+        record(name, write_immutable(publish_dir / name, latest_data))
+        manifest["latest"]["immutable"] = name
+    current = {entry["immutable"] for entry in [manifest["latest"], *manifest["days"]] if "immutable" in entry}
+    retired = retire_immutable(served, retired, current)
+    if retired:
+        manifest["retired"] = retired
+    write(MANIFEST_NAME, encode_json(manifest))
+    prune_immutable(publish_dir, current | retired.keys())
+    return report
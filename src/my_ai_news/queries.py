@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Any
+
+from .models import Story
+
+
+STORY_COLUMNS = """
+    id, run_id, source_id, source_name, category, title, url, summary,
+    commentary, image_url, score, published_at, story_date, story_key,
+    first_seen_run, last_seen_run, tags_json, enriched, duplicates_json,
+    related_json, coverage
+"""
+SOURCE_RUN_COLUMNS = "id, run_id, source_id, source_name, status, items_fetched, error_message, created_at, duration_ms"
+
+
+@dataclass(frozen=True)
+class Page:
+    """One page of rows plus the cursor for the next page (``None`` on the last one).
+
+    Pages are keyset-paginated: the cursor holds the sort key of the last row,
+    so every page is one index range scan however deep the caller pages.
+    """
+
+    rows: list[dict[str, Any]]
+    next_cursor: tuple | None
+
+
+def story_from_row(row: dict[str, Any]) -> Story:
+    return Story(
+        source_id=row["source_id"],
+        source_name=row["source_name"],
+        category=row["category"],
+        tags=json.loads(row["tags_json"]),
+        title=row["title"],
+        url=row["url"],
+        summary=row["summary"] or "",
+        commentary=row["commentary"] or "",
+        image_url=row["image_url"] or "",
+        score=row["score"],
+        published_at=row["published_at"] or "",
+        story_date=row["story_date"],
+        enriched=bool(row["enriched"]),
+        duplicates=json.loads(row["duplicates_json"]),
+        related=json.loads(row["related_json"]),
+        coverage=row["coverage"],
+        story_key=row["story_key"] or "",
+    )
+
+
+def _page(rows: list[sqlite3.Row], limit: int, key: tuple[str, ...]) -> Page:
+    rows = [dict(row) for row in rows]
+    if len(rows) <= limit:
+        return Page(rows=rows, next_cursor=None)
+    rows = rows[:limit]
+    return Page(rows=rows, next_cursor=tuple(rows[-1][name] for name in key))
+
+
+def stories_between(
+    connection: sqlite3.Connection,
+    start_date: str,
+    end_date: str,
+    *,
+    limit: int = 200,
+    cursor: tuple | None = None,
+) -> Page:
+    """Stories dated ``start_date``..``end_date`` (inclusive), newest day and best score first.
+
+    Served by ``idx_stories_date_score``.
+    """
+    where = "story_date BETWEEN ? AND ?"
+    params: list[Any] = [start_date, end_date]
+    if cursor is not None:
+        where += " AND (story_date, score, id) < (?, ?, ?)"
+        params.extend(cursor)
+    rows = connection.execute(
+        f"""
+        SELECT {STORY_COLUMNS}
+        FROM stories INDEXED BY idx_stories_date_score
+        WHERE {where}
+        ORDER BY story_date DESC, score DESC, id DESC
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    ).fetchall()
+    return _page(rows, limit, ("story_date", "score", "id"))
+
+
+def top_stories_by_category(connection: sqlite3.Connection, story_date: str, *, limit: int = 10) -> dict[str, list[dict[str, Any]]]:
+    """The ``limit`` best-scored stories of each category on ``story_date``.
+
+    One short range scan of ``idx_stories_date_category_score`` per category,
+    so the cost is independent of how many stories the day has.
+    """
+    categories = [
+        row["category"]
+        for row in connection.execute(
+            "SELECT DISTINCT category FROM stories INDEXED BY idx_stories_date_category_score WHERE story_date = ? ORDER BY category",
+            (story_date,),
+        )
+    ]
+    top: dict[str, list[dict[str, Any]]] = {}
+    for category in categories:
+        rows = connection.execute(
+            f"""
+            SELECT {STORY_COLUMNS}
+            FROM stories INDEXED BY idx_stories_date_category_score
+            WHERE story_date = ? AND category = ?
+            ORDER BY score DESC, id DESC
+            LIMIT ?
+            """,
+            (story_date, category, limit),
+        ).fetchall()
+        top[category] = [dict(row) for row in rows]
+    return top
+
+
+def source_history(
+    connection: sqlite3.Connection,
+    source_id: str,
+    *,
+    limit: int = 50,
+    cursor: tuple | None = None,
+    exclude_statuses: tuple[str, ...] = (),
+) -> Page:
+    """A source's ``source_runs`` rows, newest first, minus ``exclude_statuses``.
+
+    Served by ``idx_source_runs_source``.
+    """
+    where = "source_id = ?"
+    params: list[Any] = [source_id]
+    if exclude_statuses:
+        where += f" AND status NOT IN ({', '.join('?' for _ in exclude_statuses)})"
+        params.extend(exclude_statuses)
+    if cursor is not None:
+        where += " AND id < ?"
+        params.extend(cursor)
+    rows = connection.execute(
+        f"""
+        SELECT {SOURCE_RUN_COLUMNS}
+        FROM source_runs INDEXED BY idx_source_runs_source
+        WHERE {where}
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    ).fetchall()
+    return _page(rows, limit, ("id",))
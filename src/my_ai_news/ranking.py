@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+from .models import Story
+
+
+def published_timestamp(story: Story) -> float | None:
+    """``published_at`` (ISO 8601 or RFC 822), else the story date at midnight UTC."""
+    for value in (story.published_at, story.story_date):
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(value)
+            except (TypeError, ValueError, IndexError):
+                continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=UTC)
+        return parsed.timestamp()
+    return None
+
+
+def ranking_scores(
+    stories: list[Story],
+    *,
+    now: datetime,
+    half_life_hours: float = 48.0,
+    source_penalty: float = 0.15,
+) -> list[float]:
+    """Ranking score per story, computed for the whole list in a few passes.
+
+    ``Story.score`` already combines source priority, image/summary bonuses,
+    cluster coverage and the model's ``score_delta``. It is halved every
+    ``half_life_hours`` of age (``0`` turns decay off), then the k-th best story
+    of a source on a given day is multiplied by ``(1 - source_penalty) ** k``
+    so one prolific source cannot fill a day on its own.
+    """
+    reference = now.timestamp()
+    ages = [
+        max(0.0, reference - timestamp) / 3600 if timestamp is not None else 0.0
+        for timestamp in map(published_timestamp, stories)
+    ]
+    if half_life_hours > 0:
+        decayed = [story.score * 0.5 ** (age / half_life_hours) for story, age in zip(stories, ages)]
+    else:
+        decayed = [float(story.score) for story in stories]
+
+    by_source: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for index, story in enumerate(stories):
+        by_source[(story.story_date, story.source_id)].append(index)
+    keep = max(0.0, 1.0 - source_penalty)
+    scores = list(decayed)
+    for indexes in by_source.values():
+        indexes.sort(key=lambda index: decayed[index], reverse=True)
+        for position, index in enumerate(indexes[1:], start=1):
+            scores[index] = decayed[index] * keep ** position
+    return scores
+
+
+def rank_stories(
+    stories: list[Story],
+    *,
+    now: datetime | None = None,
+    half_life_hours: float = 48.0,
+    source_penalty: float = 0.15,
+    day_limit: int = 0,
+    category_limit: int = 0,
+) -> list[Story]:
+    """Stories to publish, newest day first and best ranking score first within a day.
+
+    At most ``category_limit`` stories per category and ``day_limit`` per day
+    are kept (``0`` means no limit). Each quota is a ``heapq.nlargest``
+    selection, so only the kept stories are ever sorted.
+    """
+    scores = ranking_scores(
+        stories,
+        now=now or datetime.now(UTC),
+        half_life_hours=half_life_hours,
+        source_penalty=source_penalty,
+    )
+
+    def key(index: int) -> tuple[float, int]:
+        # Ties keep input order.
+        return scores[index], -index
+
+    def top(indexes: list[int], limit: int) -> list[int]:
+        if limit and len(indexes) > limit:
+            return heapq.nlargest(limit, indexes, key=key)
+        return sorted(indexes, key=key, reverse=True)
+
+    by_day: dict[str, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+    for index, story in enumerate(stories):
+        by_day[story.story_date][story.category].append(index)
+
+    ranked: list[Story] = []
+    for story_date in sorted(by_day, reverse=True):
+        kept = [index for indexes in by_day[story_date].values() for index in top(indexes, category_limit)]
+        ranked.extend(stories[index] for index in top(kept, day_limit))
+    return ranked
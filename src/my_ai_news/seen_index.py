@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import sqlite3
+
+
+class SeenIndex:
+    """Canonical URLs already stored in ``raw_items``, loaded once per run.
+
+    Fetchers consult it before doing per-entry work (fingerprinting, payload
+    serialization, date parsing) so repeat entries stay cheap.
+    """
+
+    def __init__(self, canonical_urls: set[str] | None = None):
+        self._urls = set(canonical_urls or ())
+
+    @classmethod
+    def load(cls, connection: sqlite3.Connection) -> "SeenIndex":
+        rows = connection.execute("SELECT canonical_url FROM raw_items")
+        return cls({row[0] for row in rows})
+
+    def __contains__(self, canonical_url: str) -> bool:
+        return canonical_url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import queue
+import threading
+from contextlib import ExitStack
+from typing import Any, Callable, Iterator
+
+from .ai import AIEnricher, EnrichmentResult, build_enricher
+from .config import AppConfig, load_sources
+from .enrichment_cache import EnrichmentCache
+from .fetchers import FetchResult, fetch_source, iter_fetch_results
+from .llm_endpoints import EndpointPool
+from .llm_limits import build_llm_limiter, use_llm_limiter
+from .models import RawItem, Story
+from .processing import UniqueFilter, enrichment_input, enrichment_rank, input_fingerprint, story_with_fallback
+
+
+class EnrichmentStream:
+    """Enriches items on a background thread while the caller is still producing them.
+
+    ``put`` adds items to a bounded buffer ordered by ``rank`` (lowest first)
+    and blocks while the buffer is full, so a slow model holds back whatever
+    feeds it instead of letting items pile up. The worker repeatedly takes up
+    to ``chunk_size`` of the best-ranked waiting items, sends them through one
+    ``enrich_many`` call (which batches and parallelises them), stores
+    successes in ``cache`` and reports every outcome to ``on_result``.
+    """
+
+    def __init__(
+        self,
+        enricher: AIEnricher,
+        *,
+        on_result: Callable[[RawItem, EnrichmentResult | Exception], None],
+        cache: EnrichmentCache | None = None,
+        chunk_size: int = 32,
+        capacity: int = 128,
+    ):
+        self.enricher = enricher
+        self.cache = cache
+        self.chunk_size = max(1, chunk_size)
+        self.capacity = max(self.chunk_size, capacity)
+        self._on_result = on_result
+        self._heap: list[tuple[Any, int, RawItem]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="enrichment-stream", daemon=True)
+
+    def start(self) -> "EnrichmentStream":
+        self._thread.start()
+        return self
+
+    def __enter__(self) -> "EnrichmentStream":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def put(self, ranked_items: list[tuple[Any, RawItem]], *, wait: bool = True) -> None:
+        """Queue ``(rank, item)`` pairs; a batch that fits is queued before the worker sees any of it.
+
+        With ``wait=False`` the batch is queued even past ``capacity``, for a
+        producer that has nothing left to hold back.
+        """
+        with self._condition:
+            for rank, item in ranked_items:
+                while wait and len(self._heap) >= self.capacity and self._error is None:
+                    self._condition.wait()
+                heapq.heappush(self._heap, (rank, next(self._sequence), item))
+            self._condition.notify_all()
+
+    def discard(self, canonical_urls: set[str]) -> None:
+        """Drop waiting items with these canonical URLs; items the worker already took still finish."""
+        with self._condition:
+            self._heap = [entry for entry in self._heap if entry[2].canonical_url not in canonical_urls]
+            heapq.heapify(self._heap)
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Let the worker finish what is queued, wait for it, and re-raise its error if it had one."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self) -> None:
+        """Drop whatever is still queued and let the worker stop after its current chunk."""
+        with self._condition:
+            self._heap.clear()
+            self._closed = True
+            self._condition.notify_all()
+
+    def _take(self) -> list[RawItem]:
+        with self._condition:
+            while not self._heap and not self._closed:
+                self._condition.wait()
+            chunk = [heapq.heappop(self._heap)[2] for _ in range(min(self.chunk_size, len(self._heap)))]
+            self._condition.notify_all()
+            return chunk
+
+    def _run(self) -> None:
+        try:
+            while chunk := self._take():
+                inputs = [enrichment_input(item) for item in chunk]
+                for item, payload, outcome in zip(chunk, inputs, self.enricher.enrich_many(inputs)):
+                    if self.cache is not None and isinstance(outcome, EnrichmentResult):
+                        self.cache.put(input_fingerprint(payload), outcome)
+                    self._on_result(item, outcome)
+        except BaseException as exc:
+            with self._condition:
+                self._error = exc
+                self._heap.clear()
+                self._condition.notify_all()
+
+
+def _put_unless_cancelled(target: queue.Queue, value: object, cancelled: threading.Event) -> None:
+    while not cancelled.is_set():
+        try:
+            target.put(value, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+_FINISHED = object()
+
+
+def iter_stories(config: AppConfig, sources: list[dict] | None = None, *, buffer_size: int = 64) -> Iterator[Story]:
+    """Fetch, dedupe and enrich stories, yielding each one as soon as it is ready.
+
+    The stages overlap: sources are fetched on the fetch pool in config order,
+    exact duplicates are dropped as items arrive, and enrichment of early
+    sources runs while later ones are still downloading. Stages hand over
+    through bounded buffers of about ``buffer_size`` items, so a consumer that
+    stops reading also stops the fetching. Stories come out in completion
+    order, unranked, and nothing is stored or published; sources that fail
+    are skipped.
+    """
+    sources = load_sources(config.source_config) if sources is None else sources
+    source_priority = {source["id"]: source.get("priority", 50) for source in sources}
+    llm_enabled = config.llm_enabled and bool(config.llm_api_key)
+    enricher = build_enricher(config, EndpointPool.from_config(config) if llm_enabled else None)
+    stories: queue.Queue = queue.Queue(maxsize=max(1, buffer_size))
+    cancelled = threading.Event()
+    failure: list[BaseException] = []
+
+    def emit(item: RawItem, enrichment: EnrichmentResult | Exception | None) -> None:
+        story = story_with_fallback(item, source_priority.get(item.source_id, 50), enrichment)
+        _put_unless_cancelled(stories, story, cancelled)
+
+    def produce() -> None:
+        unique = UniqueFilter()
+        try:
+            with ExitStack() as stack:
+                stream = None
+                if llm_enabled:
+                    stack.enter_context(use_llm_limiter(build_llm_limiter(config)))
+                    stream = stack.enter_context(
+                        EnrichmentStream(
+                            enricher,
+                            on_result=emit,
+                            chunk_size=config.llm_batch_size * config.llm_max_in_flight,
+                            capacity=buffer_size,
+                        )
+                    )
+                planned = [{**source, "limit": source.get("limit") or config.fetch_item_limit} for source in sources]
+                fetched = iter_fetch_results(
+                    planned,
+                    fetch_source,
+                    max_workers=config.fetch_max_workers,
+                    per_host_limit=config.fetch_per_host_limit,
+                    lookahead=config.fetch_max_workers,
+                )
+                for outcome in fetched:
+                    if cancelled.is_set():
+                        if stream is not None:
+                            stream.cancel()
+                        break
+                    items = outcome.items if isinstance(outcome, FetchResult) else outcome
+                    if isinstance(items, Exception):
+                        continue
+                    admitted = [item for item in items if unique.admit(item)]
+                    if stream is None:
+                        for item in admitted:
+                            emit(item, None)
+                    else:
+                        stream.put([(enrichment_rank(item, source_priority, set()), item) for item in admitted])
+                fetched.close()
+        except BaseException as exc:
+            failure.append(exc)
+        finally:
+            _put_unless_cancelled(stories, _FINISHED, cancelled)
+
+    producer = threading.Thread(target=produce, name="iter-stories", daemon=True)
+    producer.start()
+    try:
+        while (story := stories.get()) is not _FINISHED:
+            yield story
+    finally:
+        cancelled.set()
+        producer.join()
+    if failure:
+        raise failure[0]
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import http.client
+import ssl
+import threading
+import zlib
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:  # optional: only used to decode `Content-Encoding: br`
+    brotli = None
+
+
+DEFAULT_TIMEOUT = 20
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_REDIRECTS = 5
+USER_AGENT = "Mozilla/5.0 (compatible; my-ai-news/1.0)"
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli else "gzip, deflate"
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+CHUNK_SIZE = 64 * 1024
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, url: str, status: int, reason: str = ""):
+        super().__init__(f"HTTP Error {status}: {reason or 'request failed'} ({url})")
+        self.url = url
+        self.status = status
+
+
+class ResponseTooLarge(Exception):
+    def __init__(self, url: str, limit: int):
+        super().__init__(f"response body exceeds {limit} bytes ({url})")
+        self.url = url
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+class StreamingResponse:
+    """A response whose body is consumed incrementally with ``iter_chunks``.
+
+    Leaving the ``HttpClient.stream`` block before the body is exhausted closes
+    the connection instead of returning it to the pool.
+    """
+
+    def __init__(self, client: "HttpClient", url: str, response: http.client.HTTPResponse):
+        self._client = client
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.headers = {name.lower(): value for name, value in response.getheaders()}
+        self.bytes_read = 0
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        declared = self.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > self._client.max_body_bytes:
+            raise ResponseTooLarge(self.url, self._client.max_body_bytes)
+
+        decoder = _Decoder(self.headers.get("content-encoding", ""))
+        size = 0
+        while True:
+            raw = self._response.read(chunk_size)
+            self.bytes_read += len(raw)
+            decoded = decoder.decode(raw) if raw else decoder.flush()
+            size += len(decoded)
+            if size > self._client.max_body_bytes:
+                raise ResponseTooLarge(self.url, self._client.max_body_bytes)
+            if decoded:
+                yield decoded
+            if not raw:
+                return
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks())
+
+
+class _Decoder:
+    def __init__(self, content_encoding: str):
+        encoding = content_encoding.strip().lower()
+        self._brotli = None
+        self._zlib = None
+        if encoding in {"gzip", "x-gzip"}:
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._zlib = zlib.decompressobj()
+            self._raw_deflate_checked = False
+        elif encoding == "br" and brotli is not None:
+            self._brotli = brotli.Decompressor()
+        self._encoding = encoding
+
+    def decode(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        if self._zlib is None:
+            return data
+        if self._encoding == "deflate" and not self._raw_deflate_checked:
+            # Some servers send raw DEFLATE without the zlib header.
+            self._raw_deflate_checked = True
+            try:
+                return self._zlib.decompress(data)
+            except zlib.error:
+                self._zlib = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._zlib.decompress(data)
+
+    def flush(self) -> bytes:
+        if self._zlib is not None:
+            return self._zlib.flush()
+        return b""
+
+
+class HttpClient:
+    """Small pooled HTTP/1.1 client shared by every fetch in a run.
+
+    Connections are kept alive per (scheme, host, port) and handed back to the
+    pool once a response body has been read to the end. Responses are
+    negotiated as gzip/deflate (plus brotli when the ``brotli`` package is
+    installed), decoded transparently, and capped at ``max_body_bytes``.
+    """
+
+    def __init__(self, *, max_idle_per_host: int = 4, max_body_bytes: int = MAX_BODY_BYTES, user_agent: str = USER_AGENT):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_body_bytes = max_body_bytes
+        self.user_agent = user_agent
+        self._ssl_context = ssl.create_default_context()
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, *, headers: dict[str, str] | None = None, timeout: float = DEFAULT_TIMEOUT) -> HttpResponse:
+        with self.stream(url, headers=headers, timeout=timeout) as response:
+            body = response.read()
+        return HttpResponse(url=response.url, status=response.status, headers=response.headers, body=body)
+
+    @contextmanager
+    def stream(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Iterator[StreamingResponse]:
+        """Open ``url`` (following redirects) and yield the response unread.
+
+        Raises ``HTTPStatusError`` for 4xx/5xx answers; a 304 is returned as is.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            key, connection, response = self._open(url, headers or {}, timeout)
+            if response.status in REDIRECT_STATUSES and response.getheader("Location"):
+                response.read()
+                self._release(key, connection, response)
+                url = urljoin(url, response.getheader("Location"))
+                continue
+
+            if response.status >= 400:
+                connection.close()
+                raise HTTPStatusError(url, response.status, response.reason)
+
+            streaming = StreamingResponse(self, url, response)
+            try:
+                yield streaming
+            except BaseException:
+                connection.close()
+                raise
+            self._release(key, connection, response)
+            return
+        raise HTTPStatusError(url, 310, "too many redirects")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _pool_key(self, url: str) -> tuple[tuple[str, str, int], str]:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return (scheme, parts.hostname.lower(), port), path
+
+    def _checkout(self, key: tuple[str, str, int], timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            connection = idle.pop() if idle else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _open(
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeout: float,
+    ) -> tuple[tuple[str, str, int], http.client.HTTPConnection, http.client.HTTPResponse]:
+        key, path = self._pool_key(url)
+        request_headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive",
+            **headers,
+        }
+        while True:
+            connection, reused = self._checkout(key, timeout)
+            try:
+                connection.request("GET", path, headers=request_headers)
+                return key, connection, connection.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry on a fresh one.
+            except BaseException:
+                connection.close()
+                raise
+
+    def _release(self, key: tuple[str, str, int], connection: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        if response.will_close or not response.isclosed():
+            connection.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+_default_client = HttpClient()
+
+
+def default_client() -> HttpClient:
+    return _default_client
+
+
+def fetch_url(url: str, *, headers: dict[str, str] | None = None, timeout: float = DEFAULT_TIMEOUT) -> HttpResponse:
+    """GET ``url`` through the shared pooled client."""
+    return _default_client.get(url, headers=headers, timeout=timeout)
+
+
+def stream_url(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> AbstractContextManager[StreamingResponse]:
+    """Stream ``url`` through the shared pooled client; see ``HttpClient.stream``."""
+    return _default_client.stream(url, headers=headers, timeout=timeout)
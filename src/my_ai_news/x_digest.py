@@ -3,23 +3,24 @@ from __future__ import annotations
 import json
 import os
 import re
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from html.parser import HTMLParser
+from operator import attrgetter
 from pathlib import Path
 from urllib.parse import quote, urlparse
 
-import feedparser
-from openai import OpenAI
-
+from .ai import estimate_tokens
 from .config import AppConfig, load_x_accounts
-from .fetchers import canonicalize_url
-from .models import utc_now_iso
+from .fetchers import NotModified, canonicalize_url, parse_feed
+from .llm_endpoints import EndpointPool
+from .llm_limits import current_llm_limiter
+from .models import field_names, intern_fields, utc_now_iso
 from .processing import strip_html
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class XPost:
     account_id: str
     handle: str
@@ -40,8 +41,17 @@ class XPost:
     kind: str
     score: int
 
+    def __post_init__(self) -> None:
+        intern_fields(self, _X_POST_INTERNED)
+
     def to_dict(self) -> dict:
-        return asdict(self)
+        """Field dict; lists are shared, not copied like ``asdict``."""
+        return dict(zip(_X_POST_FIELDS, _x_post_values(self)))
+
+
+_X_POST_FIELDS = field_names(XPost)
+_X_POST_INTERNED = ("account_id", "handle", "author_name", "role", "avatar_url", "published_date", "kind")
+_x_post_values = attrgetter(*_X_POST_FIELDS)
 
 
 def contains_cjk(value: str) -> bool:
@@ -181,18 +191,12 @@ def fallback_translation(text: str) -> tuple[str, str]:
 
 
 class XPostTranslator:
-    def __init__(self, config: AppConfig):
-        self.enabled = config.llm_enabled and bool(config.llm_api_key)
+    def __init__(self, config: AppConfig, endpoints: EndpointPool | None):
         self.model = config.llm_model
-        self.client: OpenAI | None = None
-        if self.enabled:
-            client_kwargs = {"api_key": config.llm_api_key}
-            if config.llm_base_url:
-                client_kwargs["base_url"] = config.llm_base_url
-            self.client = OpenAI(**client_kwargs)
+        self.endpoints = endpoints
 
     def translate(self, *, author_name: str, text: str) -> tuple[str, str]:
-        if not self.client:
+        if not self.endpoints:
             return fallback_translation(text)
 
         prompt = f"""
@@ -205,13 +209,16 @@ class XPostTranslator:
 author={author_name}
 text={text}
 """.strip()
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "你是克制准确的中英双语科技编辑。"},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
+        response = current_llm_limiter().call(
+            lambda: self.endpoints.complete(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "你是克制准确的中英双语科技编辑。"},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+            ),
+            tokens=estimate_tokens(prompt) * 2,
         )
         content = (response.choices[0].message.content or "{}").strip()
         if content.startswith("```json"):
@@ -224,8 +231,21 @@ text={text}
         zh_text = str(payload.get("zh_text", "")).strip()
         return zh_text or fallback_translation(text)[0], ""
 
+    def translate_posts(self, posts: list[XPost]) -> list[XPost]:
+        """Translate posts concurrently, keeping their order; failures use the fallback."""
+
+        def translate(post: XPost) -> tuple[str, str]:
+            return self.translate(author_name=post.author_name, text=post.original_text)
+
+        translated: list[XPost] = []
+        for post, outcome in zip(posts, current_llm_limiter().map(translate, posts)):
+            zh_text, commentary = fallback_translation(post.original_text) if isinstance(outcome, Exception) else outcome
+            translated.append(replace(post, zh_text=zh_text, commentary=commentary))
+        return translated
+
 
-def fetch_account_posts(account: dict, translator: XPostTranslator, limit: int) -> tuple[list[XPost], dict]:
+def fetch_account_posts(account: dict, limit: int) -> tuple[list[XPost], dict]:
+    """Fetch an account's latest posts; translation is filled in later by ``XPostTranslator.translate_posts``."""
     urls = build_account_feed_urls(account)
     handle = str(account.get("handle", "")).strip().lstrip("@")
     status = {
@@ -244,7 +264,14 @@ def fetch_account_posts(account: dict, translator: XPostTranslator, limit: int)
 
     last_error = ""
     for url in urls:
-        feed = feedparser.parse(url)
+        try:
+            feed = parse_feed(url)
+        except NotModified:
+            status.update({"status": "not_modified", "active_url": url, "error_message": None})
+            return [], status
+        except Exception as exc:
+            last_error = str(exc) or exc.__class__.__name__
+            continue
         entries = getattr(feed, "entries", []) or []
         if not entries:
             last_error = str(getattr(feed, "bozo_exception", "")) or "empty feed"
@@ -261,11 +288,6 @@ def fetch_account_posts(account: dict, translator: XPostTranslator, limit: int)
             published_at, published_date = published_values(entry)
             image_urls = extract_image_urls(summary_html)
             video_urls = [*extract_html_video_urls(summary_html), *extract_entry_video_urls(entry)]
-            try:
-                zh_text, commentary = translator.translate(author_name=str(account.get("name", handle)), text=raw_text)
-            except Exception:
-                zh_text, commentary = fallback_translation(raw_text)
-
             posts.append(
                 XPost(
                     account_id=str(account.get("id", handle)),
@@ -274,8 +296,8 @@ def fetch_account_posts(account: dict, translator: XPostTranslator, limit: int)
                     role=str(account.get("role", "")),
                     avatar_url=avatar_url,
                     original_text=raw_text,
-                    zh_text=zh_text,
-                    commentary=commentary,
+                    zh_text="",
+                    commentary="",
                     media_urls=image_urls,
                     image_urls=image_urls,
                     video_urls=video_urls,
@@ -296,25 +318,40 @@ def fetch_account_posts(account: dict, translator: XPostTranslator, limit: int)
     return [], status
 
 
-def publish_x_digest(posts: list[XPost], statuses: list[dict], output_path: Path) -> dict:
+def load_previous_digest(output_path: Path) -> dict | None:
+    if not output_path.exists():
+        return None
+    try:
+        return json.loads(output_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def publish_x_digest(
+    posts: list[XPost],
+    statuses: list[dict],
+    output_path: Path,
+    *,
+    carried_items: list[dict] | None = None,
+) -> dict:
+    """Write the digest; ``carried_items`` are previous payloads for not-modified accounts."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    deduped: dict[str, XPost] = {}
+    deduped: dict[str, dict] = {}
     for post in posts:
-        deduped.setdefault(post.canonical_url or post.url, post)
+        deduped.setdefault(post.canonical_url or post.url, post.to_dict())
+    for item in carried_items or []:
+        deduped.setdefault(item.get("canonical_url") or item.get("url", ""), item)
 
     sorted_posts = sorted(
         deduped.values(),
-        key=lambda item: (item.published_date, item.score),
+        key=lambda item: (item.get("published_date", ""), item.get("score", 0)),
         reverse=True,
     )
     stale = False
     previous_payload: dict | None = None
     last_success_at = utc_now_iso()
     if not sorted_posts and output_path.exists():
-        try:
-            previous_payload = json.loads(output_path.read_text(encoding="utf-8"))
-        except (OSError, json.JSONDecodeError):
-            previous_payload = None
+        previous_payload = load_previous_digest(output_path)
         previous_items = previous_payload.get("items", []) if previous_payload else []
         if previous_items:
             stale = True
@@ -327,7 +364,7 @@ def publish_x_digest(posts: list[XPost], statuses: list[dict], output_path: Path
         else:
             sorted_item_payloads = []
     else:
-        sorted_item_payloads = [post.to_dict() for post in sorted_posts[:50]]
+        sorted_item_payloads = sorted_posts[:50]
 
     payload = {
         "generated_at": utc_now_iso(),
@@ -342,15 +379,23 @@ def publish_x_digest(posts: list[XPost], statuses: list[dict], output_path: Path
     return payload
 
 
-def run_x_digest(config: AppConfig, *, per_account_limit: int = 3) -> dict:
+def run_x_digest(config: AppConfig, *, endpoints: EndpointPool | None = None, per_account_limit: int = 3) -> dict:
+    """Fetch, translate (on the run's ``endpoints``, if any) and publish the X digest."""
     accounts = load_x_accounts(config.x_config)
-    translator = XPostTranslator(config)
+    translator = XPostTranslator(config, endpoints)
     all_posts: list[XPost] = []
     statuses: list[dict] = []
 
     for account in accounts:
-        posts, status = fetch_account_posts(account, translator, per_account_limit)
+        posts, status = fetch_account_posts(account, per_account_limit)
         all_posts.extend(posts)
         statuses.append(status)
+    all_posts = translator.translate_posts(all_posts)
+
+    carried_items: list[dict] = []
+    not_modified_ids = {status["account_id"] for status in statuses if status["status"] == "not_modified"}
+    if not_modified_ids:
+        previous_payload = load_previous_digest(config.x_digest_path) or {}
+        carried_items = [item for item in previous_payload.get("items", []) if item.get("account_id") in not_modified_ids]
 
-    return publish_x_digest(all_posts, statuses, config.x_digest_path)
+    return publish_x_digest(all_posts, statuses, config.x_digest_path, carried_items=carried_items)
@@ -7,3 +7,26 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 SRC_DIR = PROJECT_ROOT / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
+
+import pytest
+
+from my_ai_news.models import RawItem
+
+
+@pytest.fixture
+def sample_item() -> RawItem:
+    return RawItem(
+        source_id="primary-source",
+        source_name="Primary Source",
+        category="ai",
+        title="Test title",
+        url="https://example.com/story",
+        canonical_url="https://example.com/story",
+        summary="<p>Story summary</p>",
+        image_url="",
+        published_at="2026-04-15T00:00:00Z",
+        published_date="2026-04-15",
+        fetched_at="2026-04-15T00:00:00Z",
+        fingerprint="abc123",
+        payload_json="{}",
+    )
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from my_ai_news.ai import EnrichmentResult, OpenAICompatibleEnricher, classify_story_signal, plan_batches, replace_english_phrases
+from my_ai_news.config import load_config
+from my_ai_news.llm_endpoints import EndpointPool
+from my_ai_news.llm_limits import LLMLimiter, TokenBucket, retry_after_seconds, use_llm_limiter
+
+
+class ScriptedCompletions:
+    """Stands in for ``client.chat.completions``; answers with ``reply(prompt)``."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts: list[str] = []
+
+    def create(self, *, model: str, messages: list[dict], temperature: float):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        content = self.reply(prompt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def batch_items(prompt: str) -> list[dict]:
+    return json.loads(prompt.split("items=", 1)[1])
+
+
+def answer_all(prompt: str) -> str:
+    return json.dumps(
+        [
+            {"id": item["id"], "title": f"标题{item['title']}", "summary": "摘要", "commentary": "短评", "tags": ["AI"], "score_delta": 2}
+            for item in batch_items(prompt)
+        ],
+        ensure_ascii=False,
+    )
+
+
+def make_items(count: int) -> list[dict]:
+    return [
+        {"category": "人工智能", "source_name": "Demo", "title": f"Story {index}", "summary": "Summary", "url": f"https://example.com/{index}"}
+        for index in range(count)
+    ]
+
+
+def make_enricher(tmp_path: Path, reply, **overrides: int) -> tuple[OpenAICompatibleEnricher, ScriptedCompletions]:
+    config = replace(load_config(tmp_path), llm_enabled=True, llm_api_key="test-key", **overrides)
+    completions = ScriptedCompletions(reply)
+    endpoints = EndpointPool([None], client_factory=lambda base_url: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return OpenAICompatibleEnricher(config, endpoints), completions
+
+
+def test_plan_batches_respects_item_count_and_token_budget() -> None:
+    items = make_items(10)
+
+    assert plan_batches(items, max_items=4, token_budget=100_000) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert all(len(batch) == 1 for batch in plan_batches(items, max_items=4, token_budget=1))
+
+
+def test_enrich_many_sends_one_request_per_batch(tmp_path: Path) -> None:
+    enricher, completions = make_enricher(tmp_path, answer_all, llm_batch_size=5)
+
+    results = enricher.enrich_many(make_items(10))
+
+    assert len(completions.prompts) == 2
+    assert [result.title for result in results] == [f"标题Story {index}" for index in range(10)]
+    assert all(isinstance(result, EnrichmentResult) for result in results)
+
+
+def test_enrich_many_splits_unparseable_batches_and_isolates_bad_items(tmp_path: Path) -> None:
+    def reply(prompt: str) -> str:
+        items = batch_items(prompt)
+        if len(items) == 4:
+            return "not json"
+        payload = json.loads(answer_all(prompt))
+        return json.dumps(["oops" if item["title"] == "Story 2" else element for item, element in zip(items, payload)])
+
+    enricher, completions = make_enricher(tmp_path, reply, llm_batch_size=4)
+
+    results = enricher.enrich_many(make_items(4))
+
+    assert len(completions.prompts) == 3
+    assert [results[index].title for index in (0, 1, 3)] == ["标题Story 0", "标题Story 1", "标题Story 3"]
+    assert isinstance(results[2], ValueError)
+
+
+def test_enrich_many_returns_transport_errors_per_item(tmp_path: Path) -> None:
+    def reply(prompt: str) -> str:
+        raise TimeoutError("LLM timed out")
+
+    enricher, _ = make_enricher(tmp_path, reply, llm_batch_size=3)
+    limiter = LLMLimiter(max_retries=2, sleep=lambda seconds: None)
+
+    with use_llm_limiter(limiter):
+        results = enricher.enrich_many(make_items(3))
+
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert limiter.stats()["requests"] == 3
+    assert limiter.stats()["retries"] == 2
+
+
+def test_token_bucket_waits_for_refill() -> None:
+    now = [0.0]
+    slept: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(60, clock=lambda: now[0], sleep=sleep)
+
+    assert bucket.acquire(60) == 0
+    assert bucket.acquire(30) == pytest.approx(30.0)
+    assert slept == [pytest.approx(30.0)]
+
+
+def test_limiter_honours_retry_after_on_rate_limits() -> None:
+    class RateLimited(Exception):
+        status_code = 429
+        response = SimpleNamespace(headers={"retry-after": "7"})
+
+    attempts: list[int] = []
+    slept: list[float] = []
+
+    def request() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited("Error code: 429")
+        return "ok"
+
+    limiter = LLMLimiter(sleep=slept.append)
+
+    assert limiter.call(request) == "ok"
+    assert slept == [7.0, 7.0]
+    assert retry_after_seconds(RateLimited()) == 7.0
+
+
+def test_limiter_map_keeps_input_order_and_captures_errors() -> None:
+    def work(value: int) -> int:
+        if value == 3:
+            raise ValueError("bad item")
+        return value * 10
+
+    results = LLMLimiter(max_in_flight=4).map(work, range(6))
+
+    assert results[:3] == [0, 10, 20]
+    assert isinstance(results[3], ValueError)
+    assert results[4:] == [40, 50]
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+def endpoint_client(name: str, calls: list[str], *, fail: bool = False) -> SimpleNamespace:
+    def create(**request: object) -> str:
+        calls.append(name)
+        if fail:
+            raise ServerError(f"{name} unavailable")
+        return f"answer from {name}"
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_endpoint_pool_fails_over_and_ejects_unhealthy_endpoint() -> None:
+    now = [0.0]
+    calls: list[str] = []
+    clients = {
+        "https://primary.example/v1": endpoint_client("primary", calls, fail=True),
+        "https://backup.example/v1": endpoint_client("backup", calls),
+    }
+    pool = EndpointPool(list(clients), client_factory=clients.__getitem__, failure_threshold=1, cooldown=60, clock=lambda: now[0])
+
+    assert pool.complete(model="m") == "answer from backup"
+    assert pool.complete(model="m") == "answer from backup"
+    assert calls == ["primary", "backup", "backup"]
+
+    [primary, backup] = pool.stats()
+    assert primary["ejected"] is True
+    assert primary["errors"] == 1
+    assert backup["requests"] == 2
+
+    now[0] = 61.0
+    pool.complete(model="m")
+    assert calls[3:] == ["primary", "backup"]
+
+
+def test_endpoint_pool_keeps_a_throttled_endpoint_out_until_retry_after() -> None:
+    now = [0.0]
+    calls: list[str] = []
+    throttled = [True]
+
+    class RateLimited(Exception):
+        status_code = 429
+        response = SimpleNamespace(headers={"retry-after": "30"})
+
+    def primary_create(**request: object) -> str:
+        calls.append("primary")
+        if throttled[0]:
+            raise RateLimited("slow down")
+        return "answer from primary"
+
+    clients = {
+        "https://primary.example/v1": SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=primary_create))),
+        "https://backup.example/v1": endpoint_client("backup", calls),
+    }
+    pool = EndpointPool(list(clients), client_factory=clients.__getitem__, failure_threshold=5, cooldown=60, clock=lambda: now[0])
+
+    assert pool.complete(model="m") == "answer from backup"
+    now[0] = 20.0
+    assert pool.stats()[0]["ejected"] is True
+    assert pool.complete(model="m") == "answer from backup"
+    throttled[0] = False
+    now[0] = 31.0
+    assert pool.complete(model="m") == "answer from primary"
+    assert calls == ["primary", "backup", "backup", "primary"]
+
+
+def test_endpoint_pool_raises_non_retryable_errors_without_failover() -> None:
+    calls: list[str] = []
+
+    def create(**request: object) -> str:
+        calls.append("primary")
+        raise ValueError("bad request")
+
+    clients = {
+        "https://primary.example/v1": SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))),
+        "https://backup.example/v1": endpoint_client("backup", calls),
+    }
+    pool = EndpointPool(list(clients), client_factory=clients.__getitem__)
+
+    with pytest.raises(ValueError):
+        pool.complete(model="m")
+    assert calls == ["primary"]
+
+
+def test_replace_english_phrases_applies_whole_word_table_in_one_pass() -> None:
+    text = "OpenAI updates its Agents SDK to help enterprises build safer, more capable agents with native sandbox execution"
+
+    assert replace_english_phrases(text) == "OpenAI 更新 its 智能体 SDK 以 帮助 企业 构建 更安全, 更强大 智能体 结合 原生沙箱执行"
+    assert replace_english_phrases("reach the Updated toolset") == "reach the 已更新 toolset"
+
+
+def test_classify_story_signal_prefers_higher_priority_keywords_anywhere() -> None:
+    assert classify_story_signal(title="New SDK launch", summary="raises $20M", category="人工智能") == "business"
+    # Substring semantics: "controversdk" contains both a risk and a product keyword.
+    assert classify_story_signal(title="Controversdk", summary="", category="人工智能") == "product"
+    assert classify_story_signal(title="Quiet day", summary="", category="时事热点") == "world"
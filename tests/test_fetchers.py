@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Iterator
+
+import pytest
+from feedparser import FeedParserDict
+
+from my_ai_news.fetchers import (
+    FetchContext,
+    fetch_concurrently,
+    fetch_source,
+    iter_fetch_results,
+    parse_feed,
+    stream_article_list,
+    use_fetch_context,
+)
+from my_ai_news.http_cache import ValidatorCache
+from my_ai_news.models import RawItem
+from my_ai_news.seen_index import SeenIndex
+from my_ai_news.transport import HttpClient, HttpResponse, ResponseTooLarge
+
+
+LISTING_PAGE = "".join(
+    f'<article class="article-item__container"><a class="article-item__title" href="/articles/2026-05-{day:02d}-1">Story {day}</a></article>'
+    for day in range(1, 16)
+).encode("utf-8") + b"<footer>" + b"x" * 512 * 1024 + b"</footer>"
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections: set[int] = set()
+
+    def do_GET(self) -> None:
+        FeedHandler.connections.add(id(self.connection))
+        if self.path == "/industry":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(LISTING_PAGE)))
+            self.end_headers()
+            try:
+                self.wfile.write(LISTING_PAGE)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client hung up after the item limit
+            return
+        body = b"<rss>" + b"x" * 4096 + b"</rss>"
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        return None
+
+
+@pytest.fixture
+def feed_server() -> Iterator[str]:
+    FeedHandler.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.handle_error = lambda request, client_address: None  # clients may hang up early
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+RSS_SOURCE = {
+    "id": "techcrunch_ai",
+    "name": "TechCrunch AI",
+    "category": "ai",
+    "type": "rss",
+    "url": "https://techcrunch.com/category/artificial-intelligence/feed/",
+}
+
+
+def test_fetch_concurrently_keeps_config_order_and_caps_per_host() -> None:
+    sources = [
+        {"id": f"source-{index}", "url": f"https://{host}/feed/{index}"}
+        for index, host in enumerate(["a.example", "a.example", "a.example", "b.example", "c.example"])
+    ]
+    lock = threading.Lock()
+    in_flight: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    def fetch(source: dict) -> str:
+        host = source["url"].split("/")[2]
+        with lock:
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), in_flight[host])
+        time.sleep(0.05)
+        with lock:
+            in_flight[host] -= 1
+        if source["id"] == "source-3":
+            raise TimeoutError("timed out")
+        return source["id"]
+
+    started = time.perf_counter()
+    results = fetch_concurrently(sources, fetch, max_workers=8, per_host_limit=2)
+    elapsed = time.perf_counter() - started
+
+    assert results[:3] == ["source-0", "source-1", "source-2"]
+    assert isinstance(results[3], TimeoutError)
+    assert results[4] == "source-4"
+    assert peak["a.example"] == 2
+    assert elapsed < 0.2
+
+
+def test_iter_fetch_results_stays_within_lookahead_of_the_consumer() -> None:
+    sources = [{"id": f"source-{index}", "url": f"https://host-{index}.example/feed"} for index in range(10)]
+    started: list[str] = []
+
+    def fetch(source: dict) -> str:
+        started.append(source["id"])
+        return source["id"]
+
+    results = []
+    for result in iter_fetch_results(sources, fetch, max_workers=8, per_host_limit=2, lookahead=3):
+        assert len(started) <= len(results) + 3
+        results.append(result)
+        time.sleep(0.01)
+
+    assert results == [source["id"] for source in sources]
+
+
+def test_fetch_source_sends_validators_and_reports_not_modified(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ValidatorCache()
+    cache.update(RSS_SOURCE["url"], {"ETag": '"v1"', "Last-Modified": "Fri, 15 May 2026 08:00:00 GMT"})
+    sent_headers: list[dict] = []
+
+    def fake_fetch_url(url: str, *, headers: dict | None = None, timeout: float = 20) -> HttpResponse:
+        sent_headers.append(dict(headers or {}))
+        return HttpResponse(url=url, status=304, headers={"cache-control": "max-age=3600"}, body=b"")
+
+    monkeypatch.setattr("my_ai_news.fetchers.fetch_url", fake_fetch_url)
+
+    with use_fetch_context(FetchContext(validators=cache)):
+        first = fetch_source(RSS_SOURCE)
+        second = fetch_source(RSS_SOURCE)
+
+    assert first.status == "not_modified"
+    assert first.items == []
+    assert sent_headers == [
+        {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Fri, 15 May 2026 08:00:00 GMT",
+        }
+    ]
+    assert second.status == "not_modified"
+    assert cache.is_fresh(RSS_SOURCE["url"])
+
+
+def test_http_client_reuses_connections_and_decodes_gzip(feed_server: str) -> None:
+    client = HttpClient()
+
+    first = client.get(f"{feed_server}/feed-a")
+    second = client.get(f"{feed_server}/feed-b")
+    client.close()
+
+    assert first.body == second.body
+    assert first.body.startswith(b"<rss>") and len(first.body) == 4096 + 11
+    assert first.headers["content-encoding"] == "gzip"
+    assert len(FeedHandler.connections) == 1
+
+    with pytest.raises(ResponseTooLarge):
+        HttpClient(max_body_bytes=1024).get(f"{feed_server}/feed-a")
+
+
+def test_fetch_source_hedges_slow_primary_with_backup(monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    release_primary = threading.Event()
+
+    def fake_fetch_from_url(source: dict, url: str) -> list:
+        if url == "https://primary.example/rss":
+            release_primary.wait(2)
+            return [sample_item]
+        return [sample_item]
+
+    monkeypatch.setattr("my_ai_news.fetchers._fetch_from_url", fake_fetch_from_url)
+    source = {
+        "id": "demo",
+        "url": "https://primary.example/rss",
+        "backup_urls": ["https://backup.example/rss"],
+        "hedge_delay": 0.05,
+    }
+
+    started = time.perf_counter()
+    result = fetch_source(source)
+    release_primary.set()
+
+    assert time.perf_counter() - started < 1
+    assert result.status == "fallback_success"
+    assert result.hedged is True
+    assert result.active_url == "https://backup.example/rss"
+    assert result.attempted_urls == ["https://primary.example/rss", "https://backup.example/rss"]
+
+
+def test_fetch_source_prefers_empty_primary_over_racing_backup(monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    def fake_fetch_from_url(source: dict, url: str) -> list:
+        if url == "https://primary.example/rss":
+            time.sleep(0.1)
+            return []
+        raise TimeoutError("timed out")
+
+    monkeypatch.setattr("my_ai_news.fetchers._fetch_from_url", fake_fetch_from_url)
+
+    result = fetch_source(
+        {
+            "id": "demo",
+            "url": "https://primary.example/rss",
+            "backup_urls": ["https://backup.example/rss"],
+            "hedge_delay": 0.01,
+        }
+    )
+
+    assert result.status == "empty"
+    assert result.active_url == "https://primary.example/rss"
+
+
+def test_fetch_source_without_hedge_delay_runs_on_the_calling_thread(monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    threads: list[threading.Thread] = []
+
+    def fake_fetch_from_url(source: dict, url: str) -> list:
+        threads.append(threading.current_thread())
+        if url == "https://primary.example/rss":
+            raise TimeoutError("timed out")
+        return [sample_item]
+
+    monkeypatch.setattr("my_ai_news.fetchers._fetch_from_url", fake_fetch_from_url)
+
+    result = fetch_source({"id": "demo", "url": "https://primary.example/rss", "backup_urls": ["https://backup.example/rss"]})
+
+    assert result.status == "fallback_success"
+    assert threads == [threading.current_thread()] * 2
+
+
+def test_hedged_backups_respect_the_per_host_limit(monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    lock = threading.Lock()
+    in_flight: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    delays = {"https://a.example/rss": 0.3, "https://b.example/rss": 0.1, "https://b.example/mirror": 0.0}
+
+    def fake_fetch_from_url(source: dict, url: str) -> list:
+        host = url.split("/")[2]
+        with lock:
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), in_flight[host])
+        time.sleep(delays[url])
+        with lock:
+            in_flight[host] -= 1
+        return [sample_item]
+
+    monkeypatch.setattr("my_ai_news.fetchers._fetch_from_url", fake_fetch_from_url)
+    sources = [
+        {"id": "a", "url": "https://a.example/rss", "backup_urls": ["https://b.example/mirror"], "hedge_delay": 0.02},
+        {"id": "b", "url": "https://b.example/rss"},
+    ]
+
+    first, second = iter_fetch_results(sources, fetch_source, max_workers=4, per_host_limit=1)
+
+    assert peak == {"a.example": 1, "b.example": 1}
+    assert first.hedged is True
+    assert first.active_url == "https://b.example/mirror"
+    assert second.status == "success"
+
+
+def test_stream_article_list_stops_reading_after_item_limit(feed_server: str) -> None:
+    articles, response = stream_article_list(f"{feed_server}/industry", limit=10)
+
+    assert [article["title"] for article in articles] == [f"Story {day}" for day in range(1, 11)]
+    assert articles[0]["url"] == f"{feed_server}/articles/2026-05-01-1"
+    assert response.bytes_read < len(LISTING_PAGE) // 4
+
+
+def test_fetch_source_skips_work_for_already_seen_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    entries = [
+        FeedParserDict(title="Known story", link="https://example.com/known/", summary="old"),
+        FeedParserDict(title="New story", link="https://example.com/new", summary="fresh", published="Fri, 15 May 2026 08:00:00 GMT"),
+    ]
+    monkeypatch.setattr("my_ai_news.fetchers.parse_feed", lambda url, **kwargs: SimpleNamespace(entries=entries))
+    fingerprinted: list[str] = []
+    monkeypatch.setattr("my_ai_news.fetchers.fingerprint_text", lambda title, summary: fingerprinted.append(title) or "fp")
+
+    with use_fetch_context(FetchContext(seen=SeenIndex({"https://example.com/known"}))):
+        result = fetch_source(RSS_SOURCE)
+
+    assert result.status == "success"
+    known, new = result.items
+    assert known.is_new is False
+    assert known.canonical_url == "https://example.com/known"
+    assert known.payload_json == ""
+    assert new.is_new is True
+    assert new.published_date == "2026-05-15"
+    assert fingerprinted == ["New story"]
+
+
+def test_fetch_source_reads_up_to_the_source_item_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    entries = [FeedParserDict(title=f"Story {index}", link=f"https://example.com/{index}", summary="") for index in range(30)]
+    monkeypatch.setattr("my_ai_news.fetchers.parse_feed", lambda url, **kwargs: SimpleNamespace(entries=entries))
+
+    assert len(fetch_source(RSS_SOURCE).items) == 10
+    assert len(fetch_source({**RSS_SOURCE, "limit": 25}).items) == 25
+
+
+def test_parse_feed_passes_charset_and_base_url_to_feedparser(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = '<rss version="2.0"><channel><item><title>Café launch</title><link>/posts/1</link></item></channel></rss>'.encode("iso-8859-1")
+
+    def fake_fetch_url(url: str, *, headers: dict | None = None, timeout: float = 20) -> HttpResponse:
+        return HttpResponse(
+            url="https://example.com/feed/",
+            status=200,
+            headers={"content-type": "application/rss+xml; charset=iso-8859-1"},
+            body=body,
+        )
+
+    monkeypatch.setattr("my_ai_news.fetchers.fetch_url", fake_fetch_url)
+
+    entry = parse_feed("https://example.com/rss").entries[0]
+
+    assert entry.title == "Café launch"
+    assert entry.link == "https://example.com/posts/1"
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+from my_ai_news.ai import EnrichmentResult, NoopEnricher
+from my_ai_news.clustering import cluster_events, similar_pairs, terms, tfidf_vectors
+from my_ai_news.config import load_config
+from my_ai_news.models import RawItem, Story
+from my_ai_news.near_duplicates import MinHashIndex, collapse_near_duplicates, estimated_similarity, minhash, shingles
+from my_ai_news.pipeline import run_pipeline
+from my_ai_news.processing import enrichment_priority, score_item, to_story
+from my_ai_news.publish import build_archive
+from my_ai_news.ranking import rank_stories, ranking_scores
+from my_ai_news.streaming import EnrichmentStream, iter_stories
+
+
+def make_item(source_id: str, slug: str, title: str, summary: str = "") -> RawItem:
+    return RawItem(
+        source_id=source_id,
+        source_name=source_id.title(),
+        category="ai",
+        title=title,
+        url=f"https://{source_id}.example/{slug}",
+        canonical_url=f"https://{source_id}.example/{slug}",
+        summary=summary,
+        image_url="",
+        published_at="2026-04-15T00:00:00Z",
+        published_date="2026-04-15",
+        fetched_at="2026-04-15T00:00:00Z",
+        fingerprint=f"{source_id}-{slug}",
+        payload_json="{}",
+    )
+
+
+SYNDICATED = [
+    make_item("techcrunch", "gpt5", "OpenAI launches GPT-5 with improved reasoning", "OpenAI launches GPT-5 with improved reasoning and a new agent toolkit for developers. The model is available today in ChatGPT and the API."),
+    make_item("verge", "openai-gpt5", "OpenAI launches GPT-5 with improved reasoning", "OpenAI launches GPT-5 with improved reasoning and new agent toolkit for developers. The model is available today in ChatGPT and via the API."),
+    make_item("wired", "codex", "OpenAI launches new Codex agent for enterprise developers", "The coding agent runs tasks in cloud sandboxes."),
+]
+
+
+def test_shingles_use_character_bigrams_for_cjk_text() -> None:
+    assert shingles("OpenAI 发布模型") == {"openai 发", "发 布", "布 模", "模 型"}
+    assert shingles("<b>Hello</b>") == {"hello"}
+
+
+def test_minhash_similarity_separates_rewordings_from_different_stories() -> None:
+    [first, second, other] = [minhash(shingles(f"{item.title} {item.summary}")) for item in SYNDICATED]
+    chinese = minhash(shingles("OpenAI 发布 GPT-5，推理能力大幅提升，并推出面向开发者的全新智能体工具包。该模型今日起在 ChatGPT 和 API 中上线。"))
+    reworded = minhash(shingles("OpenAI 正式发布 GPT-5，推理能力大幅提升，并推出面向开发者的全新智能体工具包，该模型今日起在 ChatGPT 与 API 上线。"))
+
+    assert estimated_similarity(first, second) >= 0.6
+    assert estimated_similarity(chinese, reworded) >= 0.6
+    assert estimated_similarity(first, other) < 0.3
+
+
+def test_collapse_near_duplicates_records_sources_on_the_survivor() -> None:
+    index = MinHashIndex(threshold=0.6)
+
+    survivors, folded = collapse_near_duplicates(SYNDICATED, index, rank=lambda item: (item.source_id != "verge",))
+
+    assert folded == {}
+    assert [item.canonical_url for item in survivors] == ["https://verge.example/openai-gpt5", "https://wired.example/codex"]
+    assert survivors[0].duplicate_sources == [
+        {"source_id": "techcrunch", "source_name": "Techcrunch", "url": "https://techcrunch.example/gpt5"}
+    ]
+    assert survivors[1].duplicate_sources == []
+
+
+def test_collapse_near_duplicates_ranks_items_of_one_run_even_when_the_clock_ticks(monkeypatch: pytest.MonkeyPatch) -> None:
+    ticks = iter(range(60))
+    monkeypatch.setattr("my_ai_news.near_duplicates.utc_now_iso", lambda: f"2026-04-15T00:00:{next(ticks):02d}Z")
+    index = MinHashIndex(threshold=0.6)
+
+    survivors, _ = collapse_near_duplicates(SYNDICATED, index, rank=lambda item: (item.source_id != "verge",))
+
+    assert survivors[0].canonical_url == "https://verge.example/openai-gpt5"
+    assert len(set(index.first_seen.values())) == 1
+
+
+def test_run_pipeline_publishes_syndicated_story_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {"id": source_id, "name": source_id.title(), "category": "ai", "url": f"https://{source_id}.example/rss", "priority": priority}
+                    for source_id, priority in (("techcrunch", 50), ("verge", 60), ("wired", 50))
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    by_source = {item.source_id: item for item in SYNDICATED}
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [by_source[source["id"]]])
+
+    first = run_pipeline(tmp_path)
+    second = run_pipeline(tmp_path)
+
+    assert first["near_duplicates"] == 1
+    assert second["near_duplicates"] == 1
+    latest = json.loads((tmp_path / "public" / "data" / "latest.json").read_text(encoding="utf-8"))
+    articles = latest["2026-04-15"]["articles"]
+    assert len(articles) == 2
+    [lead] = [article for article in articles if "duplicates" in article]
+    assert lead["link"] == "https://verge.example/openai-gpt5"
+    assert lead["duplicates"] == [{"source": "Techcrunch", "link": "https://techcrunch.example/gpt5"}]
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        rows = dict(connection.execute("SELECT canonical_url, duplicate_of FROM item_signatures").fetchall())
+    assert rows["https://techcrunch.example/gpt5"] == "https://verge.example/openai-gpt5"
+    assert rows["https://wired.example/codex"] is None
+
+
+def test_run_pipeline_drops_folded_copies_from_the_enrichment_stream(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "true")
+    monkeypatch.setenv("LLM_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_BATCH_SIZE", "1")
+    monkeypatch.setenv("LLM_MAX_IN_FLIGHT", "1")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {"id": source_id, "name": source_id.title(), "category": "ai", "url": f"https://{source_id}.example/rss", "priority": priority}
+                    for source_id, priority in (("techcrunch", 60), ("verge", 50))
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    by_source = {item.source_id: item for item in SYNDICATED[:2]}
+    enricher = RecordingEnricher()
+    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config, endpoints: enricher)
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [by_source[source["id"]]])
+    # The model is busy with the first item until folding is over, so the
+    # second is still waiting in the stream when it is folded away.
+    def release_after_folding(*args: object) -> list[int]:
+        enricher.release.set()
+        return enrichment_priority(*args)
+
+    monkeypatch.setattr("my_ai_news.pipeline.enrichment_priority", release_after_folding)
+
+    result = run_pipeline(tmp_path)
+
+    assert result["stories"] == 1
+    assert enricher.batches == [["OpenAI launches GPT-5 with improved reasoning"]]
+
+
+def test_collapse_near_duplicates_prefers_the_item_seen_in_an_earlier_run() -> None:
+    index = MinHashIndex(threshold=0.6)
+    collapse_near_duplicates(SYNDICATED[:1], index)
+    index.first_seen["https://techcrunch.example/gpt5"] = "2026-04-14T00:00:00Z"
+
+    survivors, _ = collapse_near_duplicates(SYNDICATED, index, rank=lambda item: (item.source_id != "verge",))
+
+    assert survivors[0].canonical_url == "https://techcrunch.example/gpt5"
+    assert survivors[0].duplicate_sources[0]["source_id"] == "verge"
+
+
+def test_collapse_near_duplicates_folds_late_copies_into_an_earlier_runs_survivor() -> None:
+    index = MinHashIndex(threshold=0.6)
+    collapse_near_duplicates(SYNDICATED[:1], index)
+    index.first_seen["https://techcrunch.example/gpt5"] = "2026-04-14T00:00:00Z"
+
+    survivors, folded = collapse_near_duplicates(SYNDICATED[1:], index)
+
+    assert [item.canonical_url for item in survivors] == ["https://wired.example/codex"]
+    assert [item.source_id for item in folded["https://techcrunch.example/gpt5"]] == ["verge"]
+    assert index.duplicate_of == {"https://verge.example/openai-gpt5": "https://techcrunch.example/gpt5"}
+
+    # The folded copy keeps resolving to the same story while it stays in its feed.
+    _, folded = collapse_near_duplicates(SYNDICATED[1:2], index)
+    assert list(folded) == ["https://techcrunch.example/gpt5"]
+
+
+def test_run_pipeline_folds_a_syndicated_copy_from_a_later_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {"id": source_id, "name": source_id.title(), "category": "ai", "url": f"https://{source_id}.example/rss", "priority": 50}
+                    for source_id in ("techcrunch", "verge")
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    feeds = {"techcrunch": [SYNDICATED[0]], "verge": []}
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: feeds[source["id"]])
+
+    run_pipeline(tmp_path)
+    feeds.update(techcrunch=[], verge=[SYNDICATED[1]])
+    second = run_pipeline(tmp_path)
+
+    assert second["near_duplicates"] == 1
+    assert second["stories"] == 0
+    latest = json.loads((tmp_path / "public" / "data" / "latest.json").read_text(encoding="utf-8"))
+    [article] = latest["2026-04-15"]["articles"]
+    assert article["link"] == "https://techcrunch.example/gpt5"
+    assert article["duplicates"] == [{"source": "Verge", "link": "https://verge.example/openai-gpt5"}]
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        assert connection.execute("SELECT COUNT(*), MAX(coverage) FROM stories").fetchone() == (1, 2)
+        rows = dict(connection.execute("SELECT canonical_url, duplicate_of FROM item_signatures").fetchall())
+    assert rows["https://verge.example/openai-gpt5"] == "https://techcrunch.example/gpt5"
+
+
+EVENT_ITEMS = [
+    make_item("reuters", "nvda", "Nvidia reports record quarterly revenue as AI chip demand surges", "Data center sales jumped to $30 billion."),
+    make_item("apple-news", "iphone", "Apple unveils iPhone 17 with thinner design and new A19 chip"),
+    make_item("cnbc", "nvidia-earnings", "Nvidia posts record revenue on surging demand for AI chips", "Data center revenue hits $30 billion."),
+    make_item("36kr", "nvda", "英伟达季度营收创纪录，AI 芯片需求激增", "数据中心收入达 300 亿美元"),
+    make_item("ifanr", "nvda", "英伟达发布财报：AI 芯片需求强劲，季度营收创纪录", "数据中心收入 300 亿美元"),
+    make_item("verge", "iphone-17", "Apple announces iPhone 17 lineup, A19 chip and slimmer design"),
+    make_item("bbc", "floods", "Floods force thousands to evacuate in southern Europe"),
+]
+
+
+def test_similar_pairs_matches_brute_force_cosine() -> None:
+    vectors = tfidf_vectors([terms(f"{item.title} {item.summary}") for item in EVENT_ITEMS])
+    brute_force = {
+        (left, right)
+        for left in range(len(vectors))
+        for right in range(left + 1, len(vectors))
+        if sum(weight * vectors[right].get(term, 0.0) for term, weight in vectors[left].items()) >= 0.4
+    }
+
+    assert {(left, right) for left, right, _ in similar_pairs(vectors, 0.4)} == brute_force
+
+
+def test_cluster_events_keeps_one_lead_per_event_with_related_links() -> None:
+    leads = cluster_events(EVENT_ITEMS, threshold=0.4, rank=lambda item: (item.source_id != "cnbc", item.source_id != "verge"))
+
+    assert [item.canonical_url for item in leads] == [
+        "https://cnbc.example/nvidia-earnings",
+        "https://36kr.example/nvda",
+        "https://verge.example/iphone-17",
+        "https://bbc.example/floods",
+    ]
+    assert [entry["source_id"] for entry in leads[0].related_items] == ["reuters"]
+    assert [entry["source_id"] for entry in leads[1].related_items] == ["ifanr"]
+    assert leads[2].related_items[0]["title"] == "Apple unveils iPhone 17 with thinner design and new A19 chip"
+    assert leads[3].related_items == []
+
+
+def test_event_coverage_boosts_score_and_is_published() -> None:
+    [lead, *_] = cluster_events(EVENT_ITEMS[:3], threshold=0.4)
+    lead.duplicate_sources = [{"source_id": "ap", "source_name": "AP", "url": "https://ap.example/nvda"}]
+
+    story = to_story(lead, 50, NoopEnricher())
+
+    assert score_item(lead, 50) == score_item(EVENT_ITEMS[0], 50) + 10
+    assert story.coverage == 3
+    [article] = build_archive([story])["2026-04-15"]["articles"]
+    assert article["coverage"] == 3
+    assert article["related"] == [
+        {"source": "Cnbc", "title": "Nvidia posts record revenue on surging demand for AI chips", "link": "https://cnbc.example/nvidia-earnings"}
+    ]
+
+
+def make_story(source_id: str, title: str, score: int, *, category: str = "人工智能", published_at: str = "2026-04-15T12:00:00Z") -> Story:
+    return Story(
+        source_id=source_id,
+        source_name=source_id.title(),
+        category=category,
+        tags=[],
+        title=title,
+        url=f"https://{source_id}.example/{title}",
+        summary="",
+        commentary="",
+        image_url="",
+        score=score,
+        published_at=published_at,
+        story_date=published_at[:10],
+    )
+
+
+NOW = datetime(2026, 4, 15, 12, tzinfo=UTC)
+
+
+def test_ranking_scores_decay_with_age_and_penalise_repeat_sources() -> None:
+    stories = [
+        make_story("a", "fresh", 80),
+        make_story("b", "day-old", 80, published_at="Tue, 14 Apr 2026 12:00:00 GMT"),
+        make_story("a", "second", 80, published_at="2026-04-15T12:00:00+00:00"),
+    ]
+
+    scores = ranking_scores(stories, now=NOW, half_life_hours=24, source_penalty=0.5)
+
+    assert scores == pytest.approx([80.0, 40.0, 40.0])
+
+
+def test_rank_stories_applies_category_and_day_quotas() -> None:
+    stories = [
+        *(make_story(f"ai{index}", f"ai-{index}", 90 - index) for index in range(5)),
+        *(make_story(f"game{index}", f"game-{index}", 70 - index, category="游戏影视") for index in range(3)),
+        make_story("old", "yesterday", 99, published_at="2026-04-14T12:00:00Z"),
+    ]
+
+    ranked = rank_stories(stories, now=NOW, half_life_hours=0, day_limit=4, category_limit=3)
+
+    assert [story.title for story in ranked] == ["ai-0", "ai-1", "ai-2", "game-0", "yesterday"]
+
+
+class RecordingEnricher(NoopEnricher):
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.release = threading.Event()
+
+    def enrich_many(self, items: list[dict]) -> list[EnrichmentResult]:
+        self.release.wait(timeout=5)
+        self.batches.append([item["title"] for item in items])
+        return [self.enrich(**item) for item in items]
+
+
+def test_enrichment_stream_takes_best_ranked_items_first() -> None:
+    enricher = RecordingEnricher()
+    finished: list[str] = []
+    stream = EnrichmentStream(enricher, on_result=lambda item, outcome: finished.append(item.title), chunk_size=2)
+
+    with stream:
+        stream.put([((3,), make_item("a", "low", "Low")), ((1,), make_item("b", "high", "High"))])
+        stream.put([((2,), make_item("c", "mid", "Mid"))])
+        enricher.release.set()
+
+    assert sorted(finished) == ["High", "Low", "Mid"]
+    # The worker may grab the first batch before the second arrives; either
+    # way each chunk is taken best rank first.
+    assert enricher.batches in ([["High", "Low"], ["Mid"]], [["High", "Mid"], ["Low"]])
+
+
+def test_iter_stories_yields_unique_stories_without_storing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    sources = [
+        {"id": source_id, "name": source_id.title(), "category": "ai", "url": f"https://{source_id}.example/rss"}
+        for source_id in ("techcrunch", "verge", "wired")
+    ]
+    by_source = {item.source_id: item for item in SYNDICATED}
+    repost = make_item("wired", "gpt5", SYNDICATED[0].title)
+    repost.canonical_url = SYNDICATED[0].canonical_url
+    monkeypatch.setattr(
+        "my_ai_news.streaming.fetch_source",
+        lambda source: [by_source[source["id"]], *([repost] if source["id"] == "wired" else [])],
+    )
+
+    stories = list(iter_stories(load_config(tmp_path), sources, buffer_size=1))
+
+    assert sorted(story.url for story in stories) == sorted(item.url for item in SYNDICATED)
+    assert all(story.enriched is False for story in stories)
+    assert not (tmp_path / "data" / "app.db").exists()
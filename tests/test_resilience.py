@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+import time
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
 from types import SimpleNamespace
 from pathlib import Path
 
@@ -9,11 +13,13 @@ import pytest
 from my_ai_news.ai import AIEnricher, EnrichmentResult, NoopEnricher
 from my_ai_news.cli import format_run_summary
 from my_ai_news.config import load_sources
-from my_ai_news.fetchers import fetch_source
-from my_ai_news.models import RawItem
+from my_ai_news.fetchers import SourceFetchError, fetch_source
+from my_ai_news.llm_limits import current_llm_limiter
+from my_ai_news.models import RawItem, utc_now_iso
 from my_ai_news.pipeline import run_pipeline
 from my_ai_news.processing import to_story
 from my_ai_news.publish import publish
+from my_ai_news.transport import HttpResponse
 from my_ai_news.x_digest import build_account_feed_urls, run_x_digest
 
 
@@ -22,23 +28,8 @@ class FailingEnricher(AIEnricher):
         raise TimeoutError("LLM timed out")
 
 
-@pytest.fixture
-def sample_item() -> RawItem:
-    return RawItem(
-        source_id="primary-source",
-        source_name="Primary Source",
-        category="ai",
-        title="Test title",
-        url="https://example.com/story",
-        canonical_url="https://example.com/story",
-        summary="<p>Story summary</p>",
-        image_url="",
-        published_at="2026-04-15T00:00:00Z",
-        published_date="2026-04-15",
-        fetched_at="2026-04-15T00:00:00Z",
-        fingerprint="abc123",
-        payload_json="{}",
-    )
+def fake_feed_download(url: str, **kwargs: object) -> HttpResponse:
+    return HttpResponse(url=url, status=200, headers={}, body=b"<rss></rss>")
 
 
 def test_load_sources_preserves_primary_and_backup_urls(tmp_path: Path) -> None:
@@ -149,7 +140,7 @@ def test_run_pipeline_degrades_llm_and_writes_source_health(tmp_path: Path, monk
         encoding="utf-8",
     )
 
-    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config: FailingEnricher())
+    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config, endpoints: FailingEnricher())
     monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [sample_item])
 
     result = run_pipeline(project_root)
@@ -203,17 +194,25 @@ def test_fetch_source_supports_html_article_lists(monkeypatch: pytest.MonkeyPatc
     </article>
     """
 
-    class FakeResponse:
-        def __enter__(self) -> "FakeResponse":
+    class FakeStream:
+        status = 200
+        headers: dict[str, str] = {}
+
+        def __init__(self, url: str):
+            self.url = url
+
+        def __enter__(self) -> "FakeStream":
             return self
 
         def __exit__(self, *args: object) -> None:
             return None
 
-        def read(self) -> bytes:
-            return html.encode("utf-8")
+        def iter_chunks(self, chunk_size: int):
+            body = html.encode("utf-8")
+            for start in range(0, len(body), 7):
+                yield body[start:start + 7]
 
-    monkeypatch.setattr("my_ai_news.fetchers.urlopen", lambda request, timeout: FakeResponse())
+    monkeypatch.setattr("my_ai_news.fetchers.stream_url", lambda url, **kwargs: FakeStream(url))
 
     result = fetch_source(
         {
@@ -247,7 +246,8 @@ def test_x_digest_fetches_posts_from_configured_rss(monkeypatch: pytest.MonkeyPa
         feed={"image": {"href": "https://pbs.twimg.com/profile_images/example.jpg"}},
         entries=[entry],
     )
-    monkeypatch.setattr("my_ai_news.x_digest.feedparser.parse", lambda url: feed)
+    monkeypatch.setattr("my_ai_news.fetchers.fetch_url", fake_feed_download)
+    monkeypatch.setattr("my_ai_news.fetchers.feedparser.parse", lambda body, **kwargs: feed)
 
     config = SimpleNamespace(
         llm_enabled=False,
@@ -313,7 +313,8 @@ def test_x_digest_reports_unconfigured_accounts(tmp_path: Path) -> None:
 
 
 def test_x_digest_preserves_previous_items_when_feeds_return_empty(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
-    monkeypatch.setattr("my_ai_news.x_digest.feedparser.parse", lambda url: SimpleNamespace(feed={}, entries=[]))
+    monkeypatch.setattr("my_ai_news.fetchers.fetch_url", fake_feed_download)
+    monkeypatch.setattr("my_ai_news.fetchers.feedparser.parse", lambda body, **kwargs: SimpleNamespace(feed={}, entries=[]))
 
     config = SimpleNamespace(
         llm_enabled=False,
@@ -363,7 +364,8 @@ def test_x_digest_flags_likely_unavailable_native_media(monkeypatch: pytest.Monk
         published="Fri, 15 May 2026 08:00:00 GMT",
         published_parsed=None,
     )
-    monkeypatch.setattr("my_ai_news.x_digest.feedparser.parse", lambda url: SimpleNamespace(feed={}, entries=[entry]))
+    monkeypatch.setattr("my_ai_news.fetchers.fetch_url", fake_feed_download)
+    monkeypatch.setattr("my_ai_news.fetchers.feedparser.parse", lambda body, **kwargs: SimpleNamespace(feed={}, entries=[entry]))
 
     config = SimpleNamespace(
         llm_enabled=False,
@@ -406,3 +408,349 @@ def test_format_run_summary_includes_llm_and_backup_context() -> None:
     assert "source_failed: Broken" in summary
     assert "source_degraded: Primary" in summary
     assert "source_health_path: public/data/source-health.json" in summary
+
+
+def test_run_pipeline_opens_circuit_after_consecutive_failures(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    (tmp_path / ".env").write_text("LLM_ENABLED=false\nCIRCUIT_FAILURE_THRESHOLD=2\n", encoding="utf-8")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "broken", "name": "Broken", "category": "ai", "url": "https://broken.example/rss"}]}),
+        encoding="utf-8",
+    )
+    calls: list[str] = []
+
+    def failing_fetch(source: dict) -> None:
+        calls.append(source["id"])
+        raise SourceFetchError("timeout", "timed out", [source["url"]], [])
+
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", failing_fetch)
+
+    run_pipeline(tmp_path)
+    second = run_pipeline(tmp_path)
+    third = run_pipeline(tmp_path)
+
+    assert calls == ["broken", "broken"]
+    assert second["source_statuses"][0]["circuit"]["state"] == "open"
+    [skipped] = third["source_statuses"]
+    assert skipped["status"] == "circuit_open"
+    assert skipped["circuit"]["consecutive_failures"] == 2
+    assert skipped["circuit"]["next_probe_at"]
+
+    health_payload = json.loads((tmp_path / "public" / "data" / "source-health.json").read_text(encoding="utf-8"))
+    assert health_payload["summary"]["circuit_open_sources"] == 1
+    assert health_payload["sources"][0]["circuit"]["state"] == "open"
+
+
+def test_circuit_backoff_keeps_doubling_across_many_scheduled_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    monkeypatch.setenv("CIRCUIT_FAILURE_THRESHOLD", "3")
+    monkeypatch.setenv("CIRCUIT_BASE_DELAY_HOURS", "12")
+    monkeypatch.setenv("CIRCUIT_MAX_DELAY_HOURS", "96")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "broken", "name": "Broken", "category": "ai", "url": "https://broken.example/rss"}]}),
+        encoding="utf-8",
+    )
+    clock = [datetime(2026, 5, 1, tzinfo=UTC)]
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock[0]
+
+    monkeypatch.setattr("my_ai_news.health.datetime", FakeDatetime)
+    monkeypatch.setattr("my_ai_news.pipeline.utc_now_iso", lambda: clock[0].isoformat().replace("+00:00", "Z"))
+    probed_runs: list[int] = []
+
+    def failing_fetch(source: dict) -> None:
+        probed_runs.append(run)
+        raise SourceFetchError("timeout", "timed out", [source["url"]], [])
+
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", failing_fetch)
+
+    # Every 6 hours, like the scheduled workflow, for 15 days.
+    for run in range(60):
+        result = run_pipeline(tmp_path)
+        clock[0] += timedelta(hours=6)
+
+    # Open after 3 failures, then probes 12h, 24h, 48h, 96h and 96h apart.
+    assert probed_runs == [0, 1, 2, 4, 8, 16, 32, 48]
+    circuit = result["source_statuses"][0]["circuit"]
+    assert circuit["consecutive_failures"] == 8
+    assert circuit["next_probe_at"] == "2026-05-17T00:00:00Z"
+
+
+class CountingEnricher(AIEnricher):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def enrich(self, *, category: str, source_name: str, title: str, summary: str, url: str) -> EnrichmentResult:
+        self.calls += 1
+        return EnrichmentResult(title="模型标题", summary="模型摘要", commentary="模型短评", tags=["AI"], score_delta=3)
+
+
+def test_run_pipeline_reuses_cached_enrichment_across_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    (tmp_path / ".env").write_text("LLM_ENABLED=true\nLLM_API_KEY=test-key\nLLM_MODEL=test-model\n", encoding="utf-8")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "primary-source", "name": "Primary Source", "category": "ai", "type": "rss", "url": "https://primary.example/rss"}]}),
+        encoding="utf-8",
+    )
+    enricher = CountingEnricher()
+    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config, endpoints: enricher)
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [sample_item])
+
+    first = run_pipeline(tmp_path)
+    second = run_pipeline(tmp_path)
+    cleared = run_pipeline(tmp_path, clear_llm_cache=True)
+
+    assert enricher.calls == 2
+    assert first["llm"]["cache"]["misses"] == 1
+    assert second["llm"]["cache"]["hits"] == 1
+    assert second["llm"]["cache"]["misses"] == 0
+    assert cleared["llm"]["cache"]["misses"] == 1
+    latest = json.loads((tmp_path / "public" / "data" / "latest.json").read_text(encoding="utf-8"))
+    assert latest["2026-04-15"]["articles"][0]["title"] == "模型标题"
+
+
+def test_run_pipeline_shares_one_endpoint_pool_between_enrichment_and_translation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem
+) -> None:
+    (tmp_path / "config").mkdir()
+    for name, value in {"LLM_ENABLED": "true", "LLM_API_KEY": "test-key", "LLM_BASE_URL": "https://llm.example/v1", "LLM_BASE_URLS": ""}.items():
+        monkeypatch.setenv(name, value)
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "primary-source", "name": "Primary Source", "category": "ai", "url": "https://primary.example/rss"}]}),
+        encoding="utf-8",
+    )
+    (tmp_path / "config" / "x_accounts.json").write_text(
+        json.dumps({"accounts": [{"id": "example", "handle": "example", "name": "Example", "rss_url": "https://rss.example/user/example"}]}),
+        encoding="utf-8",
+    )
+    post = SimpleNamespace(title="", summary="Agents ship.", link="https://x.com/example/status/1", published="Fri, 15 May 2026 08:00:00 GMT", links=[])
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [sample_item])
+    monkeypatch.setattr("my_ai_news.fetchers.fetch_url", fake_feed_download)
+    monkeypatch.setattr("my_ai_news.fetchers.feedparser.parse", lambda body, **kwargs: SimpleNamespace(feed={}, entries=[post]))
+    clients: list[object] = []
+
+    def create(*, messages: list[dict], **request: object) -> SimpleNamespace:
+        if "zh_text" in messages[-1]["content"]:
+            content = json.dumps({"zh_text": "智能体上线。"}, ensure_ascii=False)
+        else:
+            content = json.dumps({"title": "模型标题", "summary": "模型摘要", "commentary": "模型短评", "tags": ["AI"]}, ensure_ascii=False)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def fake_openai(**kwargs: object) -> SimpleNamespace:
+        clients.append(kwargs)
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    monkeypatch.setattr("my_ai_news.llm_endpoints.OpenAI", fake_openai)
+
+    result = run_pipeline(tmp_path)
+
+    assert len(clients) == 1
+    assert [endpoint["requests"] for endpoint in result["llm"]["endpoints"]] == [2]
+    digest = json.loads((tmp_path / "public" / "data" / "x-digest.json").read_text(encoding="utf-8"))
+    assert digest["items"][0]["zh_text"] == "智能体上线。"
+
+
+class BudgetedEnricher(AIEnricher):
+    def __init__(self) -> None:
+        self.titles: list[str] = []
+
+    def enrich(self, *, category: str, source_name: str, title: str, summary: str, url: str) -> EnrichmentResult:
+        def request() -> EnrichmentResult:
+            self.titles.append(title)
+            return EnrichmentResult(title=f"模型：{title}", summary="模型摘要", commentary="模型短评", tags=["AI"])
+
+        return current_llm_limiter().call(request, tokens=100)
+
+
+def test_run_pipeline_defers_items_past_the_token_budget_to_the_next_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    (tmp_path / ".env").write_text("LLM_ENABLED=true\nLLM_API_KEY=test-key\nLLM_MODEL=test-model\n", encoding="utf-8")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "primary-source", "name": "Primary Source", "category": "ai", "type": "rss", "url": "https://primary.example/rss"}]}),
+        encoding="utf-8",
+    )
+    low = replace(sample_item, title="Low priority", summary="", url="https://example.com/low", canonical_url="https://example.com/low", fingerprint="low")
+    high = replace(sample_item, title="High priority", image_url="https://example.com/a.png", url="https://example.com/high", canonical_url="https://example.com/high", fingerprint="high")
+    enricher = BudgetedEnricher()
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "100")
+    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config, endpoints: enricher)
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [low, high])
+
+    first = run_pipeline(tmp_path)
+    second = run_pipeline(tmp_path)
+
+    assert enricher.titles == ["High priority", "Low priority"]
+    assert first["llm"]["deferred_items"] == 1
+    assert first["llm"]["status"] == "degraded"
+    assert second["llm"]["deferred_items"] == 0
+    assert second["llm"]["cache"]["hits"] == 1
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        assert connection.execute("SELECT SUM(pending_enrichment) FROM raw_items").fetchone()[0] == 0
+
+
+def test_run_pipeline_enriches_deferred_items_that_left_the_feed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    (tmp_path / ".env").write_text("LLM_ENABLED=true\nLLM_API_KEY=test-key\nLLM_MODEL=test-model\n", encoding="utf-8")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "primary-source", "name": "Primary Source", "category": "ai", "type": "rss", "url": "https://primary.example/rss"}]}),
+        encoding="utf-8",
+    )
+    fresh = replace(sample_item, fetched_at=utc_now_iso())
+    low = replace(fresh, title="Low priority", summary="", url="https://example.com/low", canonical_url="https://example.com/low", fingerprint="low")
+    high = replace(fresh, title="High priority", image_url="https://example.com/a.png", url="https://example.com/high", canonical_url="https://example.com/high", fingerprint="high")
+    stale = replace(sample_item, title="Stale", url="https://example.com/stale", canonical_url="https://example.com/stale", fingerprint="stale")
+    newer = replace(fresh, title="Newer", url="https://example.com/newer", canonical_url="https://example.com/newer", fingerprint="newer")
+    feed = [low, high, stale]
+    enricher = BudgetedEnricher()
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "100")
+    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config, endpoints: enricher)
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: list(feed))
+
+    run_pipeline(tmp_path)
+    feed[:] = [newer]
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "0")
+    second = run_pipeline(tmp_path)
+
+    assert sorted(enricher.titles) == ["High priority", "Low priority", "Newer"]
+    assert second["llm"]["deferred_items"] == 0
+    daily = json.loads((tmp_path / "public" / "data" / "daily" / "2026-04-15.json").read_text(encoding="utf-8"))
+    titles = {article["link"]: article["title"] for article in daily["2026-04-15"]["articles"]}
+    assert titles["https://example.com/low"] == "模型：Low priority"
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        pending = connection.execute("SELECT title FROM raw_items WHERE pending_enrichment = 1").fetchall()
+    # Low was enriched; Stale was first fetched too long ago to be retried.
+    assert pending == []
+
+
+def test_run_pipeline_publishes_fallback_stories_before_enrichment(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    (tmp_path / ".env").write_text("LLM_ENABLED=true\nLLM_API_KEY=test-key\nLLM_MODEL=test-model\n", encoding="utf-8")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "primary-source", "name": "Primary Source", "category": "ai", "type": "rss", "url": "https://primary.example/rss"}]}),
+        encoding="utf-8",
+    )
+    latest_path = tmp_path / "public" / "data" / "latest.json"
+    seen_during_enrichment: list[dict] = []
+
+    class InspectingEnricher(CountingEnricher):
+        def enrich(self, **kwargs: str) -> EnrichmentResult:
+            # Enrichment starts while sources are still being fetched; hold the
+            # model call until the fallback stories are out.
+            deadline = time.monotonic() + 5
+            while not latest_path.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            seen_during_enrichment.append(json.loads(latest_path.read_text(encoding="utf-8")))
+            return super().enrich(**kwargs)
+
+    monkeypatch.setattr("my_ai_news.pipeline.build_enricher", lambda config, endpoints: InspectingEnricher())
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [sample_item])
+
+    run_pipeline(tmp_path)
+
+    [preview] = seen_during_enrichment
+    [preview_article] = preview["2026-04-15"]["articles"]
+    assert preview_article["enriched"] is False
+    assert preview_article["title"] == NoopEnricher().enrich(
+        category="人工智能", source_name="Primary Source", title="Test title", summary="Story summary", url=sample_item.url
+    ).title
+
+    final = json.loads(latest_path.read_text(encoding="utf-8"))
+    [final_article] = final["2026-04-15"]["articles"]
+    assert final_article["enriched"] is True
+    assert final_article["title"] == "模型标题"
+    daily = json.loads((tmp_path / "public" / "data" / "daily" / "2026-04-15.json").read_text(encoding="utf-8"))
+    assert daily["2026-04-15"]["articles"][0]["enriched"] is True
+
+
+def test_run_pipeline_groups_writes_into_a_few_wal_transactions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {"id": f"source-{index}", "name": f"Source {index}", "category": "ai", "type": "rss", "url": f"https://source-{index}.example/rss"}
+                    for index in range(30)
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(
+        "my_ai_news.pipeline.fetch_source",
+        lambda source: [replace(sample_item, source_id=source["id"], url=f"{sample_item.url}/{source['id']}", canonical_url=f"{sample_item.canonical_url}/{source['id']}")],
+    )
+
+    run_pipeline(tmp_path)
+    result = run_pipeline(tmp_path)  # the first run also applies the schema migrations
+
+    assert result["database_stats"]["commits"] <= 5
+    assert "database: " in format_run_summary(result)
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert connection.execute("SELECT COUNT(*) FROM source_runs").fetchone()[0] == 60
+
+
+def test_run_pipeline_does_not_hold_the_write_lock_while_fetching(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {"id": f"source-{index}", "name": f"Source {index}", "category": "ai", "type": "rss", "url": f"https://source-{index}.example/rss"}
+                    for index in range(3)
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    writers: list[str] = []
+
+    def fetch(source: dict) -> list[RawItem]:
+        # Another writer (say --compact-db) gets the lock straight away.
+        with sqlite3.connect(tmp_path / "data" / "app.db", timeout=0) as other:
+            other.execute("BEGIN IMMEDIATE")
+            other.rollback()
+        writers.append(source["id"])
+        return [replace(sample_item, source_id=source["id"], url=f"{sample_item.url}/{source['id']}", canonical_url=f"{sample_item.canonical_url}/{source['id']}")]
+
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", fetch)
+
+    result = run_pipeline(tmp_path)
+
+    assert result["status"] == "success"
+    assert sorted(writers) == ["source-0", "source-1", "source-2"]
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        assert connection.execute("SELECT COUNT(*) FROM raw_items").fetchone()[0] == 3
+
+
+def test_run_pipeline_records_a_failed_run_with_its_source_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sample_item: RawItem) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "primary-source", "name": "Primary Source", "category": "ai", "type": "rss", "url": "https://primary.example/rss"}]}),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [sample_item])
+
+    def broken_publish(*args: object, **kwargs: object) -> dict:
+        raise OSError("disk full")
+
+    monkeypatch.setattr("my_ai_news.pipeline.publish", broken_publish)
+
+    with pytest.raises(OSError):
+        run_pipeline(tmp_path)
+
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        assert connection.execute("SELECT status, error_message FROM runs").fetchone() == ("failed", "disk full")
+        assert connection.execute("SELECT COUNT(*) FROM source_runs").fetchone()[0] == 1
+        assert connection.execute("SELECT COUNT(*) FROM raw_items").fetchone()[0] == 1
+        # Stories are stored before publishing, which rebuilds days from the table.
+        assert connection.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 1
+    status = json.loads((tmp_path / "public" / "data" / "status.json").read_text(encoding="utf-8"))
+    assert status["database_stats"]["commits"] >= 1
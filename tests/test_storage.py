@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sqlite3
+import stat
+from dataclasses import asdict, replace
+from pathlib import Path
+
+import pytest
+
+from my_ai_news.db import MIGRATIONS, SCHEMA, connect, init_db, schema_version
+from my_ai_news.health import load_source_history
+from my_ai_news.models import RawItem, Story
+from my_ai_news.pipeline import (
+    compact_stories,
+    insert_run,
+    load_source_raw_items,
+    load_stories_for_dates,
+    run_pipeline,
+    store_raw_items,
+    store_stories,
+)
+from my_ai_news.publish import clean_invalid_daily_files, content_hash, publish, write_atomic
+from my_ai_news.queries import source_history, stories_between, top_stories_by_category
+from my_ai_news.x_digest import XPost
+
+
+def seeded_connection(tmp_path: Path) -> sqlite3.Connection:
+    connection = connect(tmp_path / "app.db")
+    init_db(connection)
+    connection.execute("INSERT INTO runs (started_at, status) VALUES ('2026-04-15T00:00:00Z', 'success')")
+    connection.executemany(
+        """
+        INSERT INTO stories (run_id, source_id, source_name, category, title, url, score, story_date)
+        VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (f"source-{index % 3}", f"Source {index % 3}", category, f"{category}-{day}-{index}", f"https://example.com/{category}/{day}/{index}", index, f"2026-04-{day:02d}")
+            for day in (13, 14, 15)
+            for category in ("ai", "games")
+            for index in range(5)
+        ],
+    )
+    connection.executemany(
+        "INSERT INTO source_runs (run_id, source_id, source_name, status, created_at) VALUES (1, ?, ?, 'success', ?)",
+        [(f"source-{index % 2}", f"Source {index % 2}", f"2026-04-15T00:{index:02d}:00Z") for index in range(10)],
+    )
+    connection.commit()
+    return connection
+
+
+def test_init_db_applies_migrations_once(tmp_path: Path) -> None:
+    connection = seeded_connection(tmp_path)
+    init_db(connection)
+
+    assert schema_version(connection) == len(MIGRATIONS)
+    plan = " ".join(row[3] for row in connection.execute("EXPLAIN QUERY PLAN SELECT * FROM raw_items WHERE fingerprint = 'x'"))
+    assert "idx_raw_items_fingerprint" in plan
+
+
+def test_stories_between_pages_through_the_range_in_order(tmp_path: Path) -> None:
+    connection = seeded_connection(tmp_path)
+
+    rows, cursor = [], None
+    while True:
+        page = stories_between(connection, "2026-04-14", "2026-04-15", limit=7, cursor=cursor)
+        rows.extend(page.rows)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert len(rows) == 20
+    assert [(row["story_date"], row["score"]) for row in rows] == sorted(
+        ((row["story_date"], row["score"]) for row in rows), reverse=True
+    )
+    assert len({row["id"] for row in rows}) == 20
+
+
+def test_top_stories_by_category_and_source_history(tmp_path: Path) -> None:
+    connection = seeded_connection(tmp_path)
+
+    top = top_stories_by_category(connection, "2026-04-15", limit=2)
+    first = source_history(connection, "source-1", limit=3)
+    second = source_history(connection, "source-1", limit=3, cursor=first.next_cursor)
+
+    assert {category: [row["score"] for row in rows] for category, rows in top.items()} == {"ai": [4, 3], "games": [4, 3]}
+    assert [row["created_at"][14:16] for row in first.rows + second.rows] == ["09", "07", "05", "03", "01"]
+    assert second.next_cursor is None
+    assert [row["status"] for row in load_source_history(connection, ["source-1", "missing"], window=2)["source-1"]] == ["success"] * 2
+
+
+SAMPLE_STORY = Story(
+    source_id="verge",
+    source_name="Verge",
+    category="人工智能",
+    tags=["AI", "OpenAI"],
+    title="GPT-5",
+    url="https://verge.example/gpt5",
+    summary="Summary",
+    commentary="Commentary",
+    image_url="",
+    score=70,
+    published_at="2026-04-15T08:00:00Z",
+    story_date="2026-04-15",
+    enriched=True,
+    duplicates=[{"source_id": "techcrunch", "source_name": "Techcrunch", "url": "https://techcrunch.example/gpt5"}],
+    related=[{"source_id": "wired", "source_name": "Wired", "title": "Codex", "url": "https://wired.example/codex"}],
+    coverage=3,
+    story_key="https://verge.example/gpt5",
+)
+
+
+def test_raw_item_to_dict_serialises_a_feed_entry_payload(sample_item: RawItem) -> None:
+    item = replace(sample_item, payload_json={"title": "Test title", "tags": [{"term": "AI"}]})
+
+    values = item.to_dict()
+
+    assert values["payload_json"] == '{"title": "Test title", "tags": [{"term": "AI"}]}'
+    assert {key: value for key, value in values.items() if key != "payload_json"} == {
+        key: value for key, value in asdict(item).items() if key != "payload_json"
+    }
+
+
+def test_story_and_x_post_to_dict_match_asdict() -> None:
+    post = XPost(
+        account_id="openai",
+        handle="OpenAI",
+        author_name="OpenAI",
+        role="lab",
+        avatar_url="https://example.com/avatar.png",
+        original_text="We are launching GPT-5.",
+        zh_text="我们发布了 GPT-5。",
+        commentary="",
+        media_urls=["https://example.com/a.png"],
+        image_urls=["https://example.com/a.png"],
+        video_urls=[],
+        media_note="",
+        url="https://x.com/OpenAI/status/1",
+        canonical_url="https://x.com/OpenAI/status/1",
+        published_at="2026-04-15T08:00:00Z",
+        published_date="2026-04-15",
+        kind="post",
+        score=80,
+    )
+
+    assert SAMPLE_STORY.to_dict() == asdict(SAMPLE_STORY)
+    assert list(SAMPLE_STORY.to_dict()) == list(asdict(SAMPLE_STORY))
+    assert post.to_dict() == asdict(post)
+    assert list(post.to_dict()) == list(asdict(post))
+
+
+def test_slotted_items_and_stories_survive_a_store_and_load_round_trip(tmp_path: Path, sample_item: RawItem) -> None:
+    connection = connect(tmp_path / "app.db")
+    init_db(connection)
+    run_id = insert_run(connection, 1)
+    item = replace(sample_item, payload_json={"title": "Test title"})
+
+    store_raw_items(connection, [item])
+    store_stories(connection, run_id, [SAMPLE_STORY])
+
+    [loaded_item] = load_source_raw_items(connection, item.source_id)
+    assert loaded_item == replace(item, payload_json='{"title": "Test title"}', is_new=False)
+    assert load_stories_for_dates(connection, {"2026-04-15"}) == [SAMPLE_STORY]
+
+
+def story_row(run_id: int, url: str, score: int) -> tuple:
+    return (run_id, "verge", "Verge", "ai", "GPT-5", url, score, "2026-04-15")
+
+
+def test_init_db_folds_per_run_copies_and_makes_story_keys_unique(tmp_path: Path) -> None:
+    connection = connect(tmp_path / "app.db")
+    connection.executescript(SCHEMA)
+    connection.executemany("INSERT INTO runs (started_at, status) VALUES ('2026-04-15T00:00:00Z', 'success')", [()] * 3)
+    connection.executemany(
+        "INSERT INTO stories (run_id, source_id, source_name, category, title, url, score, story_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            story_row(1, "https://verge.example/gpt5?utm_source=rss", 60),
+            story_row(2, "https://verge.example/gpt5", 70),
+            story_row(3, "https://verge.example/gpt5", 80),
+            story_row(3, "https://verge.example/other", 50),
+        ],
+    )
+    connection.commit()
+    init_db(connection)
+
+    rows = connection.execute("SELECT story_key, run_id, first_seen_run, last_seen_run, score FROM stories ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("https://verge.example/gpt5", 1, 1, 3, 80),
+        ("https://verge.example/other", 3, 3, 3, 50),
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute(
+            "INSERT INTO stories (run_id, source_id, source_name, category, title, url, score, story_date, story_key) "
+            "VALUES (3, 'verge', 'Verge', 'ai', 'GPT-5', 'https://verge.example/gpt5', 1, '2026-04-15', 'https://verge.example/gpt5')"
+        )
+    assert compact_stories(connection)["folded"] == 0
+
+
+def test_init_db_folds_copies_left_by_the_old_upsert(tmp_path: Path) -> None:
+    connection = connect(tmp_path / "app.db")
+    connection.executescript(SCHEMA)
+    connection.commit()
+    # Stop before the step that makes story keys unique, as a database
+    # written by the select-then-insert upsert would be.
+    for statements in MIGRATIONS[:3]:
+        for statement in statements:
+            connection.execute(statement)
+    connection.execute("PRAGMA user_version = 3")
+    connection.executemany("INSERT INTO runs (started_at, status) VALUES ('2026-04-15T00:00:00Z', 'success')", [()] * 2)
+    connection.executemany(
+        "INSERT INTO stories (run_id, source_id, source_name, category, title, url, score, story_date, story_key, first_seen_run, last_seen_run) "
+        "VALUES (?, 'verge', 'Verge', 'ai', 'GPT-5', 'https://verge.example/gpt5', ?, '2026-04-15', 'https://verge.example/gpt5', ?, ?)",
+        [(1, 60, 1, 1), (2, 70, 2, 2)],
+    )
+    connection.commit()
+
+    init_db(connection)
+    store_stories(connection, 2, [replace(SAMPLE_STORY, url="https://verge.example/gpt5", story_key="https://verge.example/gpt5", score=90)])
+
+    rows = connection.execute("SELECT first_seen_run, last_seen_run, score FROM stories").fetchall()
+    assert [tuple(row) for row in rows] == [(1, 2, 90)]
+
+
+def test_run_pipeline_upserts_stories_seen_again(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "verge", "name": "Verge", "category": "ai", "url": "https://verge.example/rss"}]}),
+        encoding="utf-8",
+    )
+    item = RawItem(
+        source_id="verge",
+        source_name="Verge",
+        category="ai",
+        title="OpenAI launches GPT-5",
+        url="https://verge.example/gpt5?utm_source=rss",
+        canonical_url="https://verge.example/gpt5",
+        summary="",
+        image_url="",
+        published_at="2026-04-15T00:00:00Z",
+        published_date="2026-04-15",
+        fetched_at="2026-04-15T00:00:00Z",
+        fingerprint="gpt5",
+        payload_json="{}",
+    )
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: [item])
+
+    run_pipeline(tmp_path)
+    second = run_pipeline(tmp_path)
+
+    with sqlite3.connect(tmp_path / "data" / "app.db") as connection:
+        rows = connection.execute("SELECT story_key, run_id, first_seen_run, last_seen_run FROM stories").fetchall()
+    assert rows == [("https://verge.example/gpt5", 1, 1, second["run_id"])]
+
+
+def test_run_pipeline_keeps_earlier_articles_and_rewrites_only_changed_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "verge", "name": "Verge", "category": "ai", "url": "https://verge.example/rss"}]}),
+        encoding="utf-8",
+    )
+    feed: list[RawItem] = []
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: list(feed))
+    base = dict(
+        source_id="verge",
+        source_name="Verge",
+        category="ai",
+        summary="",
+        image_url="",
+        published_at="2026-04-15T00:00:00Z",
+        published_date="2026-04-15",
+        fetched_at="2026-04-15T00:00:00Z",
+        payload_json="{}",
+    )
+    feed.append(RawItem(**base, title="OpenAI launches GPT-5", url="https://verge.example/gpt5", canonical_url="https://verge.example/gpt5", fingerprint="gpt5"))
+    run_pipeline(tmp_path)
+    feed[:] = [RawItem(**base, title="Anthropic ships new model", url="https://verge.example/claude", canonical_url="https://verge.example/claude", fingerprint="claude")]
+
+    second = run_pipeline(tmp_path)
+    third = run_pipeline(tmp_path)
+
+    daily = json.loads((tmp_path / "public" / "data" / "daily" / "2026-04-15.json").read_text(encoding="utf-8"))
+    assert sorted(article["link"] for article in daily["2026-04-15"]["articles"]) == ["https://verge.example/claude", "https://verge.example/gpt5"]
+    assert second["published_files"]["written"] == ["daily/2026-04-15.json", "latest.json", "manifest.json"]
+    assert third["published_files"] == {"written": [], "unchanged": ["daily/2026-04-15.json", "latest.json", "manifest.json"]}
+    assert not list((tmp_path / "public" / "data").rglob("*.tmp"))
+
+
+def dated_story(story_date: str, title: str) -> Story:
+    return Story(
+        source_id="verge",
+        source_name="Verge",
+        category="人工智能",
+        tags=["AI"],
+        title=title,
+        url=f"https://verge.example/{story_date}/{title}",
+        summary="",
+        commentary="",
+        image_url="",
+        score=50,
+        published_at=f"{story_date}T08:00:00Z",
+        story_date=story_date,
+    )
+
+
+def test_run_pipeline_with_a_fresh_database_keeps_the_published_articles(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "verge", "name": "Verge", "category": "ai", "url": "https://verge.example/rss"}]}),
+        encoding="utf-8",
+    )
+    feed: list[RawItem] = []
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: list(feed))
+    base = dict(
+        source_id="verge",
+        source_name="Verge",
+        category="ai",
+        summary="",
+        image_url="",
+        published_at="2026-04-15T00:00:00Z",
+        published_date="2026-04-15",
+        fetched_at="2026-04-15T00:00:00Z",
+        payload_json="{}",
+    )
+    gpt5 = RawItem(**base, title="OpenAI launches GPT-5", url="https://verge.example/gpt5", canonical_url="https://verge.example/gpt5", fingerprint="gpt5")
+    claude = RawItem(**base, title="Anthropic ships new model", url="https://verge.example/claude", canonical_url="https://verge.example/claude", fingerprint="claude")
+    codex = RawItem(**base, title="OpenAI ships Codex", url="https://verge.example/codex", canonical_url="https://verge.example/codex", fingerprint="codex")
+    feed[:] = [gpt5, codex]
+    run_pipeline(tmp_path)
+    # Like a CI runner whose database was not restored: only public/data survives.
+    for path in (tmp_path / "data").iterdir():
+        path.unlink()
+    feed[:] = [claude, replace(gpt5, image_url="https://verge.example/gpt5.png")]
+
+    run_pipeline(tmp_path)
+
+    daily = json.loads((tmp_path / "public" / "data" / "daily" / "2026-04-15.json").read_text(encoding="utf-8"))
+    articles = {article["link"]: article for article in daily["2026-04-15"]["articles"]}
+    assert sorted(articles) == ["https://verge.example/claude", "https://verge.example/codex", "https://verge.example/gpt5"]
+    assert articles["https://verge.example/gpt5"]["image"] == "https://verge.example/gpt5.png"
+    manifest = json.loads((tmp_path / "public" / "data" / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["days"][0]["articles"] == 3
+
+
+def test_run_pipeline_ranks_and_caps_a_merged_day(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "config").mkdir()
+    monkeypatch.setenv("LLM_ENABLED", "false")
+    monkeypatch.setenv("RANK_DAY_LIMIT", "2")
+    (tmp_path / "config" / "sources.json").write_text(
+        json.dumps({"sources": [{"id": "verge", "name": "Verge", "category": "ai", "url": "https://verge.example/rss"}]}),
+        encoding="utf-8",
+    )
+    feed: list[RawItem] = []
+    monkeypatch.setattr("my_ai_news.pipeline.fetch_source", lambda source: list(feed))
+    base = dict(
+        source_id="verge",
+        source_name="Verge",
+        category="ai",
+        published_at="2026-04-15T00:00:00Z",
+        published_date="2026-04-15",
+        fetched_at="2026-04-15T00:00:00Z",
+        payload_json="{}",
+    )
+    feed[:] = [
+        RawItem(**base, title="OpenAI launches GPT-5", summary="", image_url="https://verge.example/gpt5.png", url="https://verge.example/gpt5", canonical_url="https://verge.example/gpt5", fingerprint="gpt5"),
+        RawItem(**base, title="OpenAI ships Codex", summary="", image_url="", url="https://verge.example/codex", canonical_url="https://verge.example/codex", fingerprint="codex"),
+    ]
+    run_pipeline(tmp_path)
+    for path in (tmp_path / "data").iterdir():
+        path.unlink()
+    feed[:] = [
+        RawItem(**base, title="Anthropic ships new model", summary="Details", image_url="https://verge.example/claude.png", url="https://verge.example/claude", canonical_url="https://verge.example/claude", fingerprint="claude")
+    ]
+
+    run_pipeline(tmp_path)
+
+    daily = json.loads((tmp_path / "public" / "data" / "daily" / "2026-04-15.json").read_text(encoding="utf-8"))
+    assert [article["link"] for article in daily["2026-04-15"]["articles"]] == ["https://verge.example/claude", "https://verge.example/gpt5"]
+
+
+def test_publish_bounds_latest_and_lists_every_day_in_the_manifest(tmp_path: Path) -> None:
+    days = [f"2026-04-{day:02d}" for day in range(1, 11)]
+    publish([dated_story(day, "launch") for day in days], tmp_path, latest_days=3)
+
+    report = publish([dated_story("2026-04-02", "launch"), dated_story("2026-04-02", "update")], tmp_path, latest_days=3)
+    (tmp_path / "manifest.json").unlink()
+    rebuilt = publish([dated_story("2026-04-02", "launch"), dated_story("2026-04-02", "update")], tmp_path, latest_days=3)
+
+    latest = json.loads((tmp_path / "latest.json").read_text(encoding="utf-8"))
+    manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    assert list(latest) == ["2026-04-10", "2026-04-09", "2026-04-08"]
+    assert manifest["latest"]["days"] == list(latest)
+    assert [entry["date"] for entry in manifest["days"]] == days[::-1]
+    assert manifest["days"][-2] == {
+        "date": "2026-04-02",
+        "week": "周四",
+        "file": "daily/2026-04-02.json",
+        "hash": content_hash((tmp_path / "daily" / "2026-04-02.json").read_bytes()),
+        "articles": 2,
+    }
+    assert report["written"] == ["daily/2026-04-02.json", "manifest.json"]
+    assert rebuilt["written"] == ["manifest.json"]
+
+
+def test_immutable_publish_writes_hashed_compressed_copies_and_prunes_old_ones(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = ["2026-04-02T00:00:00Z"]
+    monkeypatch.setattr("my_ai_news.publish.utc_now_iso", lambda: clock[0])
+    publish([dated_story("2026-04-01", "launch"), dated_story("2026-04-02", "launch")], tmp_path)
+    first = publish([dated_story("2026-04-02", "launch")], tmp_path, immutable=True)
+    old_manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    old_day, old_latest = old_manifest["days"][0]["immutable"], old_manifest["latest"]["immutable"]
+
+    second = publish([dated_story("2026-04-02", "launch"), dated_story("2026-04-02", "update")], tmp_path, immutable=True)
+    clean_invalid_daily_files(tmp_path / "daily")
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    day = manifest["days"][0]
+    assert day["immutable"] == f"daily/2026-04-02.{day['hash']}.json"
+    assert gzip.decompress((tmp_path / (day["immutable"] + ".gz")).read_bytes()) == (tmp_path / day["file"]).read_bytes()
+    assert manifest["days"][1]["immutable"] in first["written"]
+    assert manifest["latest"]["immutable"] == f"latest.{manifest['latest']['hash']}.json"
+    assert second["written"][:2] == ["daily/2026-04-02.json", day["immutable"]]
+    assert old_day != day["immutable"]
+    # Pages that loaded the previous manifest can still fetch what it named.
+    assert manifest["retired"] == {old_day: clock[0], old_latest: clock[0]}
+    assert (tmp_path / old_day).exists() and (tmp_path / (old_day + ".gz")).exists()
+
+    clock[0] = "2026-04-02T12:00:00Z"
+    publish([dated_story("2026-04-02", "launch"), dated_story("2026-04-02", "update"), dated_story("2026-04-02", "more")], tmp_path, immutable=True)
+    assert (tmp_path / old_day).exists()
+    assert len(json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))["retired"]) == 4
+
+    clock[0] = "2026-04-03T06:00:00Z"
+    publish([dated_story("2026-04-02", "launch"), dated_story("2026-04-02", "update"), dated_story("2026-04-02", "more")], tmp_path, immutable=True)
+    assert not list((tmp_path / "daily").glob(Path(old_day).name + "*"))
+    assert len(list((tmp_path / "daily").glob("*.*.json"))) == 3
+    assert len(list(tmp_path.glob("latest.*.json.gz"))) == 2
+
+    publish([dated_story("2026-04-02", "update")], tmp_path)
+    clock[0] = "2026-04-05T00:00:00Z"
+    publish([dated_story("2026-04-02", "update")], tmp_path)
+    assert not list(tmp_path.rglob("*.gz"))
+    final = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    assert "immutable" not in final["days"][0]
+    assert "retired" not in final
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_write_atomic_gives_files_the_usual_permissions(tmp_path: Path) -> None:
+    umask = os.umask(0o022)
+    try:
+        write_atomic(tmp_path / "latest.json", b"{}")
+        (tmp_path / "manifest.json").write_bytes(b"{}")
+        (tmp_path / "manifest.json").chmod(0o640)
+        write_atomic(tmp_path / "manifest.json", b"{}")
+    finally:
+        os.umask(umask)
+
+    assert stat.S_IMODE((tmp_path / "latest.json").stat().st_mode) == 0o644
+    assert stat.S_IMODE((tmp_path / "manifest.json").stat().st_mode) == 0o640